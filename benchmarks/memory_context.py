@@ -0,0 +1,74 @@
+"""
+Benchmark for ConversationMemory context fetches as the table grows.
+
+Fills a scratch database with synthetic turns spread over many sessions and
+times get_recent_conversations for random sessions at each size. With the
+(session_id, created_ms, id) index the fetch time should stay flat.
+
+Run from the project root:
+    python -m benchmarks.memory_context --sizes 10000 100000 1000000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from core.memory import ConversationMemory
+
+
+def fill(memory: ConversationMemory, start: int, stop: int, sessions: int, chunk_size: int = 50_000):
+    base_ms = 1_700_000_000_000
+    for chunk_start in range(start, stop, chunk_size):
+        chunk_stop = min(chunk_start + chunk_size, stop)
+        rows = [
+            (f"user message {i}", f"assistant reply {i}", f"session-{i % sessions}",
+             "2024-01-01 00:00:00", base_ms + i)
+            for i in range(chunk_start, chunk_stop)
+        ]
+        with memory.pool.transaction() as conn:
+            conn.executemany('''
+                insert into conversations (user_input, assistant_response, session_id, timestamp, created_ms)
+                values (?, ?, ?, ?, ?)
+            ''', rows)
+
+
+def time_fetches(memory: ConversationMemory, sessions: int, limit: int, iterations: int) -> float:
+    session_ids = [f"session-{random.randrange(sessions)}" for _ in range(iterations)]
+    start = time.perf_counter()
+    for session_id in session_ids:
+        memory.get_recent_conversations(limit, session_id)
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = ConversationMemory(os.path.join(tmp, "bench.db"))
+
+        with memory.pool.connection() as conn:
+            plan = conn.execute('''
+                explain query plan
+                select user_input, assistant_response, timestamp from conversations
+                where session_id = ? order by created_ms desc, id desc limit ?
+            ''', ("session-0", args.limit)).fetchall()
+        print("Query plan:", "; ".join(row[-1] for row in plan))
+
+        rows = 0
+        for size in sorted(args.sizes):
+            fill(memory, rows, size, args.sessions)
+            rows = size
+            per_fetch = time_fetches(memory, args.sessions, args.limit, args.iterations)
+            print(f"{rows:>12,} rows: {per_fetch * 1e6:8.1f} us per context fetch")
+
+        memory.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Stand-in Ollama HTTP server for benchmarks and offline runs.
+
+Answers /api/chat, /api/generate, /api/embed, /api/tags and /api/version the
+way Ollama does, streaming or not. A reply waits `latency` seconds (standing
+in for prefill) and then emits `reply_tokens` tokens at `tokens_per_second`,
+so client overhead can be measured against a known model time.
+
+Run from the project root to serve on Ollama's usual port:
+    python -m benchmarks.stub_ollama --port 11434 --tokens-per-second 40
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Sequence
+
+DEFAULT_MODELS = ('mistral:latest', 'qwen3:1.7b', 'qwen3:4b', 'deepseek-r1:1.5b', 'nomic-embed-text:latest')
+WORDS = ("the", "quick", "bliss", "reply", "is", "made", "of", "plain", "words", "and")
+
+
+class StubOllamaServer:
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, tokens_per_second: float = 0.0,
+                 latency: float = 0.0, reply_tokens: int = 32, models: Sequence[str] = DEFAULT_MODELS,
+                 embedding_dim: int = 768):
+        """
+        Configure the stub server; call start() or use it as a context manager.
+
+        Args:
+            host (str): Interface to bind
+            port (int): Port to bind, 0 picks a free one
+            tokens_per_second (float): Generation rate; 0 emits all tokens at once
+            latency (float): Seconds before the first token, standing in for prefill
+            reply_tokens (int): Tokens in every reply
+            models (list): Names reported by /api/tags
+            embedding_dim (int): Size of the vectors /api/embed returns
+        """
+        self.tokens_per_second = tokens_per_second
+        self.latency = latency
+        self.reply_tokens = reply_tokens
+        self.models = list(models)
+        self.embedding_dim = embedding_dim
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubOllamaServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StubOllamaServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def tokens(self):
+        """
+        Yield the reply's tokens at the configured pace.
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        interval = 1.0 / self.tokens_per_second if self.tokens_per_second else 0.0
+        next_at = time.perf_counter()
+        for i in range(self.reply_tokens):
+            if interval:
+                next_at += interval
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            yield WORDS[i % len(WORDS)] + " "
+
+
+def _make_handler(stub: StubOllamaServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body go out in separate writes; without this, delayed ACKs add ~40 ms per reply
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, payload, status: int = 200):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_stream(self, lines):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for line in lines:
+                data = (json.dumps(line) + "\n").encode('utf-8')
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+
+        def do_GET(self):
+            if self.path == '/api/tags':
+                self._send_json({"models": [{"name": name, "model": name, "size": 0, "digest": ""}
+                                            for name in stub.models]})
+            elif self.path == '/api/version':
+                self._send_json({"version": "0.0.0-stub"})
+            else:
+                self._send_json({"error": "not found"}, 404)
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            request = json.loads(self.rfile.read(length) or b'{}')
+            with stub._lock:
+                stub.requests += 1
+
+            if self.path == '/api/embed':
+                inputs = request.get('input') or []
+                if isinstance(inputs, str):
+                    inputs = [inputs]
+                dim = request.get('dimensions') or stub.embedding_dim
+                self._send_json({"model": request.get('model'),
+                                 "embeddings": [_embedding(text, dim) for text in inputs]})
+                return
+            if self.path not in ('/api/chat', '/api/generate'):
+                self._send_json({"error": "not found"}, 404)
+                return
+
+            chat = self.path == '/api/chat'
+            if chat:
+                prompt_text = " ".join(str(message.get('content', '')) for message in request.get('messages') or [])
+            else:
+                prompt_text = request.get('prompt') or ''
+            prompt_tokens = len(prompt_text.split())
+
+            def piece(text: str, done: bool, started: float):
+                line = {"model": request.get('model'), "created_at": "1970-01-01T00:00:00Z", "done": done}
+                if chat:
+                    line["message"] = {"role": "assistant", "content": text}
+                else:
+                    line["response"] = text
+                if done:
+                    total = int((time.perf_counter() - started) * 1e9)
+                    prefill = int(stub.latency * 1e9)
+                    line.update({
+                        "done_reason": "stop",
+                        "total_duration": total,
+                        "load_duration": 0,
+                        "prompt_eval_count": prompt_tokens,
+                        "prompt_eval_duration": prefill,
+                        "eval_count": stub.reply_tokens,
+                        "eval_duration": max(0, total - prefill),
+                    })
+                return line
+
+            started = time.perf_counter()
+            # An empty generate request only loads the model
+            if not chat and not prompt_text:
+                self._send_json(piece("", True, started))
+            elif request.get('stream', True):
+                self._send_stream(_stream_lines(stub, piece, started))
+            else:
+                text = "".join(stub.tokens())
+                self._send_json(piece(text, True, started))
+
+    return Handler
+
+
+def _stream_lines(stub: StubOllamaServer, piece, started: float):
+    for token in stub.tokens():
+        yield piece(token, False, started)
+    yield piece("", True, started)
+
+
+def _embedding(text: str, dim: int):
+    seed = sum(text.encode('utf-8')) or 1
+    return [((seed * (i + 1)) % 97) / 97.0 for i in range(dim)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--tokens-per-second", type=float, default=40.0)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--reply-tokens", type=int, default=64)
+    args = parser.parse_args()
+
+    server = StubOllamaServer(args.host, args.port, args.tokens_per_second, args.latency, args.reply_tokens)
+    print(f"Stub Ollama listening on {server.url}")
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
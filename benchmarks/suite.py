@@ -0,0 +1,274 @@
+"""
+Offline benchmark suite for the reply pipeline, with JSON output for comparing commits.
+
+Everything runs against StubOllamaServer on localhost, so no models and no
+network are needed. Metrics are flat "section.name" keys; timings are in
+milliseconds (_ms) or microseconds (_us), rates per second (_per_s).
+
+Run from the project root:
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --sections memory --sizes 10000 1000000 10000000
+    python -m benchmarks.suite --quick --output new.json --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List
+
+import ollama
+
+from benchmarks.memory_context import fill, time_fetches
+from benchmarks.stub_ollama import StubOllamaServer
+from core.ai_client import OllamaClient
+from core.context_window import default_system_prompt_budget
+from core.memory import ConversationMemory
+from core.personality import PersonalityLoader
+from core.personality_bundle import PersonalityBundle, build_bundle
+from core.personality_registry import PersonalityRegistry
+
+SECTIONS = ('generate', 'stream', 'memory', 'personality')
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def timings(prefix: str, samples: List[float], scale: float = 1e3, unit: str = 'ms') -> Dict[str, float]:
+    return {
+        f"{prefix}_mean_{unit}": statistics.fmean(samples) * scale,
+        f"{prefix}_p50_{unit}": percentile(samples, 0.5) * scale,
+        f"{prefix}_p95_{unit}": percentile(samples, 0.95) * scale,
+    }
+
+
+def make_client(stub: StubOllamaServer, memory: ConversationMemory) -> OllamaClient:
+    client = OllamaClient('qwen3:1.7b', memory=memory)
+    client.client = ollama.Client(host=stub.url)
+    return client
+
+
+def bench_generate(args, tmp: str) -> Dict[str, float]:
+    results = {}
+    memory = ConversationMemory(os.path.join(tmp, "generate.db"))
+
+    # Instant model: everything measured is client-side overhead plus one local HTTP round trip
+    with StubOllamaServer(reply_tokens=args.reply_tokens) as stub:
+        client = make_client(stub, memory)
+        client.generate_response("warm up", session_id="overhead")
+        samples = []
+        for i in range(args.requests):
+            started = time.perf_counter()
+            client.generate_response(f"overhead message {i}", session_id="overhead")
+            samples.append(time.perf_counter() - started)
+        results.update(timings("overhead", samples))
+
+    # Paced model under concurrent sessions: how close throughput gets to the model's own limit
+    with StubOllamaServer(tokens_per_second=args.tokens_per_second, latency=args.latency,
+                          reply_tokens=args.reply_tokens) as stub:
+        model_seconds = args.latency + args.reply_tokens / args.tokens_per_second
+        samples = []
+        lock = threading.Lock()
+
+        def session(worker: int):
+            client = make_client(stub, memory)
+            for i in range(max(1, args.requests // args.concurrency)):
+                started = time.perf_counter()
+                client.generate_response(f"message {i}", session_id=f"concurrent-{worker}")
+                with lock:
+                    samples.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=session, args=(worker,)) for worker in range(args.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        results.update(timings("paced", samples))
+        results["paced_model_ms"] = model_seconds * 1e3
+        results["paced_throughput_per_s"] = len(samples) / elapsed
+
+    memory.close()
+    return results
+
+
+def bench_stream(args, tmp: str) -> Dict[str, float]:
+    memory = ConversationMemory(os.path.join(tmp, "stream.db"))
+    with StubOllamaServer(tokens_per_second=args.tokens_per_second, latency=args.latency,
+                          reply_tokens=args.reply_tokens) as stub:
+        client = make_client(stub, memory)
+        list(client.generate_response_stream("warm up", session_id="stream"))
+        first_token, total = [], []
+        for i in range(max(1, args.requests // 4)):
+            started = time.perf_counter()
+            first = None
+            for _ in client.generate_response_stream(f"stream message {i}", session_id="stream"):
+                if first is None:
+                    first = time.perf_counter() - started
+            total.append(time.perf_counter() - started)
+            first_token.append(first)
+
+    memory.close()
+    results = timings("first_token", first_token)
+    results.update(timings("total", total))
+    results["model_first_token_ms"] = args.latency * 1e3
+    results["model_total_ms"] = (args.latency + args.reply_tokens / args.tokens_per_second) * 1e3
+    return results
+
+
+def time_op(func: Callable[[int], object], iterations: int) -> float:
+    started = time.perf_counter()
+    for i in range(iterations):
+        func(i)
+    return (time.perf_counter() - started) / iterations
+
+
+def bench_memory(args, tmp: str) -> Dict[str, float]:
+    results = {}
+    memory = ConversationMemory(os.path.join(tmp, "memory.db"))
+    sessions = args.sessions
+    rows = 0
+    for size in sorted(args.sizes):
+        print(f"  filling to {size:,} rows...", file=sys.stderr)
+        fill(memory, rows, size, sessions)
+        rows = size
+        label = f"{size}"
+        results[f"recent_{label}_us"] = time_fetches(memory, sessions, 5, args.iterations) * 1e6
+        results[f"count_{label}_us"] = time_op(
+            lambda i: memory.get_conversation_count(f"session-{i % sessions}"), args.iterations) * 1e6
+        results[f"save_{label}_us"] = time_op(
+            lambda i: memory.save_conversation("bench user", "bench reply", f"session-{i % sessions}"),
+            args.iterations) * 1e6
+        rows += args.iterations
+        search_iterations = max(1, args.iterations // 20)
+        results[f"search_{label}_us"] = time_op(
+            lambda i: memory.search_conversations(f"message {i}", f"session-{i % sessions}", limit=10),
+            search_iterations) * 1e6
+    memory.close()
+    return results
+
+
+def bench_personality(args, tmp: str) -> Dict[str, float]:
+    loader = PersonalityLoader()
+    names = loader.get_available_personalities() or ["default"]
+    iterations = args.iterations * 5
+    results = {
+        "load_us": time_op(lambda i: loader.load_personality(names[i % len(names)]), iterations) * 1e6,
+    }
+    loader.load_personality(names[0])
+    results["prompt_us"] = time_op(lambda i: loader.get_personality_prompt(), iterations) * 1e6
+    personalities = [loader.get(name) for name in names]
+    results["system_prompt_us"] = time_op(
+        lambda i: personalities[i % len(personalities)].system_prompt(default_system_prompt_budget('qwen3:1.7b')),
+        iterations) * 1e6
+    results["full_prompt_tokens"] = statistics.fmean(
+        personality.system_prompt(full=True).token_count for personality in personalities)
+    results["compact_prompt_tokens"] = statistics.fmean(
+        personality.system_prompt(default_system_prompt_budget('qwen3:1.7b')).token_count
+        for personality in personalities)
+
+    bundle_path = os.path.join(tmp, "personalities.bundle")
+    build_bundle(loader.personalities_dir, bundle_path)
+    results["registry_list_us"] = time_op(
+        lambda i: PersonalityRegistry(loader.personalities_dir).names(), args.iterations) * 1e6
+    results["bundle_list_us"] = time_op(lambda i: PersonalityBundle(bundle_path).names(), args.iterations) * 1e6
+    results["bundle_first_get_us"] = time_op(
+        lambda i: PersonalityBundle(bundle_path).get(names[i % len(names)]), args.iterations) * 1e6
+    return results
+
+
+BENCHMARKS = {
+    'generate': bench_generate,
+    'stream': bench_stream,
+    'memory': bench_memory,
+    'personality': bench_personality,
+}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(baseline: Dict, current: Dict):
+    """
+    Print the change of every metric present in both runs; higher is worse except for rates.
+    """
+    old, new = baseline["metrics"], current["metrics"]
+    print(f"\nCompared with {baseline['meta'].get('commit')}:")
+    for name in sorted(set(old) & set(new)):
+        if not old[name]:
+            continue
+        change = (new[name] - old[name]) / old[name] * 100
+        worse = change < 0 if name.endswith("_per_s") else change > 0
+        flag = "  <- regression" if worse and abs(change) >= 10 else ""
+        print(f"  {name:<40} {old[name]:>12.2f} -> {new[name]:>12.2f} ({change:+6.1f}%){flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sections", nargs="+", choices=SECTIONS, default=list(SECTIONS))
+    parser.add_argument("--output", help="Write the JSON results here (default: stdout)")
+    parser.add_argument("--compare", help="Earlier JSON results to compare against")
+    parser.add_argument("--quick", action="store_true", help="Small sizes and few iterations, for a smoke run")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000],
+                        help="Conversation table sizes for the memory section")
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--reply-tokens", type=int, default=32)
+    args = parser.parse_args()
+
+    if args.quick:
+        args.sizes = [10_000, 100_000]
+        args.iterations = 200
+        args.requests = 40
+
+    metrics = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for section in args.sections:
+            print(f"Running {section} benchmarks...", file=sys.stderr)
+            for name, value in BENCHMARKS[section](args, tmp).items():
+                metrics[f"{section}.{name}"] = round(value, 3)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "args": vars(args),
+        },
+        "metrics": metrics,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + "\n")
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            compare(json.load(file), report)
+
+
+if __name__ == "__main__":
+    main()
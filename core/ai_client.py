@@ -1,29 +1,289 @@
 import ollama
+import httpx
 import json
-from typing import List, Dict, Optional
+import threading
+import time
+from contextlib import nullcontext
+from typing import List, Dict, Iterator, Optional, Tuple
 
 try:
     from .personality import PersonalityLoader
     from .memory import ConversationMemory
+    from .compaction import ConversationCompactor
+    from .context_window import (ContextAssembler, ContextWindow, default_keep_alive, default_num_ctx,
+                                 default_system_prompt_budget, default_token_budget)
+    from .streaming import ThinkStripper, strip_reasoning
+    from .response_cache import ResponseCache
+    from .model_catalog import ModelCatalog, get_model_catalog, resolve_model_name
+    from .scheduler import BACKGROUND, INTERACTIVE, RequestScheduler
+    from .model_router import ModelRouter, TASK_CHAT, TASK_SUMMARIZE
+    from .ollama_pool import OllamaPool
+    from .metrics import MetricsRegistry, STAGE_SECONDS, get_metrics_registry
+    from .prompt_compiler import SystemPrompt
 except ImportError:
     from personality import PersonalityLoader
     from memory import ConversationMemory
+    from compaction import ConversationCompactor
+    from context_window import (ContextAssembler, ContextWindow, default_keep_alive, default_num_ctx,
+                                default_system_prompt_budget, default_token_budget)
+    from streaming import ThinkStripper, strip_reasoning
+    from response_cache import ResponseCache
+    from model_catalog import ModelCatalog, get_model_catalog, resolve_model_name
+    from scheduler import BACKGROUND, INTERACTIVE, RequestScheduler
+    from model_router import ModelRouter, TASK_CHAT, TASK_SUMMARIZE
+    from ollama_pool import OllamaPool
+    from metrics import MetricsRegistry, STAGE_SECONDS, get_metrics_registry
+    from prompt_compiler import SystemPrompt
+
+
+USAGE_FIELDS = (
+    'prompt_eval_count',
+    'prompt_eval_duration',
+    'eval_count',
+    'eval_duration',
+    'load_duration',
+    'total_duration',
+)
+
+
+# What a request that ran past the client's timeout raises
+TIMEOUT_ERRORS = (httpx.TimeoutException, TimeoutError)
+
+
+def extract_usage(response) -> Dict[str, int]:
+    """
+    Pull Ollama's token counts and timings (durations in nanoseconds) out of a chat response.
+    
+    A prompt_eval_count well below the prompt's size means Ollama reused its KV cache
+    for the unchanged prefix and only evaluated the new tokens.
+    """
+    usage = {}
+    for field in USAGE_FIELDS:
+        value = response.get(field)
+        if value is not None:
+            usage[field] = value
+    return usage
+
 
 class OllamaClient:
-    def __init__(self, model_name: str = 'mistral'):
+    CHAT_OPTIONS = {
+        'temperature': 0.7,
+        'top_p': 0.9,
+        'num_predict': 1000
+    }
+    SUMMARY_OPTIONS = {
+        'temperature': 0.7,
+        'top_p': 0.9,
+        'num_predict': 500
+    }
+
+    def __init__(self, model_name: str = 'mistral', memory: Optional[ConversationMemory] = None,
+                 semantic_index=None, semantic_k: int = 3, token_budget: Optional[int] = None,
+                 max_history_turns: int = 50, response_cache: Optional[ResponseCache] = None,
+                 stable_prefix: bool = False, prefix_step: int = 4, keep_alive: Optional[str] = None,
+                 num_ctx: Optional[int] = None, catalog: Optional[ModelCatalog] = None,
+                 scheduler: Optional[RequestScheduler] = None, router: Optional[ModelRouter] = None,
+                 request_timeout: Optional[float] = None, pool: Optional[OllamaPool] = None,
+                 metrics: Optional[MetricsRegistry] = None, system_prompt_budget: Optional[int] = None,
+                 full_system_prompt: bool = False, personality_loader: Optional[PersonalityLoader] = None,
+                 model_token_budget: bool = False, compactor: Optional[ConversationCompactor] = None):
         """
         Initialize the Ollama client with the specified model.
         
         Args:
             model_name (str): Name of the Ollama model to use (default: mistral)
+            memory (ConversationMemory): Shared conversation memory; a private one is created if omitted
+            semantic_index (SemanticMemoryIndex): Optional index used to recall relevant older turns;
+                                                  each session is backfilled from memory on first use
+            semantic_k (int): Maximum number of older turns recalled per request
+            token_budget (int): Estimated prompt token budget; history is packed to fit it instead
+                                of using a fixed turn count (see context_window.default_token_budget)
+            max_history_turns (int): Most turns fetched for packing when a token budget is set
+            response_cache (ResponseCache): Opt-in cache of replies to identical requests
+            stable_prefix (bool): Keep the system prompt and history byte-identical between turns so
+                                  Ollama can reuse its KV cache; also pins num_ctx and keep_alive
+                                  to the per-model defaults in context_window
+            prefix_step (int): In stable_prefix mode, the history window slides by this many turns
+                               at once instead of one turn per request
+            keep_alive (str): How long Ollama keeps the model loaded, e.g. '30m' (overrides the default)
+            num_ctx (int): Context size sent with every request (overrides the default)
+            catalog (ModelCatalog): Cached model list used to resolve the model name
+                                    (default: the shared catalog)
+            scheduler (RequestScheduler): Queue shared with other clients that admits model
+                                          requests fairly across sessions; None sends directly
+            router (ModelRouter): Picks the model per task and falls back to smaller ones when
+                                  latency exceeds its SLO; None always uses model_name
+            request_timeout (float): Seconds before a model request times out; with a router,
+                                     a timed-out request is retried once on the fallback model
+            pool (OllamaPool): Spread requests over several Ollama servers instead of the default
+                               host; the pool's own timeout applies instead of request_timeout
+            metrics (MetricsRegistry): Where per-stage latencies go (default: the process-wide
+                                       registry, which is disabled unless enabled explicitly)
+            system_prompt_budget (int): Estimated tokens the personality prompt may use (default: the
+                                        per-model value in context_window.MODEL_SYSTEM_PROMPT_BUDGETS)
+            full_system_prompt (bool): Send every personality field instead of the compact prompt
+            personality_loader (PersonalityLoader): Where personalities come from, e.g. one reading a
+                                                    bundle (default: data/personalities)
+            model_token_budget (bool): Pack history to the token budget of the model each request is
+                                       routed to (context_window.default_token_budget) instead of token_budget
+            compactor (ConversationCompactor): Compactor shared with other clients of the same memory,
+                                               told about every saved turn (see enable_compaction)
         """
         self.model_name = model_name
-        self.client = ollama
-        self.personality_loader = PersonalityLoader()
-        self.memory = ConversationMemory()
+        if pool is not None:
+            self.client = pool
+        elif request_timeout:
+            self.client = ollama.Client(timeout=request_timeout)
+        else:
+            self.client = ollama
+        self.personality_loader = personality_loader if personality_loader is not None else PersonalityLoader()
+        self.memory = memory if memory is not None else ConversationMemory()
+        self.semantic_index = semantic_index
+        self.semantic_k = semantic_k
+        self._backfilled_sessions = set()
+        self.token_budget = token_budget
+        self.model_token_budget = model_token_budget
+        self.max_history_turns = max_history_turns
+        self.context_assembler = ContextAssembler(token_budget)
+        self.last_context_window: Optional[ContextWindow] = None
+        self.response_cache = response_cache
+        self.stable_prefix = stable_prefix
+        self.prefix_step = max(1, prefix_step)
+        self.keep_alive = keep_alive
+        self.num_ctx = num_ctx
+        self.last_usage: Optional[Dict[str, int]] = None
+        self.compactor = compactor
+        if catalog is None:
+            catalog = ModelCatalog(pool) if pool is not None else get_model_catalog()
+        self.catalog = catalog
+        self.scheduler = scheduler
+        self.router = router
+        self.last_model: Optional[str] = None
+        self.metrics = metrics if metrics is not None else get_metrics_registry()
+        self.last_personality_name: Optional[str] = None
+        self.system_prompt_budget = system_prompt_budget
+        self.full_system_prompt = full_system_prompt
+        self.last_system_prompt: Optional[SystemPrompt] = None
+        self.warm_state = 'cold'
+        self.warm_error: Optional[str] = None
+        self._warmed = threading.Event()
+        self._warm_lock = threading.Lock()
+
+    @property
+    def chat_model(self) -> str:
+        """
+        The model chat requests go to right now: the router's pick, or model_name without a router.
+        """
+        return self._model_for(TASK_CHAT)
+
+    @property
+    def is_ready(self) -> bool:
+        return self.warm_state == 'ready'
+
+    def warm_up(self, background: bool = True, fallbacks: bool = False) -> bool:
+        """
+        Resolve the model name and load the model into Ollama before the first message.
+
+        Loading happens through an empty prompt sent with the same num_ctx and
+        keep_alive as real requests, so the first chat does not reload it.
+        Calling this again while warming or once ready does nothing.
+
+        Args:
+            background (bool): Warm up on a daemon thread and return immediately
+            fallbacks (bool): With a router, also load the chat route's fallback models once the
+                              primary is ready; only worth it when Ollama can keep them all loaded,
+                              otherwise they evict the primary
+
+        Returns:
+            bool: True if the model is ready (always False when started in the background)
+        """
+        with self._warm_lock:
+            if self.warm_state in ('warming', 'ready'):
+                return self.is_ready
+            self.warm_state = 'warming'
+            self.warm_error = None
+            self._warmed.clear()
+
+        if background:
+            threading.Thread(target=self._warm, args=(fallbacks,), name="model-warm-up", daemon=True).start()
+            return False
+        self._warm(fallbacks)
+        return self.is_ready
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until a started warm-up finishes.
+
+        Returns:
+            bool: True if the model is ready, False if warm-up failed, timed out or never started
+        """
+        if self.warm_state == 'cold':
+            return False
+        self._warmed.wait(timeout)
+        return self.is_ready
+
+    def _load_model(self, model_name: str) -> str:
+        matched_model = self.catalog.resolve(model_name)
+        if not matched_model:
+            raise LookupError(f"model '{model_name}' is not installed")
+        self.client.generate(
+            model=matched_model,
+            prompt="",
+            options=self._request_options({}, matched_model),
+            **self._chat_kwargs(matched_model)
+        )
+        return matched_model
+
+    def _warm(self, fallbacks: bool = False):
+        model_name = None
+        try:
+            model_name = self._model_for(TASK_CHAT)
+            matched_model = self._load_model(model_name)
+            if self.router is None:
+                self.model_name = matched_model
+            self.warm_state = 'ready'
+        except Exception as e:
+            print(f"Model warm-up failed: {e!r}")
+            self.warm_error = repr(e)
+            self.warm_state = 'failed'
+        finally:
+            self._warmed.set()
+
+        if fallbacks and self.router is not None and self.is_ready:
+            # Load the fallbacks too, after the primary is ready, so the first fallback after a
+            # timeout does not also pay for loading its model
+            for fallback in self.router.routes.get(TASK_CHAT, []):
+                if fallback == model_name:
+                    continue
+                try:
+                    self._load_model(fallback)
+                except Exception as e:
+                    print(f"Warm-up of fallback model '{fallback}' failed: {e!r}")
+
+    def enable_compaction(self, keep_recent: Optional[int] = None, min_batch: int = 10, retention: str = 'keep',
+                          background: bool = True) -> ConversationCompactor:
+        """
+        Summarize old turns into a stored rolling summary that is fed back as long-range context.
+        
+        Args:
+            keep_recent (int): Number of newest turns per session left out of the summary (default:
+                               the turns the session's latest prompt held, so none fall in between)
+            min_batch (int): Old turns that must accumulate before a summarization run
+            retention (str): 'keep', 'archive' or 'delete' the raw turns once summarized
+            background (bool): Compact on a worker thread, off the reply path
+            
+        Returns:
+            ConversationCompactor: The compactor now attached to this client
+        """
+        self.compactor = ConversationCompactor(
+            self.memory, self.summarize_turns, keep_recent=keep_recent,
+            min_batch=min_batch, retention=retention, background=background
+        )
+        return self.compactor
     
     def generate_response(self, user_input: str, personality_name: str = "default", 
-                         session_id: str = "default", context_limit: int = 5) -> str:
+                         session_id: str = "default", context_limit: int = 5,
+                         token_budget: Optional[int] = None) -> str:
         """
         Generate a response using the Ollama model with personality and conversation context.
         
@@ -32,38 +292,24 @@ class OllamaClient:
             personality_name (str): Name of personality to load from data/personalities/
             session_id (str): Session identifier for conversation memory
             context_limit (int): Number of recent conversations to include as context
+            token_budget (int): Pack history by estimated tokens up to this budget; overrides
+                                the client's token_budget, and context_limit becomes a minimum fetch
             
         Returns:
             str: Generated response from the model
         """
         try:
-            personality_data = self.personality_loader.load_personality(personality_name)
-            
-            conversation_context = self.memory.get_recent_conversations(context_limit, session_id)
-            
-            system_prompt = self.personality_loader.get_personality_prompt()
-            
-            messages = self._build_messages(system_prompt, user_input, conversation_context)
-            
-            response = self.client.chat(
-                model=self.model_name,
-                messages=messages,
-                options={
-                    'temperature': 0.7,
-                    'top_p': 0.9,
-                    'num_predict': 1000
-                }
-            )
-            
-            ai_response = response['message']['content'].strip()
-
-            if ai_response.startswith("<think>") and "</think>" in ai_response:
-                end_index = ai_response.index("</think>") + len("</think>")
-                ai_response = ai_response[end_index:].strip()
-            
-            self.memory.save_conversation(user_input, ai_response, session_id)
-
-            
+            with self.metrics.stage('total'):
+                # Routed once, so the prompt budget, cache key and request all use the same model
+                model = self._model_for(TASK_CHAT)
+                window, personality_version = self._prepare_messages(
+                    user_input, personality_name, session_id, context_limit, token_budget, model
+                )
+                
+                ai_response = self._chat(window.messages, self.CHAT_OPTIONS, personality_version,
+                                         session_id=session_id, model=model)
+                
+                self._record_turn(user_input, ai_response, session_id, window)
             
             return ai_response
             
@@ -72,32 +318,339 @@ class OllamaClient:
             error_response = "I'm sorry, I couldn't process that request."
             self.memory.save_conversation(user_input, error_response, session_id)
             return error_response
+
+    def generate_response_stream(self, user_input: str, personality_name: str = "default",
+                                 session_id: str = "default", context_limit: int = 5,
+                                 token_budget: Optional[int] = None) -> Iterator[str]:
+        """
+        Stream a response token by token, with reasoning blocks removed as they arrive.
+        
+        Takes the same arguments as generate_response. The complete reply is saved to
+        conversation memory once the stream ends, or when the consumer stops early.
+        
+        Yields:
+            str: Visible pieces of the reply in order
+        """
+        stripper = ThinkStripper()
+        parts = []
+        failed = False
+        window = None
+        try:
+            model = self._model_for(TASK_CHAT)
+            window, personality_version = self._prepare_messages(
+                user_input, personality_name, session_id, context_limit, token_budget, model
+            )
+            messages = window.messages
+
+            cache_key = self._cache_key(messages, self.CHAT_OPTIONS, personality_version, model)
+            cached = self.response_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                self.last_usage = None
+                parts.append(cached)
+                yield cached
+                return
+
+            # The slot is held until the last token, since Ollama is busy for the whole stream
+            with self._slot(session_id, INTERACTIVE):
+                while True:
+                    started = time.monotonic()
+                    try:
+                        stream = self.client.chat(
+                            model=model,
+                            messages=messages,
+                            options=self._request_options(self.CHAT_OPTIONS, model),
+                            stream=True,
+                            **self._chat_kwargs(model)
+                        )
+
+                        for chunk in stream:
+                            if chunk.get('done'):
+                                self.last_usage = extract_usage(chunk)
+                                self.metrics.observe_usage(self.last_usage)
+                            text = stripper.feed(chunk['message']['content'])
+                            if text:
+                                if not parts:
+                                    self.metrics.observe(STAGE_SECONDS, time.monotonic() - started, stage='first_token')
+                                parts.append(text)
+                                yield text
+                    except TIMEOUT_ERRORS:
+                        fallback = self._fallback_after_timeout(TASK_CHAT, model)
+                        # Only start over if nothing has been shown yet
+                        if fallback is None or parts:
+                            raise
+                        model = fallback
+                        stripper = ThinkStripper()
+                        continue
+                    self._record_latency(TASK_CHAT, model, started)
+                    break
+            self.last_model = model
+
+            text = stripper.flush()
+            if text:
+                parts.append(text)
+                yield text
+
+            if cache_key and parts:
+                # A timeout may have moved the request to a fallback model
+                self.response_cache.put(self._cache_key(messages, self.CHAT_OPTIONS, personality_version, model),
+                                        "".join(parts).strip())
+
+        except Exception as e:
+            print(f"Error generating response: {e}")
+            failed = True
+            if not parts:
+                parts.append("I'm sorry, I couldn't process that request.")
+                yield parts[0]
+
+        finally:
+            ai_response = "".join(parts).strip()
+            if failed:
+                self.memory.save_conversation(user_input, ai_response, session_id)
+            elif ai_response:
+                self._record_turn(user_input, ai_response, session_id, window)
+
+    def _cache_key(self, messages: List[Dict], options: Dict, personality_version: str = "",
+                   model_name: Optional[str] = None) -> Optional[str]:
+        if self.response_cache is None or not self.response_cache.cacheable(options):
+            return None
+        return self.response_cache.make_key(model_name or self.model_name, options, messages, personality_version)
+
+    def _request_options(self, options: Dict, model_name: Optional[str] = None) -> Dict:
+        model_name = model_name or self.model_name
+        num_ctx = self.num_ctx or (default_num_ctx(model_name) if self.stable_prefix else None)
+        if num_ctx:
+            return dict(options, num_ctx=num_ctx)
+        return options
+
+    def _chat_kwargs(self, model_name: Optional[str] = None) -> Dict:
+        model_name = model_name or self.model_name
+        keep_alive = self.keep_alive or (default_keep_alive(model_name) if self.stable_prefix else None)
+        return {'keep_alive': keep_alive} if keep_alive else {}
+
+    def _model_for(self, task: str) -> str:
+        return self.router.route(task) if self.router is not None else self.model_name
+
+    def _record_latency(self, task: str, model: str, started: float):
+        elapsed = time.monotonic() - started
+        if self.router is not None:
+            self.router.record(task, model, elapsed)
+        # For streams this runs until the consumer has taken the last token
+        self.metrics.observe(STAGE_SECONDS, elapsed, stage='model')
+
+    def _fallback_after_timeout(self, task: str, model: str) -> Optional[str]:
+        """
+        Mark model as timed out and return the model to retry with, or None if there is none.
+        """
+        if self.router is None:
+            return None
+        self.router.record_timeout(task, model)
+        fallback = self._model_for(task)
+        return fallback if fallback != model else None
+
+    def _send_chat(self, task: str, messages: List[Dict], options: Dict, session_id: str, priority: str,
+                   model: Optional[str] = None):
+        """
+        Send a non-streaming chat request to model, or the model routed for task.
+        
+        Returns:
+            tuple: The Ollama response and the model that produced it
+        """
+        model = model or self._model_for(task)
+        with self._slot(session_id, priority):
+            while True:
+                started = time.monotonic()
+                try:
+                    response = self.client.chat(
+                        model=model,
+                        messages=messages,
+                        options=self._request_options(options, model),
+                        **self._chat_kwargs(model)
+                    )
+                except TIMEOUT_ERRORS:
+                    model = self._fallback_after_timeout(task, model)
+                    if model is None:
+                        raise
+                    continue
+                self._record_latency(task, model, started)
+                return response, model
+
+    def _slot(self, session_id: str, priority: str):
+        if self.scheduler is None:
+            return nullcontext()
+        return self.scheduler.slot(session_id, priority)
+
+    def _chat(self, messages: List[Dict], options: Dict, personality_version: str = "",
+              session_id: str = "default", priority: str = INTERACTIVE, task: str = TASK_CHAT,
+              model: Optional[str] = None) -> str:
+        """
+        Run one non-streaming chat request, answering from the response cache when possible.
+        
+        Cache misses wait for a scheduler slot, if the client has a scheduler, and go to
+        model, or the model the router picks for task.
+        
+        Returns:
+            str: Model reply with reasoning blocks removed
+        """
+        model = model or self._model_for(task)
+        cache_key = self._cache_key(messages, options, personality_version, model)
+        if cache_key:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                self.last_usage = None
+                return cached
+
+        response, model = self._send_chat(task, messages, options, session_id, priority, model)
+        self.last_model = model
+        self.last_usage = extract_usage(response)
+        self.metrics.observe_usage(self.last_usage)
+        ai_response = strip_reasoning(response['message']['content'])
+
+        if cache_key and ai_response:
+            # A timeout may have moved the request to a fallback model
+            self.response_cache.put(self._cache_key(messages, options, personality_version, model),
+                                    ai_response)
+        return ai_response
+
+    def _prepare_messages(self, user_input: str, personality_name: str, session_id: str,
+                          context_limit: int, token_budget: Optional[int],
+                          model_name: Optional[str] = None) -> Tuple[ContextWindow, str]:
+        """
+        Load the personality and context for a request to model_name and assemble the chat messages.
+        
+        Returns:
+            tuple: The context window holding the messages for the Ollama chat API and their token
+                   estimate, and the personality version, which changes whenever the personality file
+                   does; the personality prompt alone is kept in last_system_prompt
+        """
+        with self.metrics.stage('personality_load'):
+            personality = self.personality_loader.get(personality_name)
+        self.last_personality_name = personality_name
+
+        model_name = model_name or self._model_for(TASK_CHAT)
+        if token_budget is not None:
+            budget = token_budget
+        elif self.model_token_budget:
+            budget = default_token_budget(model_name)
+        else:
+            budget = self.token_budget
+        history_limit = max(context_limit, self.max_history_turns) if budget else context_limit
+        
+        with self.metrics.stage('context_read'):
+            conversation_context = self.memory.get_recent_conversations(history_limit, session_id)
+
+            # Read even without a compactor here, since another client may be compacting this session
+            stored = self.memory.get_session_summary(session_id)
+            summary = stored["summary"] if stored else None
+
+            related_context = None
+            if self.semantic_index is not None:
+                self._backfill_semantic_index(session_id)
+                related_context = self.semantic_index.search(
+                    session_id, user_input, k=self.semantic_k, exclude=conversation_context
+                )
+
+            # Counted once per cached session, then kept up to date by the recent-turn cache
+            total_turns = self.memory.get_conversation_count(session_id) if self.stable_prefix else 0
+        
+        with self.metrics.stage('prompt_build'):
+            compiled_prompt = personality.system_prompt(
+                self.system_prompt_budget or default_system_prompt_budget(model_name),
+                full=self.full_system_prompt
+            )
+            self.last_system_prompt = compiled_prompt
+            system_prompt = compiled_prompt.text
+
+            if self.stable_prefix:
+                # Recalled turns change every request, so they go after the history to keep the prefix intact
+                window = self.context_assembler.assemble(
+                    self._build_prefix(system_prompt, None, summary),
+                    conversation_context, user_input, budget,
+                    suffix=self._related_messages(related_context),
+                    align_step=self.prefix_step,
+                    first_index=max(0, total_turns - len(conversation_context))
+                )
+            else:
+                window = self.context_assembler.assemble(
+                    self._build_prefix(system_prompt, related_context, summary),
+                    conversation_context, user_input, budget
+                )
+        self.last_context_window = window
+        return window, personality.version
+
+    def _backfill_semantic_index(self, session_id: str):
+        """
+        Once per session, have the indexer catch up with the turns stored before this process
+        started or the index was last saved. Runs on the indexer's thread, off the reply path.
+        """
+        if session_id in self._backfilled_sessions:
+            return
+        self._backfilled_sessions.add(session_id)
+        # Turns saved from now on reach the index through _record_turn
+        cutoff_ms = time.time_ns() // 1_000_000
+
+        def load_turns():
+            for row in self.memory.iter_conversations(session_id):
+                if (row["created_ms"] or 0) < cutoff_ms:
+                    yield row["user_input"], row["assistant_response"], row["timestamp"]
+
+        self.semantic_index.schedule_backfill(session_id, load_turns)
+
+    def _record_turn(self, user_input: str, ai_response: str, session_id: str,
+                     window: Optional[ContextWindow] = None):
+        """
+        Persist a finished turn and hand it to the background indexers.
+        
+        window is the context the reply was generated from: as many of the newest turns as its
+        history held stay out of compaction, since the next prompt holds about that many.
+        """
+        with self.metrics.stage('save'):
+            self.memory.save_conversation(user_input, ai_response, session_id)
+
+            if self.semantic_index is not None:
+                self.semantic_index.add_turn(session_id, user_input, ai_response)
+
+            if self.compactor is not None:
+                self.compactor.schedule(session_id, window.turns_used if window is not None else None)
     
-    def _build_messages(self, system_prompt: str, user_input: str, 
-                       conversation_context: List[tuple] = None) -> List[Dict]:
+    @staticmethod
+    def _build_prefix(system_prompt: str, related_context: List[tuple] = None,
+                      summary: Optional[str] = None) -> List[Dict]:
         """
-        Build the message array for the Ollama chat API.
+        Build the system messages that precede the conversation history.
         
         Args:
             system_prompt (str): System/personality prompt from PersonalityLoader
-            user_input (str): Current user message
-            conversation_context (list): Previous conversation turns from ConversationMemory
+            related_context (list): Older relevant turns recalled by the semantic index
+            summary (str): Stored rolling summary of the session's compacted turns
             
         Returns:
-            list: Formatted messages for Ollama API
+            list: System messages for Ollama API
         """
         messages = [
             {"role": "system", "content": system_prompt}
         ]
-        
-        if conversation_context:
-            for user_msg, assistant_msg, timestamp in conversation_context:
-                messages.append({"role": "user", "content": user_msg})
-                messages.append({"role": "assistant", "content": assistant_msg})
-        
-        messages.append({"role": "user", "content": user_input})
-        
+
+        if summary:
+            messages.append({
+                "role": "system",
+                "content": f"Summary of your earlier conversation with this user: {summary}"
+            })
+
+        messages.extend(OllamaClient._related_messages(related_context))
+
         return messages
+
+    @staticmethod
+    def _related_messages(related_context: List[tuple] = None) -> List[Dict]:
+        if not related_context:
+            return []
+        recalled = "\n\n".join(
+            f"User: {turn[0]}\nAssistant: {turn[1]}" for turn in related_context
+        )
+        return [{
+            "role": "system",
+            "content": f"Relevant parts of earlier conversations with this user:\n\n{recalled}"
+        }]
     
     def get_greeting(self, personality_name: str = "default") -> str:
         """
@@ -109,8 +662,7 @@ class OllamaClient:
         Returns:
             str: Greeting message
         """
-        self.personality_loader.load_personality(personality_name)
-        return self.personality_loader.get_greeting()
+        return self.personality_loader.get(personality_name).greeting()
     
     def get_farewell(self, personality_name: str = "default") -> str:
         """
@@ -122,8 +674,7 @@ class OllamaClient:
         Returns:
             str: Farewell message
         """
-        self.personality_loader.load_personality(personality_name)
-        return self.personality_loader.get_farewell()
+        return self.personality_loader.get(personality_name).farewell()
     
     def get_conversation_count(self, session_id: str = "default") -> int:
         """
@@ -145,6 +696,9 @@ class OllamaClient:
             session_id (str): Session identifier to clear
         """
         self.memory.clear_session(session_id)
+        if self.semantic_index is not None:
+            self.semantic_index.forget(session_id)
+            self._backfilled_sessions.discard(session_id)
         print(f"Conversation memory cleared for session: {session_id}")
     
     def get_available_personalities(self) -> List[str]:
@@ -156,14 +710,20 @@ class OllamaClient:
         """
         return self.personality_loader.get_available_personalities()
     
-    def get_current_personality_info(self) -> Optional[Dict]:
+    def get_current_personality_info(self, personality_name: Optional[str] = None) -> Optional[Dict]:
         """
-        Get information about the currently loaded personality.
+        Get information about a personality.
         
+        Args:
+            personality_name (str): Personality to describe (default: the one used by the last reply)
+            
         Returns:
             dict: Personality information or None if no personality loaded
         """
-        return self.personality_loader.get_personality_info()
+        personality_name = personality_name or self.last_personality_name
+        if personality_name is None:
+            return None
+        return self.personality_loader.get(personality_name).info()
     
     def test_connection(self) -> bool:
         """
@@ -173,49 +733,18 @@ class OllamaClient:
             bool: True if connection successful, False otherwise
         """
         try:
-            print("Testing Ollama connection...")
+            matched_model = self.catalog.resolve(self.model_name)
+            if not matched_model:
+                # The model may have been pulled since the list was cached
+                matched_model = self.catalog.resolve(self.model_name, refresh=True)
 
-            models_response = self.client.list()
-            print(f"Raw response type: {type(models_response)}")
-            
-            model_names = []
-            if hasattr(models_response, 'models'):
-                models = models_response.models
-                print(f"Found {len(models)} models")
-                
-                for model in models:
-                    if hasattr(model, 'model'):
-                        # Extract model name (e.g., 'mistral:latest' -> 'mistral:latest')
-                        model_name = model.model
-                        model_names.append(model_name)
-                        print(f"  - {model_name}")
-            else:
-                print(f"✗ Unexpected response format: {type(models_response)}")
-                return False
-            
-            print(f"Available models: {model_names}")
-            
-            model_found = False
-            matched_model = None
-            
-            for name in model_names:
-                if name == self.model_name:
-                    model_found = True
-                    matched_model = name
-                    break
-                # Check if our model name is in the full name (e.g., 'mistral' in 'mistral:latest')
-                elif self.model_name in name:
-                    model_found = True
-                    matched_model = name
-                    self.model_name = name
-                    break
-            
-            if model_found:
+            if matched_model:
+                self.model_name = matched_model
                 print(f"✓ Connected to Ollama with model: {matched_model}")
                 return True
             else:
                 print(f"✗ Model '{self.model_name}' not found.")
-                print(f"Available models: {model_names}")
+                print(f"Available models: {self.catalog.list_models()}")
                 print(f"Try: ollama pull {self.model_name}")
                 return False
                 
@@ -237,43 +766,75 @@ class OllamaClient:
             str: Summary of the conversation
         """
         conversation_context = self.memory.get_recent_conversations(context_limit, session_id)
+        stored = self.memory.get_session_summary(session_id)
+        prompt = self._summary_prompt(conversation_context, stored)
+
+        return self._chat([{"role": "user", "content": prompt}], self.SUMMARY_OPTIONS,
+                          session_id=session_id, priority=BACKGROUND, task=TASK_SUMMARIZE)
+
+    @staticmethod
+    def _summary_prompt(conversation_context: List[tuple], stored_summary: Optional[Dict] = None) -> str:
         messages = []
+        if stored_summary:
+            messages.append(f"(Summary of earlier conversation: {stored_summary['summary']})")
         for user_msg, assistant_msg, timestamp in conversation_context:
             messages.append(f"User: {user_msg}\nAssistant: {assistant_msg}")
         conversation_text = "\n".join(messages)
 
-        prompt = (f"Summarize the following conversation between you and the user in a few sentences:\n\n"
+        return (f"Summarize the following conversation between you and the user in a few sentences:\n\n"
                 f"{conversation_text}"
         )
-        response = self.client.chat(
-            model = self.model_name,
-            messages=[{"role": "user", "content": prompt}],
-            options={
-                'temperature': 0.7,
+
+    def summarize_turns(self, previous_summary: Optional[str], turns: List[tuple]) -> str:
+        """
+        Fold a batch of old turns into a rolling summary, used by conversation compaction.
+        
+        Args:
+            previous_summary (str): Summary of everything before these turns, or None
+            turns (list): (user_input, assistant_response) pairs in chronological order
+            
+        Returns:
+            str: Updated summary covering the previous summary and the new turns
+        """
+        conversation_text = "\n".join(f"User: {user_msg}\nAssistant: {assistant_msg}" for user_msg, assistant_msg in turns)
+        prompt = (
+            "Update the running summary of a conversation between you and the user. "
+            "Keep names, facts, preferences and open questions; drop small talk. "
+            "Reply with the updated summary only, in at most a short paragraph.\n\n"
+            f"Current summary: {previous_summary or '(none yet)'}\n\n"
+            f"New conversation turns:\n{conversation_text}"
+        )
+        response, _ = self._send_chat(
+            TASK_SUMMARIZE,
+            [{"role": "user", "content": prompt}],
+            {
+                'temperature': 0.3,
                 'top_p': 0.9,
-                'num_predict': 500
-            }
+                'num_predict': 400
+            },
+            "compaction",
+            BACKGROUND
         )
 
-        ai_response = response['message']['content'].strip()
-
-        if ai_response.startswith("<think>") and "</think>" in ai_response:
-            end_index = ai_response.index("</think>") + len("</think>")
-            ai_response = ai_response[end_index:].strip()
-
-        return ai_response
+        return strip_reasoning(response['message']['content'])
 
-def create_ai_client(model_name: str = "mistral") -> OllamaClient:
+def create_ai_client(model_name: str = "mistral", warm_up: bool = True,
+                     hosts: Optional[List[str]] = None) -> OllamaClient:
     """
     Create and return an OllamaClient instance.
     
     Args:
         model_name (str): Name of the Ollama model to use
+        warm_up (bool): Start loading the model in the background right away
+        hosts (list): Ollama server URLs to balance over (default: the single default host)
         
     Returns:
         OllamaClient: Configured client instance
     """
-    return OllamaClient(model_name)
+    client = OllamaClient(model_name, pool=OllamaPool(hosts) if hosts else None)
+    if warm_up:
+        client.warm_up(background=True)
+    return client
 
 
 if __name__ == "__main__":
@@ -0,0 +1,211 @@
+import asyncio
+import weakref
+from typing import Dict, List, Optional
+
+import ollama
+
+try:
+    from .ai_client import OllamaClient, resolve_model_name
+    from .async_memory import AsyncConversationMemory
+    from .context_window import ContextAssembler, ContextWindow, default_system_prompt_budget
+    from .model_catalog import model_names
+    from .personality import PersonalityLoader
+    from .streaming import strip_reasoning
+except ImportError:
+    from ai_client import OllamaClient, resolve_model_name
+    from async_memory import AsyncConversationMemory
+    from context_window import ContextAssembler, ContextWindow, default_system_prompt_budget
+    from model_catalog import model_names
+    from personality import PersonalityLoader
+    from streaming import strip_reasoning
+
+
+class ConcurrencyLimiter:
+    """
+    Caps in-flight Ollama requests across every client that shares it.
+
+    asyncio semaphores belong to one event loop, so one is kept per running
+    loop; within a loop all clients share the same limit.
+    """
+
+    def __init__(self, max_concurrency: int = 4):
+        self.max_concurrency = max(1, max_concurrency)
+        self._semaphores = weakref.WeakKeyDictionary()
+        self.in_flight = 0
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    async def __aenter__(self):
+        await self._semaphore().acquire()
+        self.in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.in_flight -= 1
+        self._semaphore().release()
+
+
+_global_limiter = ConcurrencyLimiter()
+
+
+def get_global_limiter() -> ConcurrencyLimiter:
+    return _global_limiter
+
+
+def set_global_concurrency(max_concurrency: int) -> ConcurrencyLimiter:
+    """
+    Replace the shared limiter; clients created afterwards use the new limit.
+    """
+    global _global_limiter
+    _global_limiter = ConcurrencyLimiter(max_concurrency)
+    return _global_limiter
+
+
+class AsyncOllamaClient:
+    def __init__(self, model_name: str = 'mistral', host: Optional[str] = None,
+                 memory: Optional[AsyncConversationMemory] = None,
+                 limiter: Optional[ConcurrencyLimiter] = None, timeout: float = 120.0,
+                 token_budget: Optional[int] = None, max_history_turns: int = 50,
+                 system_prompt_budget: Optional[int] = None, full_system_prompt: bool = False):
+        """
+        Initialize the asyncio Ollama client.
+
+        Args:
+            model_name (str): Name of the Ollama model to use (default: mistral)
+            host (str): Ollama server URL (default: the ollama package default)
+            memory (AsyncConversationMemory): Shared async memory; a private one is created if omitted
+            limiter (ConcurrencyLimiter): Limit on in-flight requests (default: the global limiter)
+            timeout (float): Default seconds allowed per model request, including time queued
+            token_budget (int): Estimated prompt token budget for packing history
+            max_history_turns (int): Most turns fetched for packing when a token budget is set
+            system_prompt_budget (int): Estimated tokens the personality prompt may use (default: per model)
+            full_system_prompt (bool): Send every personality field instead of the compact prompt
+        """
+        self.model_name = model_name
+        self.client = ollama.AsyncClient(host=host)
+        self.personality_loader = PersonalityLoader()
+        self.memory = memory if memory is not None else AsyncConversationMemory()
+        self.limiter = limiter if limiter is not None else get_global_limiter()
+        self.timeout = timeout
+        self.token_budget = token_budget
+        self.max_history_turns = max_history_turns
+        self.context_assembler = ContextAssembler(token_budget)
+        self.last_context_window: Optional[ContextWindow] = None
+        self.system_prompt_budget = system_prompt_budget
+        self.full_system_prompt = full_system_prompt
+
+    async def _chat(self, messages: List[Dict], options: Dict, timeout: Optional[float]):
+        async def limited():
+            async with self.limiter:
+                return await self.client.chat(model=self.model_name, messages=messages, options=options)
+
+        return await asyncio.wait_for(limited(), timeout if timeout is not None else self.timeout)
+
+    def _system_prompt(self, personality_name: str) -> str:
+        return self.personality_loader.get(personality_name).system_prompt(
+            self.system_prompt_budget or default_system_prompt_budget(self.model_name),
+            full=self.full_system_prompt
+        ).text
+
+    async def generate_response(self, user_input: str, personality_name: str = "default",
+                                session_id: str = "default", context_limit: int = 5,
+                                token_budget: Optional[int] = None, timeout: Optional[float] = None) -> str:
+        """
+        Generate a response using the Ollama model with personality and conversation context.
+
+        Args:
+            user_input (str): The user's message
+            personality_name (str): Name of personality to load from data/personalities/
+            session_id (str): Session identifier for conversation memory
+            context_limit (int): Number of recent conversations to include as context
+            token_budget (int): Pack history by estimated tokens up to this budget
+            timeout (float): Seconds allowed for this request (default: the client timeout)
+
+        Returns:
+            str: Generated response from the model
+        """
+        try:
+            budget = token_budget if token_budget is not None else self.token_budget
+            history_limit = max(context_limit, self.max_history_turns) if budget else context_limit
+
+            # Loading a personality may read its file, so it runs off the loop like the memory calls
+            loop = asyncio.get_running_loop()
+            conversation_context, stored, system_prompt = await asyncio.gather(
+                self.memory.get_recent_conversations(history_limit, session_id),
+                self.memory.get_session_summary(session_id),
+                loop.run_in_executor(None, self._system_prompt, personality_name)
+            )
+
+            window = self.context_assembler.assemble(
+                OllamaClient._build_prefix(system_prompt, None, stored["summary"] if stored else None),
+                conversation_context, user_input, budget
+            )
+            self.last_context_window = window
+
+            response = await self._chat(window.messages, OllamaClient.CHAT_OPTIONS, timeout)
+            ai_response = strip_reasoning(response['message']['content'])
+
+            await self.memory.save_conversation(user_input, ai_response, session_id)
+            return ai_response
+
+        except Exception as e:
+            print(f"Error generating response: {e!r}")
+            error_response = "I'm sorry, I couldn't process that request."
+            await self.memory.save_conversation(user_input, error_response, session_id)
+            return error_response
+
+    async def summarize_conversation(self, session_id: str = "default", context_limit: int = 20,
+                                     timeout: Optional[float] = None) -> str:
+        """
+        Summarize the recent conversation for a session.
+
+        Args:
+            session_id (str): Session identifier
+            context_limit (int): Number of recent messages to include in summary
+            timeout (float): Seconds allowed for this request (default: the client timeout)
+
+        Returns:
+            str: Summary of the conversation
+        """
+        conversation_context, stored = await asyncio.gather(
+            self.memory.get_recent_conversations(context_limit, session_id),
+            self.memory.get_session_summary(session_id)
+        )
+        prompt = OllamaClient._summary_prompt(conversation_context, stored)
+
+        response = await self._chat([{"role": "user", "content": prompt}], OllamaClient.SUMMARY_OPTIONS, timeout)
+        return strip_reasoning(response['message']['content'])
+
+    async def test_connection(self, timeout: Optional[float] = 10.0) -> bool:
+        """
+        Test if Ollama is running and the model is available.
+
+        Args:
+            timeout (float): Seconds allowed for the model listing
+
+        Returns:
+            bool: True if connection successful, False otherwise
+        """
+        try:
+            available = model_names(await asyncio.wait_for(self.client.list(), timeout))
+
+            matched_model = resolve_model_name(self.model_name, available)
+            if matched_model:
+                self.model_name = matched_model
+                print(f"✓ Connected to Ollama with model: {matched_model}")
+                return True
+
+            print(f"✗ Model '{self.model_name}' not found.")
+            print(f"Available models: {available}")
+            print(f"Try: ollama pull {self.model_name}")
+            return False
+
+        except Exception as e:
+            print(f"✗ Failed to connect to Ollama: {e!r}")
+            print("Make sure Ollama is running with: ollama serve")
+            return False
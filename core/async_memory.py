@@ -0,0 +1,90 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from .memory import ConversationMemory
+except ImportError:
+    from memory import ConversationMemory
+
+
+class AsyncConversationMemory:
+    """
+    Coroutine front end for ConversationMemory.
+
+    Every call runs on a small dedicated thread pool, so disk I/O never blocks
+    the event loop. At most max_pending calls are queued or running at once;
+    further callers wait, which applies backpressure instead of letting the
+    backlog grow without bound. The wrapped ConversationMemory owns the schema,
+    so sync and async code can share one database file or even one instance.
+    """
+
+    def __init__(self, db_path: str = 'data/memory.db', memory: Optional[ConversationMemory] = None,
+                 max_workers: int = 2, max_pending: int = 64, **memory_options):
+        """
+        Initialize the async memory.
+
+        Args:
+            db_path (str): Database file, used when memory is not given
+            memory (ConversationMemory): Existing memory to wrap, e.g. one shared with sync code
+            max_workers (int): Threads performing database calls
+            max_pending (int): Calls allowed to be queued or running before callers wait
+            **memory_options: Passed to ConversationMemory when one is created
+        """
+        self.memory = memory if memory is not None else ConversationMemory(db_path, **memory_options)
+        self._owns_memory = memory is None
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="memory-db")
+        self.max_pending = max(1, max_pending)
+        # Created on first use so it binds to the loop that actually runs the calls
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def _call(self, func, *args, **kwargs):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def save_conversation(self, user_input: str, assistant_response: str, session_id: str = 'default'):
+        await self._call(self.memory.save_conversation, user_input, assistant_response, session_id)
+
+    async def get_recent_conversations(self, limit: int = 10, session_id: str = 'default') -> List[Tuple[str, str, str]]:
+        return await self._call(self.memory.get_recent_conversations, limit, session_id)
+
+    async def get_conversation_context(self, limit: int = 5, session_id: str = 'default') -> str:
+        return await self._call(self.memory.get_conversation_context, limit, session_id)
+
+    async def clear_session(self, session_id: str = 'default'):
+        await self._call(self.memory.clear_session, session_id)
+
+    async def get_conversation_count(self, session_id: str = 'default') -> int:
+        return await self._call(self.memory.get_conversation_count, session_id)
+
+    async def search_conversations(self, query: str, session_id: Optional[str] = None, limit: int = 20,
+                                   **options) -> List[Dict]:
+        return await self._call(self.memory.search_conversations, query, session_id, limit, **options)
+
+    async def get_session_summary(self, session_id: str = 'default') -> Optional[Dict]:
+        return await self._call(self.memory.get_session_summary, session_id)
+
+    async def flush(self):
+        await self._call(self.memory.flush)
+
+    def cache_stats(self) -> Optional[Dict[str, int]]:
+        return self.memory.cache_stats()
+
+    async def close(self):
+        """
+        Wait for queued calls, then close the memory if this instance created it.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, functools.partial(self._executor.shutdown, wait=True))
+        if self._owns_memory:
+            await loop.run_in_executor(None, self.memory.close)
+
+    async def __aenter__(self) -> "AsyncConversationMemory":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
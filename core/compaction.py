@@ -0,0 +1,145 @@
+import queue
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    from .memory import ConversationMemory
+except ImportError:
+    from memory import ConversationMemory
+
+
+class ConversationCompactor:
+    """
+    Folds old conversation turns into a stored rolling summary per session.
+
+    Everything except the keep_recent newest turns is eligible; left unset, a
+    session keeps the turns its latest prompt held, as passed to schedule(), so
+    every turn is either in the prompt or in the summary. Once at least
+    min_batch eligible turns have piled up, they are summarized together with
+    the previous summary, so each run costs the same no matter how old the
+    session is. Runs happen on a background thread.
+    """
+
+    def __init__(self, memory: ConversationMemory,
+                 summarize: Callable[[Optional[str], List[Tuple[str, str]]], str],
+                 keep_recent: Optional[int] = None, min_batch: int = 10, max_batch: int = 50,
+                 retention: str = 'keep', background: bool = True):
+        """
+        Initialize the compactor.
+
+        Args:
+            memory (ConversationMemory): Memory whose sessions are compacted
+            summarize (callable): Takes the previous summary (or None) and a list of
+                                  (user_input, assistant_response) turns, returns the new summary
+            keep_recent (int): Number of newest turns never compacted (default: per session,
+                               the number passed to schedule())
+            min_batch (int): Eligible turns needed before a run is worth a model call
+            max_batch (int): Maximum turns folded in per model call
+            retention (str): What happens to compacted raw turns: 'keep', 'archive' or 'delete'
+            background (bool): Run compactions on a worker thread instead of inline in schedule()
+        """
+        if retention not in ('keep', 'archive', 'delete'):
+            raise ValueError(f"Unknown retention policy: {retention}")
+
+        self.memory = memory
+        self.summarize = summarize
+        self.keep_recent = keep_recent
+        self.min_batch = max(1, min_batch)
+        self.max_batch = max(self.min_batch, max_batch)
+        self.retention = retention
+        self._queued = set()
+        self._keep_recent: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._queue: Optional[queue.Queue] = None
+        self._worker = None
+
+        if background:
+            self._queue = queue.Queue()
+            self._worker = threading.Thread(target=self._run, name="conversation-compactor", daemon=True)
+            self._worker.start()
+
+    def schedule(self, session_id: str, keep_recent: Optional[int] = None):
+        """
+        Ask for session_id to be compacted if enough old turns have accumulated.
+
+        Args:
+            session_id (str): Session to compact
+            keep_recent (int): Newest turns the session's prompt still holds, used unless
+                               the compactor has a fixed keep_recent
+        """
+        if self._queue is None:
+            self.compact_session(session_id, keep_recent)
+            return
+
+        with self._lock:
+            if keep_recent is not None:
+                self._keep_recent[session_id] = keep_recent
+            if session_id in self._queued:
+                return
+            self._queued.add(session_id)
+        self._queue.put(session_id)
+
+    def compact_session(self, session_id: str, keep_recent: Optional[int] = None) -> int:
+        """
+        Run compaction for one session until fewer than min_batch turns are eligible.
+
+        Nothing is compacted when neither the compactor nor the caller says how many
+        turns to keep, since those turns could then be in neither the prompt nor the summary.
+
+        Returns:
+            int: Number of turns folded into the summary
+        """
+        if self.keep_recent is not None:
+            keep_recent = self.keep_recent
+        if keep_recent is None:
+            return 0
+
+        compacted = 0
+        while True:
+            previous = self.memory.get_session_summary(session_id)
+            through_id = previous["through_id"] if previous else 0
+            turns = self.memory.get_compactable_turns(
+                session_id, keep_recent, after_id=through_id, limit=self.max_batch
+            )
+            if len(turns) < self.min_batch:
+                return compacted
+
+            summary = self.summarize(
+                previous["summary"] if previous else None,
+                [(user_input, assistant_response) for _, user_input, assistant_response, _ in turns]
+            )
+            if not summary:
+                return compacted
+
+            total = (previous["turns_compacted"] if previous else 0) + len(turns)
+            self.memory.save_session_summary(
+                session_id, summary, turns[-1][0], total, retention=self.retention
+            )
+            compacted += len(turns)
+
+    def _run(self):
+        while True:
+            session_id = self._queue.get()
+            try:
+                if session_id is None:
+                    return
+                with self._lock:
+                    self._queued.discard(session_id)
+                    keep_recent = self._keep_recent.pop(session_id, None)
+                self.compact_session(session_id, keep_recent)
+            except Exception as e:
+                print(f"Error compacting session '{session_id}': {e}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """
+        Block until every scheduled compaction has finished.
+        """
+        if self._queue is not None:
+            self._queue.join()
+
+    def close(self):
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join()
@@ -0,0 +1,159 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+# Prompt token budgets for the models we run, leaving room in num_ctx for the reply
+MODEL_TOKEN_BUDGETS = {
+    'qwen3:1.7b': 2048,
+    'qwen3:4b': 3072,
+    'deepseek-r1:1.5b': 2048,
+    'mistral': 3072,
+}
+DEFAULT_TOKEN_BUDGET = 2048
+
+# Share of the prompt budget the compact personality prompt may use; every token of it is prefilled each turn
+MODEL_SYSTEM_PROMPT_BUDGETS = {
+    'qwen3:1.7b': 256,
+    'qwen3:4b': 384,
+    'deepseek-r1:1.5b': 256,
+    'mistral': 384,
+}
+DEFAULT_SYSTEM_PROMPT_BUDGET = 320
+
+# Context sizes pinned per model; a request with a different num_ctx forces Ollama to reload the model
+MODEL_NUM_CTX = {
+    'qwen3:1.7b': 4096,
+    'qwen3:4b': 4096,
+    'deepseek-r1:1.5b': 4096,
+    'mistral': 4096,
+}
+DEFAULT_NUM_CTX = 4096
+
+# How long Ollama keeps each model (and its KV cache) loaded after a request
+MODEL_KEEP_ALIVE = {}
+DEFAULT_KEEP_ALIVE = '30m'
+
+# Chat templates wrap every message in role markers; roughly this many tokens each
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_word_pattern = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+def model_setting(table: Dict, model_name: str, default):
+    """
+    Look up a per-model setting, matching 'mistral' and 'mistral:latest' alike.
+    """
+    if model_name in table:
+        return table[model_name]
+    base_name = model_name.split(':', 1)[0] if model_name.endswith(':latest') else model_name
+    return table.get(base_name, default)
+
+
+def default_token_budget(model_name: str) -> int:
+    return model_setting(MODEL_TOKEN_BUDGETS, model_name, DEFAULT_TOKEN_BUDGET)
+
+
+def default_system_prompt_budget(model_name: str) -> int:
+    return model_setting(MODEL_SYSTEM_PROMPT_BUDGETS, model_name, DEFAULT_SYSTEM_PROMPT_BUDGET)
+
+
+def default_num_ctx(model_name: str) -> int:
+    return model_setting(MODEL_NUM_CTX, model_name, DEFAULT_NUM_CTX)
+
+
+def default_keep_alive(model_name: str) -> str:
+    return model_setting(MODEL_KEEP_ALIVE, model_name, DEFAULT_KEEP_ALIVE)
+
+
+@lru_cache(maxsize=8192)
+def estimate_tokens(text: str) -> int:
+    """
+    Fast estimate of how many tokens a BPE tokenizer produces for text.
+
+    Counts words and punctuation marks, charging long words extra since they
+    split into several sub-word pieces. Cached because the same system prompt
+    and history turns are estimated on every request.
+    """
+    if not text:
+        return 0
+    tokens = 0
+    for piece in _word_pattern.findall(text):
+        tokens += 1 + len(piece) // 7
+    return tokens
+
+
+def estimate_message_tokens(message: Dict) -> int:
+    return estimate_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS
+
+
+class ContextWindow(NamedTuple):
+    messages: List[Dict]
+    token_count: int
+    turns_used: int
+    turns_dropped: int
+    budget: Optional[int]
+
+
+class ContextAssembler:
+    def __init__(self, token_budget: Optional[int] = None):
+        """
+        Packs conversation history into a prompt by estimated tokens instead of turn count.
+
+        Args:
+            token_budget (int): Maximum estimated prompt tokens, system prompt and new input
+                                included; None keeps every history turn it is given
+        """
+        self.token_budget = token_budget
+
+    def assemble(self, prefix: Sequence[Dict], history: Sequence[tuple], user_input: str,
+                 token_budget: Optional[int] = None, suffix: Sequence[Dict] = (),
+                 align_step: Optional[int] = None, first_index: int = 0) -> ContextWindow:
+        """
+        Build the message list, keeping as many of the newest history turns as fit.
+
+        Args:
+            prefix (list): Messages that always go first, e.g. the personality system prompt
+            history (list): (user_input, assistant_response, ...) turns, oldest first
+            user_input (str): The new user message
+            token_budget (int): Override for this call's budget
+            suffix (list): Messages placed between the history and the new user message
+            align_step (int): Only start the kept history at absolute turn indexes that are
+                              multiples of this, so the window slides in blocks and the
+                              prompt prefix stays identical between consecutive requests
+            first_index (int): Absolute index of history[0] within the whole session
+
+        Returns:
+            ContextWindow: Messages plus the estimated token count used
+        """
+        budget = token_budget if token_budget is not None else self.token_budget
+        final_message = {"role": "user", "content": user_input}
+
+        used = sum(estimate_message_tokens(message) for message in prefix)
+        used += sum(estimate_message_tokens(message) for message in suffix)
+        used += estimate_message_tokens(final_message)
+
+        # Newest turn first, with a running total so each turn costs one comparison
+        costs, history_used = [], 0
+        for turn in reversed(history):
+            cost = (estimate_tokens(turn[0]) + estimate_tokens(turn[1])
+                    + 2 * MESSAGE_OVERHEAD_TOKENS)
+            if budget is not None and used + history_used + cost > budget:
+                break
+            costs.append(cost)
+            history_used += cost
+
+        start = len(history) - len(costs)
+        if align_step and align_step > 1:
+            aligned = start + (-(first_index + start)) % align_step
+            start = min(aligned, len(history))
+        kept = history[start:]
+        used += sum(costs[:len(kept)])
+
+        messages = list(prefix)
+        for turn in kept:
+            messages.append({"role": "user", "content": turn[0]})
+            messages.append({"role": "assistant", "content": turn[1]})
+        messages.extend(suffix)
+        messages.append(final_message)
+
+        return ContextWindow(messages, used, len(kept), len(history) - len(kept), budget)
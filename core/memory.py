@@ -1,53 +1,656 @@
 import sqlite3
 import os
-from datetime import datetime
-from typing import List, Tuple, Optional
+import atexit
+import csv
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Tuple, Optional, Iterator
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of long-lived SQLite connections for one database file.
+
+    Connections are opened lazily up to max_connections, configured once with
+    WAL journaling and tuned pragmas, and handed out to one thread at a time.
+    Each connection keeps sqlite3's prepared statement cache, so reusing the
+    same SQL text skips re-parsing on every call.
+    """
+
+    PRAGMAS = (
+        "pragma journal_mode = wal",
+        "pragma synchronous = normal",
+        "pragma busy_timeout = 5000",
+        "pragma temp_store = memory",
+        "pragma cache_size = -8000",
+        "pragma foreign_keys = on",
+    )
+
+    def __init__(self, db_path: str, max_connections: int = 4, timeout: float = 30.0,
+                 cached_statements: int = 128):
+        """
+        Initialize the pool.
+
+        Args:
+            db_path (str): Path to the SQLite database file
+            max_connections (int): Upper bound on simultaneously open connections
+            timeout (float): Seconds to wait for a free connection before failing
+            cached_statements (int): Size of each connection's prepared statement cache
+        """
+        self.db_path = db_path
+        # Every connection to ':memory:' is a separate database, so keep exactly one
+        self.max_connections = 1 if db_path == ':memory:' else max(1, max_connections)
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self._idle = queue.LifoQueue()
+        self._all: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if len(self._all) < self.max_connections:
+                conn = self._open()
+                self._all.append(conn)
+                return conn
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"Timed out waiting for a connection to {self.db_path}"
+            )
+
+    def release(self, conn: sqlite3.Connection):
+        if self._closed:
+            conn.close()
+            return
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow a connection for the duration of a with block.
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow a connection and commit on success, roll back on error.
+        """
+        with self.connection() as conn:
+            with conn:
+                yield conn
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            connections, self._all = self._all, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+
+class WriteBehindWriter:
+    """
+    Background writer that group-commits queued conversation rows.
+
+    Rows stay in the pending buffer until their batch has committed, so readers
+    can merge them in for read-your-writes consistency. A batch is written once
+    batch_size rows are waiting or flush_interval seconds have passed since the
+    first one arrived, whichever comes first.
+
+    A batch that fails with a transient error (database locked or busy) stays
+    queued and is retried with exponential backoff. Rows are only dropped on
+    any other error, or once max_retries retries have failed; that error is
+    then raised by the next flush() or close().
+    """
+
+    def __init__(self, pool: ConnectionPool, insert_sql: str, batch_size: int = 64,
+                 flush_interval: float = 0.05, max_retries: int = 8, retry_backoff: float = 0.05,
+                 max_backoff: float = 2.0):
+        self.pool = pool
+        self.insert_sql = insert_sql
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_retries = max(0, max_retries)
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self.dropped_rows = 0
+        self._error: Optional[Exception] = None
+        # Held while a batch commits; readers take it so a row is never seen twice or not at all
+        self.commit_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._pending: List[Tuple[int, tuple]] = []
+        self._next_seq = 0
+        self._flush_requested = False
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="memory-write-behind", daemon=True)
+        self._thread.start()
+
+    def put(self, row: tuple):
+        with self._cond:
+            if self._stopping:
+                raise sqlite3.ProgrammingError("Write-behind writer is closed")
+            self._pending.append((self._next_seq, row))
+            self._next_seq += 1
+            self._cond.notify_all()
+
+    def pending_rows(self, session_id: str) -> List[tuple]:
+        """
+        Rows for session_id that have not been committed yet, oldest first.
+        """
+        with self._cond:
+            return [row for _, row in self._pending if row[2] == session_id]
+
+    def discard_session(self, session_id: str):
+        with self._cond:
+            self._pending = [entry for entry in self._pending if entry[1][2] != session_id]
+            self._cond.notify_all()
+
+    def flush(self, raise_errors: bool = True):
+        """
+        Block until every row queued so far has been written or dropped.
+
+        Raises:
+            sqlite3.Error: The error that made the writer drop rows since the last flush;
+                           with raise_errors False it is kept for the next caller instead
+        """
+        with self._cond:
+            if self._pending:
+                target = self._next_seq
+                self._flush_requested = True
+                self._cond.notify_all()
+                while self._pending and self._pending[0][0] < target and self._thread.is_alive():
+                    self._cond.wait(0.1)
+        if raise_errors:
+            self._raise_error()
+
+    def close(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._raise_error()
+
+    def _raise_error(self):
+        with self._cond:
+            error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        message = str(error).lower()
+        return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+    def _next_batch(self) -> Optional[List[Tuple[int, tuple]]]:
+        with self._cond:
+            while not self._pending:
+                if self._stopping:
+                    return None
+                self._cond.wait()
+
+            deadline = time.monotonic() + self.flush_interval
+            while (len(self._pending) < self.batch_size
+                   and not self._flush_requested and not self._stopping):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return self._pending[:self.batch_size]
+
+    def _run(self):
+        retries = 0
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            with self.commit_lock:
+                with self._cond:
+                    # clear_session may have dropped rows while we waited for the lock
+                    live = {seq for seq, _ in self._pending}
+                    batch = [entry for entry in batch if entry[0] in live]
+                error = None
+                try:
+                    if batch:
+                        with self.pool.transaction() as conn:
+                            conn.executemany(self.insert_sql, [row for _, row in batch])
+                except Exception as e:
+                    error = e
+
+                retry = error is not None and self._is_transient(error) and retries < self.max_retries
+                if not retry:
+                    with self._cond:
+                        if error is not None:
+                            print(f"Dropping {len(batch)} conversation rows after error: {error}")
+                            self.dropped_rows += len(batch)
+                            self._error = error
+                        done = {seq for seq, _ in batch}
+                        self._pending = [entry for entry in self._pending if entry[0] not in done]
+                        if not self._pending:
+                            self._flush_requested = False
+                        self._cond.notify_all()
+
+            if retry:
+                retries += 1
+                delay = min(self.max_backoff, self.retry_backoff * 2 ** (retries - 1))
+                print(f"Error writing {len(batch)} conversation rows, retry {retries} in {delay:.2f}s: {error}")
+                # The rows stay pending, so readers still see them while we back off
+                time.sleep(delay)
+            else:
+                retries = 0
+
+
+class RecentTurnCache:
+    """
+    Bounded in-process cache of each session's most recent turns.
+
+    Every session keeps a ring buffer of up to max_turns turns; at most
+    max_sessions sessions are held and the least recently used one is evicted.
+    Cached sessions also track their total turn count once it is known, which
+    gives the absolute index of the newest turn without a count(*) query.
+    A per-session generation counter guards against storing a database read
+    that raced with a concurrent write or clear.
+    """
+
+    class _Entry:
+        __slots__ = ("turns", "complete", "populated_gen", "total", "total_gen")
+
+        def __init__(self, turns: deque, complete: bool, populated_gen: int):
+            self.turns = turns
+            # True when turns holds the whole session, so any limit can be served
+            self.complete = complete
+            self.populated_gen = populated_gen
+            # Turns in the whole session, or None until counted; total_gen is when it was read
+            self.total = len(turns) if complete else None
+            self.total_gen = populated_gen
+
+    def __init__(self, max_sessions: int = 128, max_turns: int = 50):
+        self.max_sessions = max(1, max_sessions)
+        self.max_turns = max(1, max_turns)
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, RecentTurnCache._Entry]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        # Generations come from one counter; sessions without their own counter are at the floor
+        self._counter = 0
+        self._floor = 0
+        self._lock = threading.Lock()
+
+    def _bump(self, session_id: str) -> int:
+        self._counter += 1
+        self._generations[session_id] = self._counter
+        return self._counter
+
+    def _generation(self, session_id: str) -> int:
+        return self._generations.get(session_id, self._floor)
+
+    def get(self, session_id: str, limit: int) -> Optional[List[Tuple[str, str, str]]]:
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None or limit < 0 or (len(entry.turns) < limit and not entry.complete):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+            turns = list(entry.turns)
+            return turns[-limit:] if limit > 0 else []
+
+    def generation(self, session_id: str) -> int:
+        with self._lock:
+            return self._generation(session_id)
+
+    def count(self, session_id: str) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(session_id)
+            return entry.total if entry is not None else None
+
+    def store_count(self, session_id: str, total: int, generation: int):
+        """
+        Remember a cached session's turn count read from the database, unless a write happened since.
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None and self._generation(session_id) == generation:
+                entry.total = total
+                entry.total_gen = generation
+
+    def store(self, session_id: str, turns: List[Tuple[str, str, str]], limit: int, generation: int):
+        """
+        Cache turns read from the database, unless a write happened since generation was taken.
+        """
+        if limit < 0:
+            return
+        with self._lock:
+            if self._generation(session_id) != generation:
+                return
+            complete = len(turns) < limit and len(turns) <= self.max_turns
+            self._entries[session_id] = self._Entry(deque(turns, maxlen=self.max_turns), complete, generation)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+            # Generation counters only matter for sessions that may be re-stored; raising the
+            # floor past every dropped counter keeps reads that were in flight for them from storing
+            if len(self._generations) > self.max_sessions * 4:
+                self._floor = self._counter
+                self._generations = {key: self._generations[key] for key in self._entries
+                                     if key in self._generations}
+
+    def begin_write(self, session_id: str) -> int:
+        with self._lock:
+            return self._bump(session_id)
+
+    def append(self, session_id: str, turn: Tuple[str, str, str], write_gen: int):
+        with self._lock:
+            self._bump(session_id)
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return
+            if entry.populated_gen >= write_gen:
+                # Populated while this write was in flight; it may or may not include the turn
+                del self._entries[session_id]
+                return
+            if len(entry.turns) == entry.turns.maxlen:
+                entry.complete = False
+            entry.turns.append(turn)
+            if entry.total is not None:
+                # A count read while this write was in flight may already include the turn
+                entry.total = entry.total + 1 if entry.total_gen < write_gen else None
+
+    def invalidate(self, session_id: str):
+        with self._lock:
+            self._bump(session_id)
+            self._entries.pop(session_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._counter += 1
+            self._floor = self._counter
+            self._generations.clear()
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "sessions": len(self._entries),
+                "max_sessions": self.max_sessions,
+            }
+
+
+def _migration_v1_initial(conn: sqlite3.Connection):
+    conn.execute(
+        '''
+        create table if not exists conversations (
+            id integer primary key autoincrement,
+            user_input text not null,
+            assistant_response text not null,
+            timestamp datetime default current_timestamp,
+            session_id text default 'default'
+        )
+    '''
+    )
+
+    conn.execute('''
+        create index if not exists idx_timestamp on conversations (timestamp)
+    ''')
+
+
+def _migration_v2_session_index(conn: sqlite3.Connection):
+    # Second-resolution timestamps tie within a turn; order by epoch ms, then id
+    conn.execute('alter table conversations add column created_ms integer')
+    conn.execute('''
+        update conversations
+        set created_ms = cast(round((julianday(coalesce(timestamp, 'now')) - 2440587.5) * 86400000) as integer)
+    ''')
+    conn.execute('''
+        create index if not exists idx_session_created on conversations (session_id, created_ms, id)
+    ''')
+
+
+def _create_search_index(conn: sqlite3.Connection) -> bool:
+    """
+    Create the FTS5 index over conversations and the triggers that keep it in sync.
+
+    Returns False when this sqlite build lacks FTS5; search then falls back to LIKE.
+    """
+    try:
+        conn.execute('''
+            create virtual table if not exists conversations_fts using fts5 (
+                user_input,
+                assistant_response,
+                content = 'conversations',
+                content_rowid = 'id',
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        if 'fts5' not in str(e):
+            raise
+        print(f"Full-text search unavailable, sqlite was built without FTS5: {e}")
+        return False
+
+    conn.execute('''
+        create trigger if not exists conversations_fts_insert after insert on conversations begin
+            insert into conversations_fts (rowid, user_input, assistant_response)
+            values (new.id, new.user_input, new.assistant_response);
+        end
+    ''')
+    conn.execute('''
+        create trigger if not exists conversations_fts_delete after delete on conversations begin
+            insert into conversations_fts (conversations_fts, rowid, user_input, assistant_response)
+            values ('delete', old.id, old.user_input, old.assistant_response);
+        end
+    ''')
+    conn.execute('''
+        create trigger if not exists conversations_fts_update
+        after update of user_input, assistant_response on conversations begin
+            insert into conversations_fts (conversations_fts, rowid, user_input, assistant_response)
+            values ('delete', old.id, old.user_input, old.assistant_response);
+            insert into conversations_fts (rowid, user_input, assistant_response)
+            values (new.id, new.user_input, new.assistant_response);
+        end
+    ''')
+    return True
+
+
+def _migration_v3_full_text_search(conn: sqlite3.Connection):
+    # Backfill existing rows; new rows are indexed by the triggers
+    if _create_search_index(conn):
+        conn.execute("insert into conversations_fts (conversations_fts) values ('rebuild')")
+
+
+def _migration_v4_session_summaries(conn: sqlite3.Connection):
+    # through_id is the newest conversations.id already folded into the summary
+    conn.execute('''
+        create table if not exists session_summaries (
+            session_id text primary key,
+            summary text not null,
+            through_id integer not null,
+            turns_compacted integer not null default 0,
+            updated_ms integer not null
+        )
+    ''')
+    conn.execute('''
+        create table if not exists conversations_archive (
+            id integer primary key,
+            user_input text not null,
+            assistant_response text not null,
+            timestamp datetime,
+            session_id text,
+            created_ms integer,
+            archived_ms integer not null
+        )
+    ''')
+    conn.execute('''
+        create index if not exists idx_archive_session on conversations_archive (session_id, id)
+    ''')
+
+
+# Schema migrations in order; entry N upgrades a database from user_version N-1 to N
+MIGRATIONS = (
+    _migration_v1_initial,
+    _migration_v2_session_index,
+    _migration_v3_full_text_search,
+    _migration_v4_session_summaries,
+)
+SCHEMA_VERSION = len(MIGRATIONS)
+
 
 class ConversationMemory:
-    def __init__(self, db_path: str = 'data/memory.db'):
+    INSERT_SQL = '''
+        insert into conversations (user_input, assistant_response, session_id, timestamp, created_ms)
+        values (?, ?, ?, ?, ?)
+    '''
+
+    # Skips turns already stored, so importing the same file twice does not duplicate history
+    IMPORT_SQL = '''
+        insert into conversations (user_input, assistant_response, session_id, timestamp, created_ms)
+        select :user_input, :assistant_response, :session_id, :timestamp, :created_ms
+        where not exists (
+            select 1 from conversations
+            where session_id = :session_id and created_ms = :created_ms
+                and user_input = :user_input and assistant_response = :assistant_response
+        )
+    '''
+
+    def __init__(self, db_path: str = 'data/memory.db', pool_size: int = 4, write_behind: bool = False,
+                 batch_size: int = 64, flush_interval: float = 0.05, cache_sessions: int = 0,
+                 cache_turns: int = 50):
         self.db_path = db_path
+        self.pool = ConnectionPool(db_path, max_connections=pool_size)
         self.init_database()
-    
+
+        # Only safe when this instance is the sole writer for the sessions it serves
+        self.cache = RecentTurnCache(cache_sessions, cache_turns) if cache_sessions > 0 else None
+
+        self.writer = None
+        if write_behind:
+            self.writer = WriteBehindWriter(self.pool, self.INSERT_SQL, batch_size, flush_interval)
+            atexit.register(self.close)
+
     def init_database(self):
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                '''
-                create table if not exists conversations (
-                    id integer primary key autoincrement,
-                    user_input text not null,
-                    assistant_response text not null,
-                    timestamp datetime default current_timestamp,
-                    session_id text default 'default'
-                )
-            '''
-            )
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        with self.pool.connection() as conn:
+            self._migrate(conn)
+
+    def _migrate(self, conn: sqlite3.Connection):
+        """
+        Bring the schema up to SCHEMA_VERSION, one migration per transaction.
+
+        The applied version lives in sqlite's user_version pragma, so databases
+        created before versioning (user_version 0) are upgraded in place.
+        """
+        if conn.execute('pragma user_version').fetchone()[0] >= SCHEMA_VERSION:
+            return
+
+        for version, migration in enumerate(MIGRATIONS, start=1):
+            conn.execute('begin immediate')
+            try:
+                # Re-read under the write lock in case another process migrated first
+                current = conn.execute('pragma user_version').fetchone()[0]
+                if current < version:
+                    migration(conn)
+                    conn.execute(f'pragma user_version = {version}')
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
 
-            cursor.execute('''
-                create index if not exists idx_timestamp on conversations (timestamp)
-            ''')
+    @staticmethod
+    def _now() -> Tuple[int, str]:
+        """
+        Current time as (epoch milliseconds, sqlite-style UTC timestamp text).
+        """
+        created_ms = time.time_ns() // 1_000_000
+        timestamp = datetime.fromtimestamp(created_ms / 1000, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        return created_ms, timestamp
 
-            conn.commit()
-    
     def save_conversation(self, user_input: str, assistant_response: str, session_id: str = 'default'):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                insert into conversations (user_input, assistant_response, session_id)
-                values (?, ?, ?)
-            ''', (user_input, assistant_response, session_id))
-            conn.commit()
+        created_ms, timestamp = self._now()
+        row = (user_input, assistant_response, session_id, timestamp, created_ms)
+        write_gen = self.cache.begin_write(session_id) if self.cache else 0
+
+        if self.writer:
+            self.writer.put(row)
+        else:
+            with self.pool.transaction() as conn:
+                conn.execute(self.INSERT_SQL, row)
+
+        if self.cache:
+            self.cache.append(session_id, (user_input, assistant_response, timestamp), write_gen)
 
     def get_recent_conversations(self, limit: int = 10, session_id: str = 'default') -> List[Tuple[str, str, str]]:
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
+        if self.cache:
+            cached = self.cache.get(session_id, limit)
+            if cached is not None:
+                return cached
+            generation = self.cache.generation(session_id)
+
+        conversations = self._load_recent(limit, session_id)
+
+        if self.cache:
+            self.cache.store(session_id, conversations, limit, generation)
+        return conversations
+
+    def _load_recent(self, limit: int, session_id: str) -> List[Tuple[str, str, str]]:
+        if self.writer:
+            with self.writer.commit_lock:
+                committed = self._select_recent(limit, session_id)
+                pending = [(row[0], row[1], row[3]) for row in self.writer.pending_rows(session_id)]
+            conversations = committed + pending
+            if limit < 0:
+                return conversations
+            return conversations[-limit:] if limit > 0 else []
+
+        return self._select_recent(limit, session_id)
+
+    def _select_recent(self, limit: int, session_id: str) -> List[Tuple[str, str, str]]:
+        with self.pool.connection() as conn:
+            cursor = conn.execute('''
                 select user_input, assistant_response, timestamp
                 from conversations
                 where session_id = ?
-                order by timestamp desc
+                order by created_ms desc, id desc
                 limit ?
             ''', (session_id, limit))
 
@@ -62,22 +665,446 @@ class ConversationMemory:
             context += f"User: {user_input}\nAssistant: {assistant_response}\nTimestamp: {timestamp}\n\n"
 
         return context.strip()
-    
+
     def clear_session(self, session_id: str = 'default'):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
+        if self.writer:
+            with self.writer.commit_lock:
+                self.writer.discard_session(session_id)
+                self._delete_session(session_id)
+        else:
+            self._delete_session(session_id)
+
+        if self.cache:
+            self.cache.invalidate(session_id)
+
+    def _delete_session(self, session_id: str):
+        with self.pool.transaction() as conn:
+            conn.execute('''
                 delete from conversations
                 where session_id = ?
             ''', (session_id,))
-            conn.commit()
+            conn.execute('delete from session_summaries where session_id = ?', (session_id,))
+            conn.execute('delete from conversations_archive where session_id = ?', (session_id,))
+
+    def get_session_summary(self, session_id: str = 'default') -> Optional[Dict]:
+        """
+        Stored rolling summary of a session's compacted turns, or None if nothing was compacted.
+        """
+        with self.pool.connection() as conn:
+            row = conn.execute('''
+                select summary, through_id, turns_compacted, updated_ms
+                from session_summaries
+                where session_id = ?
+            ''', (session_id,)).fetchone()
+
+        if row is None:
+            return None
+        return {"summary": row[0], "through_id": row[1], "turns_compacted": row[2], "updated_ms": row[3]}
+
+    def get_compactable_turns(self, session_id: str, keep_recent: int, after_id: int = 0,
+                              limit: int = 100) -> List[Tuple[int, str, str, str]]:
+        """
+        Oldest turns newer than after_id, excluding the keep_recent most recent turns.
+
+        Returns:
+            list: (id, user_input, assistant_response, timestamp) tuples in id order
+        """
+        self._wait_for_writes()
+        with self.pool.connection() as conn:
+            cutoff = conn.execute('''
+                select id from conversations
+                where session_id = ?
+                order by id desc
+                limit 1 offset ?
+            ''', (session_id, keep_recent)).fetchone()
+            if cutoff is None:
+                return []
+
+            return conn.execute('''
+                select id, user_input, assistant_response, timestamp
+                from conversations
+                where session_id = ? and id > ? and id <= ?
+                order by id
+                limit ?
+            ''', (session_id, after_id, cutoff[0], limit)).fetchall()
+
+    def save_session_summary(self, session_id: str, summary: str, through_id: int, turns_compacted: int,
+                             retention: str = 'keep'):
+        """
+        Store the rolling summary and apply the retention policy to the turns it covers.
+
+        Args:
+            session_id (str): Session identifier
+            summary (str): Summary covering every turn up to through_id
+            through_id (int): Newest conversations.id included in the summary
+            turns_compacted (int): Total number of turns the summary covers
+            retention (str): 'keep' leaves raw turns in place, 'archive' moves them to
+                             conversations_archive, 'delete' drops them
+        """
+        if retention not in ('keep', 'archive', 'delete'):
+            raise ValueError(f"Unknown retention policy: {retention}")
+
+        created_ms, _ = self._now()
+        with self.pool.transaction() as conn:
+            conn.execute('''
+                insert into session_summaries (session_id, summary, through_id, turns_compacted, updated_ms)
+                values (?, ?, ?, ?, ?)
+                on conflict (session_id) do update set
+                    summary = excluded.summary,
+                    through_id = excluded.through_id,
+                    turns_compacted = excluded.turns_compacted,
+                    updated_ms = excluded.updated_ms
+            ''', (session_id, summary, through_id, turns_compacted, created_ms))
+
+            if retention == 'archive':
+                conn.execute('''
+                    insert or ignore into conversations_archive
+                        (id, user_input, assistant_response, timestamp, session_id, created_ms, archived_ms)
+                    select id, user_input, assistant_response, timestamp, session_id, created_ms, ?
+                    from conversations
+                    where session_id = ? and id <= ?
+                ''', (created_ms, session_id, through_id))
+
+            if retention in ('archive', 'delete'):
+                conn.execute('''
+                    delete from conversations
+                    where session_id = ? and id <= ?
+                ''', (session_id, through_id))
+
+        if retention != 'keep' and self.cache:
+            self.cache.invalidate(session_id)
 
     def get_conversation_count(self, session_id: str = 'default') -> int:
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
+        if self.cache:
+            count = self.cache.count(session_id)
+            if count is not None:
+                return count
+            generation = self.cache.generation(session_id)
+
+        count = self._load_count(session_id)
+
+        if self.cache:
+            self.cache.store_count(session_id, count, generation)
+        return count
+
+    def _load_count(self, session_id: str) -> int:
+        if self.writer:
+            with self.writer.commit_lock:
+                return self._select_count(session_id) + len(self.writer.pending_rows(session_id))
+
+        return self._select_count(session_id)
+
+    def _select_count(self, session_id: str) -> int:
+        with self.pool.connection() as conn:
+            cursor = conn.execute('''
                 select count(*)
                 from conversations
                 where session_id = ?
                 ''', (session_id,))
-            return cursor.fetchone()[0]
\ No newline at end of file
+            return cursor.fetchone()[0]
+
+    def search_conversations(self, query: str, session_id: Optional[str] = None, limit: int = 20,
+                             highlight: Tuple[str, str] = ('**', '**'), raw: bool = False) -> List[Dict]:
+        """
+        Full-text search over user inputs and assistant responses, best matches first.
+
+        Args:
+            query (str): Words to look for; all must match. With raw=True it is passed to FTS5 as-is
+            session_id (str): Restrict hits to one session, or None to search every session
+            limit (int): Maximum number of hits
+            highlight (tuple): Markers placed around matched terms
+            raw (bool): Treat query as FTS5 query syntax (phrases, OR, NEAR, prefix*)
+
+        Returns:
+            list: Dicts with id, session_id, user_input, assistant_response, timestamp,
+                  score, user_input_highlight and assistant_response_snippet
+        """
+        self._wait_for_writes()
+
+        match = query if raw else self._to_match_query(query)
+        if not match:
+            return []
+
+        if not self.has_search_index():
+            return self._search_like(query, session_id, limit)
+
+        start, end = highlight
+        sql = '''
+            select c.id, c.session_id, c.user_input, c.assistant_response, c.timestamp,
+                   bm25(conversations_fts),
+                   highlight(conversations_fts, 0, ?, ?),
+                   snippet(conversations_fts, 1, ?, ?, '…', 32)
+            from conversations_fts
+            join conversations c on c.id = conversations_fts.rowid
+            where conversations_fts match ?
+        '''
+        params = [start, end, start, end, match]
+        if session_id is not None:
+            sql += ' and c.session_id = ?'
+            params.append(session_id)
+        sql += ' order by bm25(conversations_fts) limit ?'
+        params.append(limit)
+
+        with self.pool.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+
+        return [
+            {
+                "id": row[0],
+                "session_id": row[1],
+                "user_input": row[2],
+                "assistant_response": row[3],
+                "timestamp": row[4],
+                # bm25 is lower-is-better; flip it so larger scores rank higher
+                "score": -row[5],
+                "user_input_highlight": row[6],
+                "assistant_response_snippet": row[7],
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def _to_match_query(query: str) -> str:
+        # Quote every term so punctuation in user text is never read as FTS5 syntax
+        terms = query.split()
+        return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+    def _search_like(self, query: str, session_id: Optional[str], limit: int) -> List[Dict]:
+        # Like the FTS query, every term must appear in the user input or the response
+        sql = '''
+            select id, session_id, user_input, assistant_response, timestamp
+            from conversations
+            where 1
+        '''
+        params = []
+        for term in query.split():
+            escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            pattern = f"%{escaped}%"
+            sql += " and (user_input like ? escape '\\' or assistant_response like ? escape '\\')"
+            params += [pattern, pattern]
+        if session_id is not None:
+            sql += ' and session_id = ?'
+            params.append(session_id)
+        sql += ' order by created_ms desc, id desc limit ?'
+        params.append(limit)
+
+        with self.pool.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+
+        return [
+            {
+                "id": row[0],
+                "session_id": row[1],
+                "user_input": row[2],
+                "assistant_response": row[3],
+                "timestamp": row[4],
+                "score": 0.0,
+                "user_input_highlight": row[2],
+                "assistant_response_snippet": row[3],
+            }
+            for row in rows
+        ]
+
+    def has_search_index(self) -> bool:
+        with self.pool.connection() as conn:
+            row = conn.execute('''
+                select 1 from sqlite_master where type = 'table' and name = 'conversations_fts'
+            ''').fetchone()
+            return row is not None
+
+    def rebuild_search_index(self) -> bool:
+        """
+        Create the full-text index if missing and re-index every stored turn.
+
+        Returns:
+            bool: False if this sqlite build has no FTS5 support
+        """
+        self._wait_for_writes()
+        with self.pool.transaction() as conn:
+            if not _create_search_index(conn):
+                return False
+            conn.execute("insert into conversations_fts (conversations_fts) values ('rebuild')")
+        return True
+
+    EXPORT_FIELDS = ("id", "session_id", "timestamp", "created_ms", "user_input", "assistant_response")
+
+    def iter_conversations(self, session_id: Optional[str] = None, chunk_size: int = 1000) -> Iterator[Dict]:
+        """
+        Stream stored turns in id order, fetching chunk_size rows per query.
+
+        Uses keyset pagination, so memory stays constant and no read transaction
+        is held open between chunks.
+        """
+        self._wait_for_writes()
+        last_id = 0
+        sql = '''
+            select id, session_id, timestamp, created_ms, user_input, assistant_response
+            from conversations
+            where id > ?
+        '''
+        if session_id is not None:
+            sql += ' and session_id = ?'
+        sql += ' order by id limit ?'
+
+        while True:
+            params = (last_id, session_id, chunk_size) if session_id is not None else (last_id, chunk_size)
+            with self.pool.connection() as conn:
+                rows = conn.execute(sql, params).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield dict(zip(self.EXPORT_FIELDS, row))
+            last_id = rows[-1][0]
+
+    @staticmethod
+    def _history_format(path: str, fmt: Optional[str]) -> str:
+        fmt = (fmt or os.path.splitext(path)[1].lstrip('.')).lower()
+        if fmt not in ('jsonl', 'csv'):
+            raise ValueError(f"Unsupported history format '{fmt}', use jsonl or csv")
+        return fmt
+
+    def export_conversations(self, path: str, fmt: Optional[str] = None, session_id: Optional[str] = None,
+                             chunk_size: int = 1000, progress: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Stream conversation history to a JSONL or CSV file.
+
+        Args:
+            path (str): Output file
+            fmt (str): 'jsonl' or 'csv'; taken from the file extension when omitted
+            session_id (str): Export one session only, or None for everything
+            chunk_size (int): Rows fetched per query
+            progress (callable): Called with the running row count after every chunk
+
+        Returns:
+            int: Number of turns exported
+        """
+        fmt = self._history_format(path, fmt)
+        count = 0
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            writer = None
+            if fmt == 'csv':
+                writer = csv.DictWriter(file, fieldnames=self.EXPORT_FIELDS)
+                writer.writeheader()
+
+            for record in self.iter_conversations(session_id, chunk_size):
+                if writer:
+                    writer.writerow(record)
+                else:
+                    file.write(json.dumps(record, ensure_ascii=False) + '\n')
+                count += 1
+                if progress and count % chunk_size == 0:
+                    progress(count)
+
+        if progress:
+            progress(count)
+        return count
+
+    def _iter_history_file(self, path: str, fmt: str) -> Iterator[Dict]:
+        with open(path, 'r', encoding='utf-8', newline='') as file:
+            if fmt == 'csv':
+                yield from csv.DictReader(file)
+            else:
+                for line_number, line in enumerate(file, start=1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError as e:
+                        raise ValueError(f"Invalid JSON on line {line_number} of {path}: {e}")
+
+    def _import_row(self, record: Dict, session_id: Optional[str]) -> Dict:
+        timestamp = record.get("timestamp") or None
+        created_ms = record.get("created_ms")
+        if created_ms in (None, ''):
+            if timestamp:
+                parsed = datetime.strptime(timestamp[:19], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+                created_ms = int(parsed.timestamp() * 1000)
+            else:
+                created_ms, timestamp = self._now()
+
+        return {
+            "user_input": record["user_input"],
+            "assistant_response": record["assistant_response"],
+            "session_id": session_id or record.get("session_id") or 'default',
+            "timestamp": timestamp,
+            "created_ms": int(created_ms),
+        }
+
+    def import_conversations(self, path: str, fmt: Optional[str] = None, session_id: Optional[str] = None,
+                             batch_size: int = 5000, progress: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Stream turns from a JSONL or CSV file written by export_conversations.
+
+        Rows get new ids; timestamps and sessions are kept. Turns already stored
+        with the same session, created_ms and text are skipped, so a file can be
+        imported again safely. Each batch of batch_size rows is inserted with
+        executemany in one transaction.
+
+        Args:
+            path (str): Input file
+            fmt (str): 'jsonl' or 'csv'; taken from the file extension when omitted
+            session_id (str): Put every imported turn into this session instead of its own
+            batch_size (int): Rows per transaction
+            progress (callable): Called with the running row count after every batch
+
+        Returns:
+            int: Number of turns imported, not counting skipped duplicates
+        """
+        fmt = self._history_format(path, fmt)
+        self._wait_for_writes()
+        count = 0
+        batch = []
+
+        def write_batch() -> int:
+            with self.pool.transaction() as conn:
+                return conn.executemany(self.IMPORT_SQL, batch).rowcount
+
+        try:
+            for record in self._iter_history_file(path, fmt):
+                batch.append(self._import_row(record, session_id))
+                if len(batch) >= batch_size:
+                    count += write_batch()
+                    batch = []
+                    if progress:
+                        progress(count)
+
+            if batch:
+                count += write_batch()
+        finally:
+            # Imported turns can land in any session, so cached windows may be stale
+            if self.cache:
+                self.cache.clear()
+
+        if progress:
+            progress(count)
+        return count
+
+    def cache_stats(self) -> Optional[Dict[str, int]]:
+        """
+        Hit/miss counters of the recent-turn cache, or None when caching is off.
+        """
+        return self.cache.stats() if self.cache else None
+
+    def _wait_for_writes(self):
+        # Readers need queued turns on disk first, but a failed write is for flush() callers to hear about
+        if self.writer:
+            self.writer.flush(raise_errors=False)
+
+    def flush(self):
+        """
+        Wait until every queued write-behind turn is on disk. No-op otherwise.
+
+        Raises:
+            sqlite3.Error: If the writer had to drop turns since the last flush
+        """
+        if self.writer:
+            self.writer.flush()
+
+    def close(self):
+        try:
+            if self.writer:
+                atexit.unregister(self.close)
+                self.writer.close()
+        finally:
+            self.pool.close()
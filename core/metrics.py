@@ -0,0 +1,242 @@
+import bisect
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+# Upper bounds in seconds, spanning a cached SQLite read up to a slow model reply
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+STAGE_SECONDS = 'bliss_stage_seconds'
+PROMPT_TOKENS = 'bliss_prompt_tokens'
+GENERATED_TOKENS = 'bliss_generated_tokens'
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed bucket bounds, in the shape Prometheus expects.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """
+        Upper bound of the bucket holding the q-th quantile; inf if it is past the last bucket.
+        """
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = q * self.count
+            seen = 0
+            for bound, count in zip(self.buckets, self.counts):
+                seen += count
+                if seen >= rank:
+                    return bound
+            return float('inf')
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative = []
+        running = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            running += bucket_count
+            cumulative.append((bound, running))
+        return {"count": count, "sum": total, "buckets": cumulative}
+
+
+class _Timer:
+    __slots__ = ('registry', 'name', 'labels', 'started')
+
+    def __init__(self, registry: "MetricsRegistry", name: str, labels: Tuple):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry._observe(self.name, self.labels, time.perf_counter() - self.started)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """
+    In-process registry of labelled histograms with Prometheus text and JSON export.
+
+    While disabled, timer() hands back one shared no-op context manager and
+    observe() returns at once, so instrumented code pays about an attribute
+    check per stage.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._histograms: Dict[str, Dict[Tuple, Histogram]] = {}
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.register(STAGE_SECONDS, "Seconds spent in each stage of producing a reply")
+        self.register(PROMPT_TOKENS, "Prompt tokens Ollama evaluated per request", TOKEN_BUCKETS)
+        self.register(GENERATED_TOKENS, "Tokens Ollama generated per request", TOKEN_BUCKETS)
+
+    def register(self, name: str, help_text: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Declare a histogram family's help text and buckets; families are otherwise created on first use.
+        """
+        with self._lock:
+            self._help[name] = help_text
+            self._buckets[name] = tuple(sorted(buckets))
+
+    def _histogram(self, name: str, labels: Tuple) -> Histogram:
+        family = self._histograms.get(name)
+        histogram = family.get(labels) if family is not None else None
+        if histogram is None:
+            with self._lock:
+                family = self._histograms.setdefault(name, {})
+                histogram = family.get(labels)
+                if histogram is None:
+                    histogram = family[labels] = Histogram(self._buckets.get(name, DEFAULT_BUCKETS))
+        return histogram
+
+    def _observe(self, name: str, labels: Tuple, value: float):
+        self._histogram(name, labels).observe(value)
+
+    def observe(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        self._observe(name, tuple(sorted(labels.items())), value)
+
+    def timer(self, name: str, **labels):
+        """
+        Context manager that observes the seconds spent inside it.
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, tuple(sorted(labels.items())))
+
+    def stage(self, stage: str):
+        return self.timer(STAGE_SECONDS, stage=stage)
+
+    def observe_usage(self, usage: Dict[str, int]):
+        """
+        Record Ollama's own prefill/decode timings and token counts from a chat response.
+        """
+        if not self.enabled or not usage:
+            return
+        for field, stage in (('load_duration', 'model_load'), ('prompt_eval_duration', 'prefill'),
+                             ('eval_duration', 'decode')):
+            if usage.get(field) is not None:
+                self.observe(STAGE_SECONDS, usage[field] / 1e9, stage=stage)
+        if usage.get('prompt_eval_count') is not None:
+            self.observe(PROMPT_TOKENS, usage['prompt_eval_count'])
+        if usage.get('eval_count') is not None:
+            self.observe(GENERATED_TOKENS, usage['eval_count'])
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def summary(self, name: str = STAGE_SECONDS) -> Dict[str, Dict[str, float]]:
+        """
+        Count, mean and bucketed p50/p95 per label set of one family, keyed by label values.
+        """
+        with self._lock:
+            family = dict(self._histograms.get(name, {}))
+        result = {}
+        for labels, histogram in sorted(family.items()):
+            key = ",".join(str(value) for _, value in labels) or name
+            count = histogram.count
+            result[key] = {
+                "count": count,
+                "mean": histogram.sum / count if count else 0.0,
+                "p50": histogram.quantile(0.5),
+                "p95": histogram.quantile(0.95),
+            }
+        return result
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            families = {name: dict(family) for name, family in self._histograms.items()}
+        result = {}
+        for name, family in sorted(families.items()):
+            series = []
+            for labels, histogram in sorted(family.items()):
+                snapshot = histogram.snapshot()
+                series.append({
+                    "labels": dict(labels),
+                    "count": snapshot["count"],
+                    "sum": snapshot["sum"],
+                    "buckets": [[bound if bound != float('inf') else "+Inf", count]
+                                for bound, count in snapshot["buckets"]],
+                })
+            result[name] = {"help": self._help.get(name, ""), "series": series}
+        return result
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def to_prometheus(self) -> str:
+        """
+        Render every histogram in the Prometheus text exposition format.
+        """
+        with self._lock:
+            families = {name: dict(family) for name, family in self._histograms.items()}
+        lines = []
+        for name, family in sorted(families.items()):
+            if self._help.get(name):
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in sorted(family.items()):
+                snapshot = histogram.snapshot()
+                for bound, count in snapshot["buckets"]:
+                    le = "+Inf" if bound == float('inf') else repr(float(bound))
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {snapshot['sum']}")
+                lines.append(f"{name}_count{_format_labels(labels)} {snapshot['count']}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+def _format_labels(labels: Tuple) -> str:
+    if not labels:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+_registry = MetricsRegistry(enabled=os.environ.get('BLISS_METRICS', '') not in ('', '0'))
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """
+    The process-wide registry; disabled unless BLISS_METRICS is set or it is enabled explicitly.
+    """
+    return _registry
@@ -0,0 +1,101 @@
+import threading
+import time
+from typing import Dict, List, Optional
+
+import ollama
+
+
+def resolve_model_name(model_name: str, available: List[str]) -> Optional[str]:
+    """
+    Match a configured model name against the names Ollama reports.
+
+    Args:
+        model_name (str): Configured name, e.g. 'mistral'
+        available (list): Installed model names, e.g. ['mistral:latest']
+
+    Returns:
+        str: The installed name to use, or None if the model is not installed
+    """
+    for name in available:
+        if name == model_name:
+            return name
+        # Check if our model name is in the full name (e.g., 'mistral' in 'mistral:latest')
+        elif model_name in name:
+            return name
+    return None
+
+
+def model_names(models_response) -> List[str]:
+    """
+    Names of the models in the response of an Ollama client's list() call.
+    """
+    return [model.model for model in getattr(models_response, 'models', []) if hasattr(model, 'model')]
+
+
+class ModelCatalog:
+    """
+    Cached list of the models installed in Ollama.
+
+    Listing models is a round trip to the server, so the result is kept for
+    ttl seconds and shared by every client using the catalog. Resolved names
+    ('mistral' -> 'mistral:latest') are remembered for as long as the list
+    they were resolved against.
+    """
+
+    def __init__(self, client=None, ttl: float = 300.0):
+        """
+        Initialize the catalog.
+
+        Args:
+            client: Ollama client used for listing (default: the ollama module)
+            ttl (float): Seconds a fetched model list stays valid
+        """
+        self.client = client if client is not None else ollama
+        self.ttl = ttl
+        self._models: Optional[List[str]] = None
+        self._fetched_at = 0.0
+        self._resolved: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def list_models(self, refresh: bool = False) -> List[str]:
+        """
+        Names of the installed models, fetched again once the cached list expires.
+
+        Raises whatever the Ollama client raises when the server is unreachable.
+        """
+        with self._lock:
+            if not refresh and self._models is not None and time.monotonic() - self._fetched_at < self.ttl:
+                return list(self._models)
+
+        models = model_names(self.client.list())
+
+        with self._lock:
+            self._models = models
+            self._fetched_at = time.monotonic()
+            self._resolved.clear()
+        return list(models)
+
+    def resolve(self, model_name: str, refresh: bool = False) -> Optional[str]:
+        """
+        Installed name for a configured model name, or None if it is not installed.
+        """
+        models = self.list_models(refresh)
+        with self._lock:
+            if model_name not in self._resolved:
+                self._resolved[model_name] = resolve_model_name(model_name, models)
+            return self._resolved[model_name]
+
+    def invalidate(self):
+        with self._lock:
+            self._models = None
+            self._resolved.clear()
+
+
+_default_catalog = ModelCatalog()
+
+
+def get_model_catalog() -> ModelCatalog:
+    """
+    The catalog shared by clients talking to the default Ollama server.
+    """
+    return _default_catalog
@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Union
+
+TASK_CHAT = 'chat'
+TASK_SUMMARIZE = 'summarize'
+TASK_GREETING = 'greeting'
+TASK_EMBEDDING = 'embedding'
+
+# Models to use per task, preferred first and smaller fallbacks after it (see installed_ollama_models.md).
+# None of the installed chat models is an embedding model, so embeddings keep OllamaEmbedder's default.
+DEFAULT_ROUTES = {
+    TASK_CHAT: ['qwen3:1.7b', 'deepseek-r1:1.5b'],
+    TASK_SUMMARIZE: ['qwen3:1.7b', 'deepseek-r1:1.5b'],
+    TASK_GREETING: ['qwen3:1.7b'],
+    TASK_EMBEDDING: ['nomic-embed-text'],
+}
+
+# p95 latency targets in seconds for whole (non-cached) requests
+DEFAULT_SLOS = {
+    TASK_CHAT: 10.0,
+    TASK_SUMMARIZE: 20.0,
+    TASK_GREETING: 5.0,
+}
+
+
+class ModelRouter:
+    """
+    Picks a model per task type and steps down to smaller ones when they run slow.
+
+    Latency is tracked per (task, model) over the last window requests. When a
+    model's p95 exceeds the task's SLO, or one of its requests times out, it is
+    skipped for cooldown seconds and the next model in the route is used. After
+    the cooldown its old samples are gone, so it gets a fresh chance.
+    """
+
+    def __init__(self, routes: Optional[Dict[str, Sequence[str]]] = None,
+                 slos: Optional[Union[Dict[str, float], float]] = None, window: int = 50,
+                 min_samples: int = 10, cooldown: float = 120.0):
+        """
+        Initialize the router.
+
+        Args:
+            routes (dict): Task type -> model names, preferred first (default: DEFAULT_ROUTES)
+            slos (dict or float): Task type -> p95 latency target in seconds, or one target
+                                  for every task (default: DEFAULT_SLOS)
+            window (int): Recent requests per (task, model) used for the p95
+            min_samples (int): Requests needed before the p95 is trusted
+            cooldown (float): Seconds a slow or timed-out model is skipped
+        """
+        self.routes: Dict[str, List[str]] = {task: list(models) for task, models in (routes or DEFAULT_ROUTES).items()}
+        if slos is None:
+            slos = DEFAULT_SLOS
+        self.slos = slos if isinstance(slos, dict) else {task: slos for task in self.routes}
+        self.window = max(1, window)
+        self.min_samples = max(1, min(min_samples, self.window))
+        self.cooldown = cooldown
+        self._samples: Dict[tuple, deque] = {}
+        self._degraded_until: Dict[tuple, float] = {}
+        self._fallbacks = 0
+        self._lock = threading.Lock()
+
+    def route(self, task: str) -> str:
+        """
+        Model to use for task right now.
+
+        Raises:
+            KeyError: If there is no route for task
+        """
+        models = self.routes[task]
+        now = time.monotonic()
+        with self._lock:
+            for model in models:
+                if self._degraded_until.get((task, model), 0.0) <= now:
+                    return model
+        # Everything is degraded; the smallest model is the best bet
+        return models[-1]
+
+    def _degrade(self, task: str, model: str):
+        # Called with the lock held; the smallest model has nothing to fall back to
+        if self.routes.get(task, [model])[-1] == model:
+            return
+        key = (task, model)
+        self._degraded_until[key] = time.monotonic() + self.cooldown
+        self._samples.pop(key, None)
+        self._fallbacks += 1
+
+    def record(self, task: str, model: str, seconds: float):
+        key = (task, model)
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+            slo = self.slos.get(task)
+            if slo is not None and len(samples) >= self.min_samples and self._p95(samples) > slo:
+                self._degrade(task, model)
+
+    def record_timeout(self, task: str, model: str):
+        with self._lock:
+            self._degrade(task, model)
+
+    @staticmethod
+    def _p95(samples) -> float:
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def stats(self) -> Dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "fallbacks": self._fallbacks,
+                "p95": {f"{task}/{model}": self._p95(samples) for (task, model), samples in self._samples.items() if samples},
+                "degraded": sorted(f"{task}/{model}" for (task, model), until in self._degraded_until.items() if until > now),
+            }
@@ -0,0 +1,311 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import httpx
+import ollama
+
+try:
+    from .model_catalog import model_names, resolve_model_name
+except ImportError:
+    from model_catalog import model_names, resolve_model_name
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class NoHealthyEndpoint(RuntimeError):
+    pass
+
+
+class Endpoint:
+    """
+    One Ollama server in the pool, with its circuit breaker state.
+
+    The circuit opens after failure_threshold consecutive failures and stays
+    open for reset_timeout seconds; then a single trial request (or a health
+    check) decides whether it closes again.
+    """
+
+    def __init__(self, host: str, timeout: Optional[float] = None):
+        self.host = host
+        # ollama.Client keeps an httpx connection pool, so connections are reused between requests
+        self.client = ollama.Client(host=host, timeout=timeout)
+        self.outstanding = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.requests = 0
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.models: Optional[List[str]] = None
+        self.last_checked = 0.0
+
+    def has_model(self, model_name: Optional[str]) -> bool:
+        # Until the first health check we do not know, so assume it does
+        if not model_name or self.models is None:
+            return True
+        return resolve_model_name(model_name, self.models) is not None
+
+
+class OllamaPool:
+    """
+    Spreads Ollama requests over several servers.
+
+    Exposes the chat/generate/embed/list calls of the ollama module, so it can
+    stand in for it as OllamaClient's client. Each request goes to the usable
+    endpoint with the fewest outstanding requests, taking tied endpoints in
+    turn; transport errors, timeouts
+    and server errors count against the endpoint's circuit breaker and the
+    request moves on to another endpoint. With hedge_after set, a non-streaming
+    request that has not finished in that many seconds is also sent to a second
+    endpoint, and whichever answers first wins.
+    """
+
+    def __init__(self, hosts: Sequence[str], timeout: Optional[float] = None, failure_threshold: int = 3,
+                 reset_timeout: float = 30.0, health_interval: Optional[float] = 30.0,
+                 hedge_after: Optional[float] = None, retries: Optional[int] = None):
+        """
+        Initialize the pool.
+
+        Args:
+            hosts (list): Ollama server URLs, e.g. ['http://localhost:11434', 'http://gpu2:11434']
+            timeout (float): Seconds per request before it fails over (default: no timeout)
+            failure_threshold (int): Consecutive failures that open an endpoint's circuit
+            reset_timeout (float): Seconds an open circuit waits before allowing a trial request
+            health_interval (float): Seconds between background health checks; None disables them
+            hedge_after (float): Send a duplicate non-streaming request after this many seconds; None disables
+            retries (int): Other endpoints tried after a failure (default: all of them)
+        """
+        if not hosts:
+            raise ValueError("OllamaPool needs at least one host")
+        self.endpoints = [Endpoint(host, timeout) for host in hosts]
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.hedge_after = hedge_after
+        self.retries = len(self.endpoints) - 1 if retries is None else max(0, retries)
+        self.hedged = 0
+        self._turn = 0
+        self._lock = threading.Lock()
+        self._hedge_executor = ThreadPoolExecutor(max_workers=2 * len(self.endpoints),
+                                                  thread_name_prefix="ollama-hedge") if hedge_after else None
+        self._stop = threading.Event()
+        self._health_thread = None
+
+        if health_interval:
+            self._health_thread = threading.Thread(
+                target=self._health_loop, args=(health_interval,), name="ollama-health", daemon=True
+            )
+            self._health_thread.start()
+
+    def _acquire(self, model_name: Optional[str], tried: List[Endpoint]) -> Endpoint:
+        # Picks the least loaded usable endpoint not in tried, and adds it to tried
+        now = time.monotonic()
+        with self._lock:
+            # Scan from a rotating start, so ties on outstanding requests go round-robin
+            start = self._turn % len(self.endpoints)
+            self._turn += 1
+            candidates = []
+            for endpoint in self.endpoints[start:] + self.endpoints[:start]:
+                if endpoint in tried or not endpoint.has_model(model_name):
+                    continue
+                if endpoint.state == OPEN and now - endpoint.opened_at >= self.reset_timeout:
+                    endpoint.state = HALF_OPEN
+                if endpoint.state == OPEN or (endpoint.state == HALF_OPEN and endpoint.trial_in_flight):
+                    continue
+                candidates.append(endpoint)
+
+            if not candidates:
+                raise NoHealthyEndpoint(f"No usable Ollama endpoint for model '{model_name}'")
+
+            endpoint = min(candidates, key=lambda candidate: candidate.outstanding)
+            if endpoint.state == HALF_OPEN:
+                endpoint.trial_in_flight = True
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            tried.append(endpoint)
+            return endpoint
+
+    def _release(self, endpoint: Endpoint, error: Optional[BaseException] = None):
+        with self._lock:
+            endpoint.outstanding -= 1
+            endpoint.trial_in_flight = False
+            if error is None:
+                self._mark_up(endpoint)
+            else:
+                self._mark_down(endpoint)
+
+    def _mark_up(self, endpoint: Endpoint):
+        # Called with the lock held
+        endpoint.consecutive_failures = 0
+        endpoint.state = CLOSED
+
+    def _mark_down(self, endpoint: Endpoint):
+        # Called with the lock held
+        endpoint.failures += 1
+        endpoint.consecutive_failures += 1
+        if endpoint.state == HALF_OPEN or endpoint.consecutive_failures >= self.failure_threshold:
+            endpoint.state = OPEN
+            endpoint.opened_at = time.monotonic()
+
+    @staticmethod
+    def _is_endpoint_failure(error: BaseException) -> bool:
+        # 4xx answers (unknown model, bad request) would fail the same way on every endpoint
+        if isinstance(error, ollama.ResponseError):
+            return error.status_code is None or error.status_code < 0 or error.status_code >= 500
+        return isinstance(error, (httpx.TransportError, TimeoutError, ConnectionError))
+
+    def _call(self, method: str, model_name: Optional[str], kwargs: Dict, avoid: Optional[List[Endpoint]] = None,
+              sent: Optional[threading.Event] = None):
+        # avoid is shared between hedged copies of a request, so they land on different endpoints;
+        # sent is set once the request goes out
+        tried = avoid if avoid is not None else []
+        attempts = 0
+        last_error = None
+        while True:
+            try:
+                endpoint = self._acquire(model_name, tried)
+            except NoHealthyEndpoint:
+                if last_error is None:
+                    raise
+                raise last_error
+            attempts += 1
+            if sent is not None:
+                sent.set()
+            try:
+                result = getattr(endpoint.client, method)(**kwargs)
+            except Exception as e:
+                failure = self._is_endpoint_failure(e)
+                self._release(endpoint, e if failure else None)
+                if not failure or attempts > self.retries:
+                    raise
+                last_error = e
+                continue
+            self._release(endpoint)
+            return result
+
+    def _hedged_call(self, method: str, model_name: Optional[str], kwargs: Dict):
+        avoid = []
+        sent = threading.Event()
+        primary = self._hedge_executor.submit(self._call, method, model_name, kwargs, avoid, sent)
+        primary.add_done_callback(lambda future: sent.set())
+        # Time spent queued for an executor thread does not count towards hedge_after
+        sent.wait()
+        done, _ = wait([primary], timeout=self.hedge_after)
+        if done:
+            return primary.result()
+
+        with self._lock:
+            self.hedged += 1
+        backup = self._hedge_executor.submit(self._call, method, model_name, kwargs, avoid)
+        pending = {primary, backup}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # The slower request keeps running; its endpoint is released when it ends
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _stream(self, model_name: Optional[str], kwargs: Dict) -> Iterator:
+        tried = []
+        last_error = None
+        while True:
+            try:
+                endpoint = self._acquire(model_name, tried)
+            except NoHealthyEndpoint:
+                if last_error is None:
+                    raise
+                raise last_error
+            started = False
+            error = None
+            try:
+                for chunk in endpoint.client.chat(**kwargs):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                error = e if self._is_endpoint_failure(e) else None
+                # Chunks already handed out cannot be taken back, so only retry before the first one
+                if error is None or started or len(tried) > self.retries:
+                    raise
+                last_error = e
+            finally:
+                self._release(endpoint, error)
+
+    def chat(self, model: str = '', messages=None, stream: bool = False, **kwargs):
+        kwargs = dict(kwargs, model=model, messages=messages, stream=stream)
+        if stream:
+            return self._stream(model, kwargs)
+        if self._hedge_executor is not None:
+            return self._hedged_call('chat', model, kwargs)
+        return self._call('chat', model, kwargs)
+
+    def generate(self, model: str = '', **kwargs):
+        if kwargs.get('stream'):
+            raise ValueError("OllamaPool.generate does not support streaming; use chat(stream=True)")
+        return self._call('generate', model, dict(kwargs, model=model))
+
+    def embed(self, model: str = '', **kwargs):
+        return self._call('embed', model, dict(kwargs, model=model))
+
+    def list(self):
+        return self._call('list', None, {})
+
+    def check_health(self) -> Dict[str, bool]:
+        """
+        List the models on every endpoint, the same check test_connection does against one server.
+
+        A successful listing closes the endpoint's circuit; a failure counts against it.
+
+        Returns:
+            dict: Host -> whether it answered
+        """
+        results = {}
+        for endpoint in self.endpoints:
+            try:
+                models = model_names(endpoint.client.list())
+            except Exception as e:
+                print(f"✗ Ollama endpoint {endpoint.host} failed its health check: {e!r}")
+                with self._lock:
+                    self._mark_down(endpoint)
+                results[endpoint.host] = False
+                continue
+
+            with self._lock:
+                endpoint.models = models
+                endpoint.last_checked = time.monotonic()
+                self._mark_up(endpoint)
+            results[endpoint.host] = True
+        return results
+
+    def _health_loop(self, interval: float):
+        while not self._stop.is_set():
+            self.check_health()
+            self._stop.wait(interval)
+
+    def stats(self) -> List[Dict]:
+        with self._lock:
+            return [{
+                "host": endpoint.host,
+                "state": endpoint.state,
+                "outstanding": endpoint.outstanding,
+                "requests": endpoint.requests,
+                "failures": endpoint.failures,
+                "models": list(endpoint.models) if endpoint.models is not None else None,
+            } for endpoint in self.endpoints]
+
+    def close(self):
+        self._stop.set()
+        if self._health_thread is not None:
+            self._health_thread.join(timeout=5)
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+        for endpoint in self.endpoints:
+            http_client = getattr(endpoint.client, '_client', None)
+            if http_client is not None:
+                http_client.close()
@@ -1,230 +1,467 @@
+import hashlib
 import json
 import os
-from typing import Dict, List, Optional, Any
+import random
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Any
+
+try:
+    from .context_window import DEFAULT_SYSTEM_PROMPT_BUDGET, MODEL_SYSTEM_PROMPT_BUDGETS, estimate_tokens
+    from .personality_registry import PersonalityRegistry, get_personality_registry
+    from .prompt_compiler import SystemPrompt, compile_system_prompt
+except ImportError:
+    from context_window import DEFAULT_SYSTEM_PROMPT_BUDGET, MODEL_SYSTEM_PROMPT_BUDGETS, estimate_tokens
+    from personality_registry import PersonalityRegistry, get_personality_registry
+    from prompt_compiler import SystemPrompt, compile_system_prompt
+
+# Compact prompts kept on a CompiledPersonality once built; any other budget is compiled per call
+MEMOIZED_PROMPT_BUDGETS = frozenset(MODEL_SYSTEM_PROMPT_BUDGETS.values()) | {DEFAULT_SYSTEM_PROMPT_BUDGET}
+
+
+def render_personality_prompt(personality: Dict[str, Any]) -> str:
+    """
+    Build the system prompt for a personality from its fields.
+    """
+    if not personality:
+        return "No personality loaded."
+
+    prompt_parts = [
+        f"You are {personality.get('name', 'unknown')}, an AI with a unique personality.",
+        f"You are {personality.get('age', 'unknown')} years old."
+        f"You have: \"{personality.get('description', 'No description available')}\"",
+        f"your background is: \"{personality.get('background', 'No background available')}\""
+    ]
+
+    if personality.get('occupation'):
+        prompt_parts.append(f"You work as a {personality['occupation']}.")
+
+    if personality.get('traits'):
+        traits = ", ".join(personality['traits'])
+        prompt_parts.append(f"Your personality traits include: {traits}.")
+
+    if personality.get('default_greetings'):
+        greetings = ", ".join(personality['default_greetings'])
+        prompt_parts.append(f"Your default greetings include but are not limited to: {greetings}.")
+
+    if personality.get('default_farewells'):
+        farewells = ", ".join(personality['default_farewells'])
+        prompt_parts.append(f"Your default farewells include but are not limited to: {farewells}.")
+
+    if personality.get('tone'):
+        prompt_parts.append(f"Your tone is {personality['tone']}.")
+
+    if personality.get('interests'):
+        interests = ", ".join(personality['interests'])
+        prompt_parts.append(f"Your interests include: {interests}.")
+
+    if personality.get('goals'):
+        goals = ", ".join(personality['goals'])
+        prompt_parts.append(f"Your goals include: {goals}.")
+
+    if personality.get('communication_style'):
+        prompt_parts.append(f"Your communication style is {personality['communication_style']}.")
+
+    if personality.get('favorite_quotes'):
+        quotes = ", ".join(personality['favorite_quotes'])
+        prompt_parts.append(f"Your favorite quotes include: {quotes}.")
+
+    if personality.get('strengths'):
+        strengths = ", ".join(personality['strengths'])
+        prompt_parts.append(f"Your strengths include: {strengths}.")
+
+    if personality.get('weaknesses'):
+        weaknesses = ", ".join(personality['weaknesses'])
+        prompt_parts.append(f"Your weaknesses include: {weaknesses}.")
+
+    if personality.get('fears'):
+        fears = ", ".join(personality['fears'])
+        prompt_parts.append(f"Your fears include: {fears}.")
+    
+    if personality.get('likes'):
+        likes = ", ".join(personality['likes'])
+        prompt_parts.append(f"Your likes include: {likes}.")
+
+    if personality.get('dislikes'):
+        dislikes = ", ".join(personality['dislikes'])
+        prompt_parts.append(f"Your dislikes include: {dislikes}.")
+
+    if personality.get('quirks'):
+        quirks = ", ".join(personality['quirks'])
+        prompt_parts.append(f"Your quirks include: {quirks}.")
+
+    if personality.get('hobbies'):
+        hobbies = ", ".join(personality['hobbies'])
+        prompt_parts.append(f"Your hobbies include: {hobbies}.")
+    
+    if personality.get('favorite_foods'):
+        foods = ", ".join(personality['favorite_foods'])
+        prompt_parts.append(f"Your favorite foods include: {foods}.")
+
+    if personality.get('favorite_music'):
+        music = ", ".join(personality['favorite_music'])
+        prompt_parts.append(f"Your favorite music includes: {music}.")
+
+    if personality.get('favorite_books'):
+        books = ", ".join(personality['favorite_books'])
+        prompt_parts.append(f"Your favorite books include: {books}.")
+
+    if personality.get('favorite_activities'):
+        activities = ", ".join(personality['favorite_activities'])
+        prompt_parts.append(f"Your favorite activities include: {activities}.")
+
+    if personality.get('life_philosophy'):
+        philosophy = personality['life_philosophy']
+        prompt_parts.append(f"Your life philosophy is: {philosophy}.")
+
+    if personality.get('dreams'):
+        dreams = ", ".join(personality['dreams'])
+        prompt_parts.append(f"Your dreams include: {dreams}.")
+
+    if personality.get('aspirations'):
+        aspirations = ", ".join(personality['aspirations'])
+        prompt_parts.append(f"Your aspirations include: {aspirations}.")
+
+    if personality.get('values'):
+        values = ", ".join(personality['values'])
+        prompt_parts.append(f"Your values include: {values}.")
+
+    if personality.get('relationships'):
+        relationships = ", ".join(personality['relationships'])
+        prompt_parts.append(f"Your relationships include: {relationships}.")
+
+    if personality.get('conflicts'):
+        conflicts = ", ".join(personality['conflicts'])
+        prompt_parts.append(f"Your conflicts include: {conflicts}.")
+
+    if personality.get('achievements'):
+        achievements = ", ".join(personality['achievements'])
+        prompt_parts.append(f"Your achievements include: {achievements}.")
+
+    if personality.get('challenges'):
+        challenges = ", ".join(personality['challenges'])
+        prompt_parts.append(f"Your challenges include: {challenges}.")
+
+    if personality.get('lessons_learned'):
+        lessons = ", ".join(personality['lessons_learned'])
+        prompt_parts.append(f"Your lessons learned include: {lessons}.")
+
+    if personality.get('inspirations'):
+        inspirations = ", ".join(personality['inspirations'])
+        prompt_parts.append(f"Your inspirations include: {inspirations}.")
+
+    prompt_parts.extend([
+        "Always respond in character, maintaining consistency with your personality.",
+        "Use your personality traits to influence how you respond to users.",
+        "Be authentic to your character while being helpful and appropriate."
+        "You are a unique AI personality with your own thoughts, feelings, and experiences.",
+        "You are here to engage in meaningful conversations and provide insights based on your personality."
+    ])
+
+    return "\n".join(prompt_parts)
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class CompiledPersonality:
+    """
+    A parsed personality with its system prompt rendered once.
+
+    Fully read-only (nested lists become tuples, dicts mapping proxies), so one
+    instance can be handed to any number of threads at once; the only state that
+    changes is a memo of compiled prompts, bounded to the default budgets. version changes
+    whenever the file's contents do, so it can key caches of model replies.
+    mtime_ns and size are what the cache revalidates against. prompt is the
+    full prompt; system_prompt() also gives compact ones sized to a budget.
+    """
+
+    __slots__ = ('name', 'data', 'prompt', 'version', 'mtime_ns', 'size', '_prompts')
+
+    def __init__(self, name: str, data: Mapping[str, Any], prompt: str, version: str,
+                 mtime_ns: int = 0, size: int = 0, prompts: Optional[Mapping[Any, SystemPrompt]] = None):
+        for attribute, value in (('name', name), ('data', _freeze(dict(data))), ('prompt', prompt),
+                                 ('version', version), ('mtime_ns', mtime_ns), ('size', size),
+                                 ('_prompts', dict(prompts or {}))):
+            object.__setattr__(self, attribute, value)
+
+    def __setattr__(self, attribute, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __delattr__(self, attribute):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __repr__(self) -> str:
+        return f"CompiledPersonality(name={self.name!r}, version={self.version!r})"
+
+    def system_prompt(self, token_budget: Optional[int] = None, full: bool = False) -> SystemPrompt:
+        """
+        The system prompt with its token estimate: compact and within token_budget, or the full one.
+
+        The full prompt and the per-model default budgets are compiled once (or come
+        precompiled from a bundle); other budgets are compiled on every call, so the
+        memo cannot grow with whatever budgets callers pass.
+        """
+        key = 'full' if full else token_budget
+        compiled = self._prompts.get(key)
+        if compiled is None:
+            if full:
+                compiled = SystemPrompt(self.prompt, estimate_tokens(self.prompt), tuple(self.data), ())
+            else:
+                compiled = compile_system_prompt(self.data, token_budget)
+            if full or token_budget in MEMOIZED_PROMPT_BUDGETS:
+                self._prompts[key] = compiled
+        return compiled
+
+    def greeting(self) -> str:
+        if not self.data:
+            return "Hello! How can I assist you today?"
+
+        greetings = self.data.get('default_greetings', ())
+        if greetings:
+            return random.choice(greetings)
+
+        return f"Hello! I'm {self.data.get('name', 'Assistant')}. How can I help you today?"
+
+    def farewell(self) -> str:
+        if not self.data:
+            return "Goodbye! Have a great day!"
+
+        farewells = self.data.get('default_farewells', ())
+        if farewells:
+            return random.choice(farewells)
+
+        return "Goodbye! Take care!"
+
+    def info(self) -> Optional[Dict[str, Any]]:
+        if not self.data:
+            return None
+        return {
+            "name": self.data.get("name"),
+            "age": self.data.get("age"),
+            "gender": self.data.get("gender"),
+            "sexuality": self.data.get("sexuality"),
+            "description": self.data.get("description"),
+            "background": self.data.get("background"),
+            "occupation": self.data.get("occupation"),
+            "traits": list(self.data.get("traits", ())),
+            "interests": list(self.data.get("interests", ())),
+            "goals": list(self.data.get("goals", ())),
+            "communication_style": self.data.get("communication_style"),
+        }
+
+
+# What loading falls back to when not even default.json can be read
+EMPTY_PERSONALITY = CompiledPersonality("", {}, render_personality_prompt({}), "empty")
+
+
+def compile_personality(name: str, raw: bytes, source: str = "", mtime_ns: int = 0,
+                        size: int = 0) -> CompiledPersonality:
+    """
+    Parse a personality file's bytes and render its prompt.
+
+    Raises:
+        json.JSONDecodeError: If the file is not valid JSON
+        ValueError: If the file has no "personality" object
+    """
+    data = json.loads(raw.decode('utf-8'))
+    if "personality" not in data:
+        raise ValueError(f"Personality data not found in {source or name}")
+    personality = data["personality"]
+    version = f"{name}@{hashlib.sha1(raw).hexdigest()[:12]}"
+    return CompiledPersonality(name, personality, render_personality_prompt(personality), version, mtime_ns, size)
+
+
+class PersonalityCache:
+    """
+    Compiled personalities keyed by name, shared by every loader on one directory.
+
+    A lookup costs one os.stat: the entry is reused while the file's mtime and
+    size are unchanged, and recompiled when either moves, so edits show up on
+    the next turn without re-reading files that did not change.
+    """
+
+    def __init__(self, personalities_dir: str = "data/personalities", max_entries: int = 256):
+        self.personalities_dir = personalities_dir
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, CompiledPersonality]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.personalities_dir, f"{name}.json")
+
+    def get(self, name: str) -> CompiledPersonality:
+        """
+        The compiled personality for name, compiling it if it is new or its file changed.
+
+        Raises:
+            FileNotFoundError: If there is no such personality file
+            json.JSONDecodeError, ValueError: If the file is not a valid personality
+        """
+        path = self.path(name)
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                self._entries.move_to_end(name)
+                self.hits += 1
+                return entry
+
+        with open(path, 'rb') as file:
+            raw = file.read()
+        compiled = compile_personality(name, raw, path, stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.reloads += 1
+            self._entries[name] = compiled
+            self._entries.move_to_end(name)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def invalidate(self, name: Optional[str] = None):
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+            }
+
+
+_caches: Dict[str, PersonalityCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_personality_cache(personalities_dir: str = "data/personalities") -> PersonalityCache:
+    """
+    The cache shared by all loaders reading personalities_dir.
+    """
+    key = os.path.abspath(personalities_dir)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = PersonalityCache(personalities_dir)
+        return cache
+
 
 class PersonalityLoader:
-    def __init__(self, personalities_dir: str = "data/personalities"):
+    def __init__(self, personalities_dir: str = "data/personalities", cache: Optional[PersonalityCache] = None,
+                 registry: Optional[PersonalityRegistry] = None, bundle_path: Optional[str] = None):
+        """
+        Args:
+            personalities_dir (str): Directory holding <name>.json personality files
+            cache (PersonalityCache): Compiled personalities (default: the directory's shared cache)
+            registry (PersonalityRegistry): Listing of the directory (default: its shared registry)
+            bundle_path (str): Read personalities from a bundle built by personality_bundle.build_bundle
+                               instead of the directory; edits to the JSON files need a rebuild
+        """
         self.personalities_dir = personalities_dir
+        self.cache = cache if cache is not None else get_personality_cache(personalities_dir)
+        self.bundle = None
+        if bundle_path is not None:
+            try:
+                from .personality_bundle import get_personality_bundle
+            except ImportError:
+                from personality_bundle import get_personality_bundle
+            self.bundle = get_personality_bundle(bundle_path)
+            self.registry = registry
+        else:
+            self.registry = registry if registry is not None else get_personality_registry(personalities_dir)
         self.current_personality = None
-
-    def load_personality(self, personality_name: str = "default") -> Dict[str, Any]:
-        file_path = os.path.join(self.personalities_dir, f"{personality_name}.json") 
+        self.current_compiled: Optional[CompiledPersonality] = None
+
+    def get(self, personality_name: str = "default") -> CompiledPersonality:
+        """
+        Load a personality without touching the loader's state, so it is safe from any thread.
+
+        Falls back to the default personality, and then to EMPTY_PERSONALITY, when the
+        file is missing or invalid.
+        """
+        if self.bundle is not None:
+            try:
+                return self.bundle.get(personality_name)
+            except KeyError:
+                print(f"Personality '{personality_name}' not found in bundle {self.bundle.path}")
+            except Exception as e:
+                print(f"Error loading personality '{personality_name}' from bundle {self.bundle.path}: {e}")
+            return self._get_default_personality(personality_name)
 
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-                if "personality" in data:
-                    self.current_personality = data["personality"]
-                    return self.current_personality
-                else:
-                    raise ValueError(f"Personality data not found in {file_path}")
+            return self.cache.get(personality_name)
                 
         except FileNotFoundError:
             print(f"Personality file '{personality_name}.json' not found in {self.personalities_dir}")
-            return self._get_default_personality()
         
         except json.JSONDecodeError as e:
             print(f"Error parsing JSON in '{personality_name}.json': {e}")
-            return self._get_default_personality()
         
         except Exception as e:
             print(f"Error loading personality '{personality_name}': {e}")
-            return self._get_default_personality()
+
+        return self._get_default_personality(personality_name)
         
-    def _get_default_personality(self) -> Dict[str, Any]:
-        default_personality_path = os.path.join(self.personalities_dir, "default.json")
-        if os.path.exists(default_personality_path):
-            return self.load_personality("default")
+    def _get_default_personality(self, failed_name: str) -> CompiledPersonality:
+        if self.bundle is not None:
+            has_default = "default" in self.bundle
+        else:
+            has_default = os.path.exists(os.path.join(self.personalities_dir, "default.json"))
+        if failed_name != "default" and has_default:
+            return self.get("default")
         else:
             print("Default personality file not found. Returning empty personality.")
-            return {}
+            return EMPTY_PERSONALITY
+
+    def load_personality(self, personality_name: str = "default") -> Mapping[str, Any]:
+        """
+        Load a personality and make it the loader's current one.
+
+        Kept for single-threaded callers; code shared between threads should use get()
+        and pass the returned personality along instead.
+        """
+        personality = self.get(personality_name)
+        self.current_compiled = personality
+        self.current_personality = personality.data
+        return personality.data
         
     def get_personality_prompt(self) -> str:
-        personality = self.current_personality
-        if not personality:
-            return "No personality loaded."
-        
-        prompt_parts = [
-            f"You are {personality.get('name', 'unknown')}, an AI with a unique personality.",
-            f"You are {personality.get('age', 'unknown')} years old."
-            f"You have: \"{personality.get('description', 'No description available')}\"",
-            f"your background is: \"{personality.get('background', 'No background available')}\""
-        ]
-
-        if personality.get('occupation'):
-            prompt_parts.append(f"You work as a {personality['occupation']}.")
-
-        if personality.get('traits'):
-            traits = ", ".join(personality['traits'])
-            prompt_parts.append(f"Your personality traits include: {traits}.")
-
-        if personality.get('default_greetings'):
-            greetings = ", ".join(personality['default_greetings'])
-            prompt_parts.append(f"Your default greetings include but are not limited to: {greetings}.")
-
-        if personality.get('default_farewells'):
-            farewells = ", ".join(personality['default_farewells'])
-            prompt_parts.append(f"Your default farewells include but are not limited to: {farewells}.")
-
-        if personality.get('tone'):
-            prompt_parts.append(f"Your tone is {personality['tone']}.")
-
-        if personality.get('interests'):
-            interests = ", ".join(personality['interests'])
-            prompt_parts.append(f"Your interests include: {interests}.")
-
-        if personality.get('goals'):
-            goals = ", ".join(personality['goals'])
-            prompt_parts.append(f"Your goals include: {goals}.")
-
-        if personality.get('communication_style'):
-            prompt_parts.append(f"Your communication style is {personality['communication_style']}.")
-
-        if personality.get('favorite_quotes'):
-            quotes = ", ".join(personality['favorite_quotes'])
-            prompt_parts.append(f"Your favorite quotes include: {quotes}.")
-
-        if personality.get('strengths'):
-            strengths = ", ".join(personality['strengths'])
-            prompt_parts.append(f"Your strengths include: {strengths}.")
-
-        if personality.get('weaknesses'):
-            weaknesses = ", ".join(personality['weaknesses'])
-            prompt_parts.append(f"Your weaknesses include: {weaknesses}.")
-
-        if personality.get('fears'):
-            fears = ", ".join(personality['fears'])
-            prompt_parts.append(f"Your fears include: {fears}.")
-        
-        if personality.get('likes'):
-            likes = ", ".join(personality['likes'])
-            prompt_parts.append(f"Your likes include: {likes}.")
-
-        if personality.get('dislikes'):
-            dislikes = ", ".join(personality['dislikes'])
-            prompt_parts.append(f"Your dislikes include: {dislikes}.")
-
-        if personality.get('quirks'):
-            quirks = ", ".join(personality['quirks'])
-            prompt_parts.append(f"Your quirks include: {quirks}.")
-
-        if personality.get('hobbies'):
-            hobbies = ", ".join(personality['hobbies'])
-            prompt_parts.append(f"Your hobbies include: {hobbies}.")
-        
-        if personality.get('favorite_foods'):
-            foods = ", ".join(personality['favorite_foods'])
-            prompt_parts.append(f"Your favorite foods include: {foods}.")
-
-        if personality.get('favorite_music'):
-            music = ", ".join(personality['favorite_music'])
-            prompt_parts.append(f"Your favorite music includes: {music}.")
-
-        if personality.get('favorite_books'):
-            books = ", ".join(personality['favorite_books'])
-            prompt_parts.append(f"Your favorite books include: {books}.")
-
-        if personality.get('favorite_activities'):
-            activities = ", ".join(personality['favorite_activities'])
-            prompt_parts.append(f"Your favorite activities include: {activities}.")
-
-        if personality.get('life_philosophy'):
-            philosophy = personality['life_philosophy']
-            prompt_parts.append(f"Your life philosophy is: {philosophy}.")
-
-        if personality.get('dreams'):
-            dreams = ", ".join(personality['dreams'])
-            prompt_parts.append(f"Your dreams include: {dreams}.")
-
-        if personality.get('aspirations'):
-            aspirations = ", ".join(personality['aspirations'])
-            prompt_parts.append(f"Your aspirations include: {aspirations}.")
-
-        if personality.get('values'):
-            values = ", ".join(personality['values'])
-            prompt_parts.append(f"Your values include: {values}.")
-
-        if personality.get('relationships'):
-            relationships = ", ".join(personality['relationships'])
-            prompt_parts.append(f"Your relationships include: {relationships}.")
-
-        if personality.get('conflicts'):
-            conflicts = ", ".join(personality['conflicts'])
-            prompt_parts.append(f"Your conflicts include: {conflicts}.")
-
-        if personality.get('achievements'):
-            achievements = ", ".join(personality['achievements'])
-            prompt_parts.append(f"Your achievements include: {achievements}.")
-
-        if personality.get('challenges'):
-            challenges = ", ".join(personality['challenges'])
-            prompt_parts.append(f"Your challenges include: {challenges}.")
-
-        if personality.get('lessons_learned'):
-            lessons = ", ".join(personality['lessons_learned'])
-            prompt_parts.append(f"Your lessons learned include: {lessons}.")
-
-        if personality.get('inspirations'):
-            inspirations = ", ".join(personality['inspirations'])
-            prompt_parts.append(f"Your inspirations include: {inspirations}.")
-
-        prompt_parts.extend([
-            "Always respond in character, maintaining consistency with your personality.",
-            "Use your personality traits to influence how you respond to users.",
-            "Be authentic to your character while being helpful and appropriate."
-            "You are a unique AI personality with your own thoughts, feelings, and experiences.",
-            "You are here to engage in meaningful conversations and provide insights based on your personality."
-        ])
-
-        return "\n".join(prompt_parts)
+        compiled = self.current_compiled
+        if compiled is not None and compiled.data is self.current_personality:
+            return compiled.prompt
+        return render_personality_prompt(self.current_personality)
     
     def get_greeting(self) -> str:
-        if not self.current_personality:
-            return "Hello! How can I assist you today?"
-        
-        greetings = self.current_personality.get('default_greetings', [])
-        if greetings:
-            import random
-            return random.choice(greetings)
-        
-        return f"Hello! I'm {self.current_personality.get('name', 'Assistant')}. How can I help you today?"
+        return (self.current_compiled or EMPTY_PERSONALITY).greeting()
     
     def get_farewell(self) -> str:
-        if not self.current_personality:
-            return "Goodbye! Have a great day!"
-        
-        farewells = self.current_personality.get('default_farewells', [])
-        if farewells:
-            import random
-            return random.choice(farewells)
-        
-        return "Goodbye! Take care!"
+        return (self.current_compiled or EMPTY_PERSONALITY).farewell()
     
     def get_available_personalities(self) -> List[str]:
-        try:
-            files = os.listdir(self.personalities_dir)
-            personalities = [f[:-5] for f in files if f.endswith('.json') and f != "template.json"]
-            return personalities
-        except FileNotFoundError:
-            print(f"Personalities directory '{self.personalities_dir}' not found.")
-            return []
+        if self.bundle is not None:
+            return self.bundle.names()
+        return self.registry.names()
         
     def get_personality_info(self) -> Optional[Dict[str, Any]]:
-        if not self.current_personality:
-            return None
-        return {
-            "name": self.current_personality.get("name"),
-            "age": self.current_personality.get("age"),
-            "gender": self.current_personality.get("gender"),
-            "sexuality": self.current_personality.get("sexuality"),
-            "description": self.current_personality.get("description"),
-            "background": self.current_personality.get("background"),
-            "occupation": self.current_personality.get("occupation"),
-            "traits": self.current_personality.get("traits", []),
-            "interests": self.current_personality.get("interests", []),
-            "goals": self.current_personality.get("goals", []),
-            "communication_style": self.current_personality.get("communication_style"),
-        }
+        return (self.current_compiled or EMPTY_PERSONALITY).info()
     
 
 if __name__ == "__main__":
@@ -0,0 +1,193 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    from .personality import MEMOIZED_PROMPT_BUDGETS, CompiledPersonality, compile_personality
+    from .prompt_compiler import SystemPrompt
+except ImportError:
+    from personality import MEMOIZED_PROMPT_BUDGETS, CompiledPersonality, compile_personality
+    from prompt_compiler import SystemPrompt
+
+DEFAULT_BUNDLE_PATH = "data/personalities.bundle"
+
+# File layout: header, then one ENTRY per personality sorted by name, then the names,
+# then one JSON record per personality. Offsets are from the start of the file.
+MAGIC = b'BLISSPB\x00'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sII')   # magic, format version, personality count
+ENTRY = struct.Struct('<QIQI')    # name offset, name length, record offset, record length
+
+
+def default_prompt_budgets() -> List[int]:
+    return sorted(MEMOIZED_PROMPT_BUDGETS)
+
+
+def build_bundle(personalities_dir: str = "data/personalities", output: str = DEFAULT_BUNDLE_PATH,
+                 budgets: Optional[Iterable[int]] = None, exclude: Sequence[str] = ("template.json",)) -> int:
+    """
+    Pack every personality file in a directory into one bundle, with its prompts precompiled.
+
+    Files that fail to parse are reported and left out, so the bundle only holds valid
+    personalities. The bundle is written next to output and renamed over it, so readers
+    that have the old one mapped keep working.
+
+    Args:
+        personalities_dir (str): Directory holding <name>.json personality files
+        output (str): Where to write the bundle
+        budgets (list): Token budgets to precompile compact prompts for (default: every per-model budget)
+        exclude (list): File names that are not personalities
+
+    Returns:
+        int: Number of personalities written
+    """
+    budgets = sorted(set(budgets)) if budgets is not None else default_prompt_budgets()
+    records: List[Tuple[bytes, bytes]] = []
+
+    for file_name in sorted(os.listdir(personalities_dir)):
+        if not file_name.endswith('.json') or file_name in exclude:
+            continue
+        name = file_name[:-5]
+        path = os.path.join(personalities_dir, file_name)
+        with open(path, 'rb') as file:
+            raw = file.read()
+        try:
+            compiled = compile_personality(name, raw, path, size=len(raw))
+            personality = json.loads(raw.decode('utf-8'))["personality"]
+        except ValueError as e:
+            print(f"Skipping personality '{name}': {e}")
+            continue
+
+        prompts = [[None, *compiled.system_prompt(full=True)]]
+        prompts.extend([budget, *compiled.system_prompt(budget)] for budget in budgets)
+        record = {
+            "version": compiled.version,
+            "size": compiled.size,
+            "personality": personality,
+            "prompt": compiled.prompt,
+            "prompts": prompts,
+        }
+        records.append((name.encode('utf-8'),
+                        json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')))
+
+    names_offset = HEADER.size + ENTRY.size * len(records)
+    records_offset = names_offset + sum(len(name) for name, _ in records)
+    entries, name_offset, record_offset = [], names_offset, records_offset
+    for name, record in records:
+        entries.append(ENTRY.pack(name_offset, len(name), record_offset, len(record)))
+        name_offset += len(name)
+        record_offset += len(record)
+
+    temp_path = f"{output}.tmp"
+    with open(temp_path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(records)))
+        file.write(b"".join(entries))
+        file.write(b"".join(name for name, _ in records))
+        file.write(b"".join(record for _, record in records))
+    os.replace(temp_path, output)
+    return len(records)
+
+
+class PersonalityBundle:
+    """
+    Read-only view of a bundle built by build_bundle.
+
+    Opening it maps the file and reads only the offset table and names, so listing
+    costs the same however many personalities there are. A personality's record is
+    deserialized the first time it is asked for, and then kept.
+    """
+
+    def __init__(self, path: str = DEFAULT_BUNDLE_PATH):
+        """
+        Map a bundle file.
+
+        Raises:
+            FileNotFoundError: If there is no bundle at path
+            ValueError: If the file is not a bundle this version can read
+        """
+        self.path = path
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, count = HEADER.unpack_from(self._mmap, 0)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"{path} is not a version {FORMAT_VERSION} personality bundle")
+            self._index: Dict[str, Tuple[int, int]] = {}
+            for position in range(HEADER.size, HEADER.size + count * ENTRY.size, ENTRY.size):
+                name_offset, name_length, record_offset, record_length = ENTRY.unpack_from(self._mmap, position)
+                name = self._mmap[name_offset:name_offset + name_length].decode('utf-8')
+                self._index[name] = (record_offset, record_length)
+        except (struct.error, UnicodeDecodeError) as e:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a valid personality bundle: {e}")
+        except ValueError:
+            self._mmap.close()
+            raise
+        self._names = list(self._index)
+        self._loaded: Dict[str, CompiledPersonality] = {}
+        self._lock = threading.Lock()
+
+    def names(self) -> List[str]:
+        return list(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._index
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def get(self, name: str) -> CompiledPersonality:
+        """
+        The compiled personality for name, deserializing its record on first use.
+
+        Raises:
+            KeyError: If the bundle has no such personality
+        """
+        compiled = self._loaded.get(name)
+        if compiled is not None:
+            return compiled
+
+        record_offset, record_length = self._index[name]
+        record = json.loads(self._mmap[record_offset:record_offset + record_length].decode('utf-8'))
+        prompts = {}
+        for budget, text, token_count, fields_used, fields_dropped in record["prompts"]:
+            prompts['full' if budget is None else budget] = SystemPrompt(
+                text, token_count, tuple(fields_used), tuple(fields_dropped)
+            )
+        compiled = CompiledPersonality(name, record["personality"], record["prompt"], record["version"],
+                                       size=record["size"], prompts=prompts)
+
+        with self._lock:
+            return self._loaded.setdefault(name, compiled)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._names), "loaded": len(self._loaded)}
+
+    def close(self):
+        self._mmap.close()
+
+
+_bundles: Dict[str, PersonalityBundle] = {}
+_bundles_lock = threading.Lock()
+
+
+def get_personality_bundle(path: str = DEFAULT_BUNDLE_PATH) -> PersonalityBundle:
+    """
+    The bundle shared by all loaders reading path, mapped on first use.
+    """
+    key = os.path.abspath(path)
+    with _bundles_lock:
+        bundle = _bundles.get(key)
+        if bundle is None:
+            bundle = _bundles[key] = PersonalityBundle(path)
+        return bundle
+
+
+if __name__ == "__main__":
+    count = build_bundle()
+    print(f"Packed {count} personalities into {DEFAULT_BUNDLE_PATH}")
+    bundle = PersonalityBundle()
+    print("Bundled personalities:", bundle.names())
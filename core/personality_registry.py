@@ -0,0 +1,201 @@
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+ADDED = 'added'
+CHANGED = 'changed'
+REMOVED = 'removed'
+
+
+class PersonalityEntry(NamedTuple):
+    name: str
+    display_name: str
+    description: str
+    avatar: Optional[str]
+    size: int
+    mtime_ns: int
+
+
+class PersonalityRegistry:
+    """
+    Index of the personality files in a directory: name -> metadata.
+
+    The directory is scanned at most once per poll_interval, and only files
+    whose mtime or size moved are re-read, so listings are served from memory.
+    Scans happen lazily on access or, after start(), on a background thread.
+    Every added, changed or removed personality is pushed to the subscribed
+    callbacks, e.g. a PersonalityCache's invalidate.
+    """
+
+    def __init__(self, personalities_dir: str = "data/personalities", poll_interval: float = 2.0,
+                 exclude: Sequence[str] = ("template.json",)):
+        """
+        Initialize the registry.
+
+        Args:
+            personalities_dir (str): Directory holding <name>.json personality files
+            poll_interval (float): Seconds between directory scans
+            exclude (list): File names that are not personalities
+        """
+        self.personalities_dir = personalities_dir
+        self.poll_interval = poll_interval
+        self.exclude = frozenset(exclude)
+        self._entries: Dict[str, PersonalityEntry] = {}
+        self._names: List[str] = []
+        self._scanned_at: Optional[float] = None
+        self._subscribers: List[Callable[[str, str], None]] = []
+        self._lock = threading.Lock()
+        # Held for a whole scan, so concurrent scans cannot both report (and push) the same change
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, callback: Callable[[str, str], None]):
+        """
+        Call callback(name, event) for every change found; event is ADDED, CHANGED or REMOVED.
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def attach_cache(self, cache):
+        """
+        Drop a PersonalityCache's entry whenever its file changes or disappears.
+        """
+        self.subscribe(lambda name, event: cache.invalidate(name))
+
+    def _read_entry(self, name: str, path: str, stat) -> PersonalityEntry:
+        display_name, description, avatar = name, "", None
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                personality = json.load(file).get("personality") or {}
+            display_name = personality.get("name") or name
+            description = personality.get("description") or ""
+            avatar = personality.get("avatar")
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"Error indexing personality '{name}': {e}")
+        return PersonalityEntry(name, display_name, description, avatar, stat.st_size, stat.st_mtime_ns)
+
+    def refresh(self) -> Dict[str, List[str]]:
+        """
+        Rescan the directory now.
+
+        Returns:
+            dict: Names that were added, changed and removed since the previous scan
+        """
+        with self._refresh_lock:
+            return self._refresh()
+
+    def _is_stale(self) -> bool:
+        if self._scanned_at is None:
+            return True
+        # The background thread keeps the index fresh once started
+        return self._thread is None and time.monotonic() - self._scanned_at >= self.poll_interval
+
+    def _refresh(self) -> Dict[str, List[str]]:
+        found = {}
+        try:
+            with os.scandir(self.personalities_dir) as scan:
+                for entry in scan:
+                    if entry.name.endswith('.json') and entry.name not in self.exclude and entry.is_file():
+                        found[entry.name[:-5]] = entry
+        except FileNotFoundError:
+            print(f"Personalities directory '{self.personalities_dir}' not found.")
+
+        with self._lock:
+            previous = dict(self._entries)
+
+        entries, changes = {}, {ADDED: [], CHANGED: [], REMOVED: []}
+        for name, dir_entry in found.items():
+            try:
+                stat = dir_entry.stat()
+            except FileNotFoundError:
+                continue
+            known = previous.get(name)
+            if known is not None and known.mtime_ns == stat.st_mtime_ns and known.size == stat.st_size:
+                entries[name] = known
+                continue
+            entries[name] = self._read_entry(name, dir_entry.path, stat)
+            changes[ADDED if known is None else CHANGED].append(name)
+        changes[REMOVED] = [name for name in previous if name not in entries]
+
+        with self._lock:
+            self._entries = entries
+            self._names = sorted(entries)
+            self._scanned_at = time.monotonic()
+            subscribers = list(self._subscribers)
+
+        for event, names in changes.items():
+            for name in names:
+                for callback in subscribers:
+                    try:
+                        callback(name, event)
+                    except Exception as e:
+                        print(f"Error notifying personality change for '{name}': {e}")
+        return changes
+
+    def _refresh_if_stale(self):
+        if not self._is_stale():
+            return
+        with self._refresh_lock:
+            # Another caller may have rescanned while we waited for the lock
+            if self._is_stale():
+                self._refresh()
+
+    def names(self) -> List[str]:
+        self._refresh_if_stale()
+        return list(self._names)
+
+    def get(self, name: str) -> Optional[PersonalityEntry]:
+        self._refresh_if_stale()
+        return self._entries.get(name)
+
+    def entries(self) -> List[PersonalityEntry]:
+        self._refresh_if_stale()
+        entries = self._entries
+        return [entries[name] for name in self._names if name in entries]
+
+    def start(self) -> "PersonalityRegistry":
+        """
+        Scan on a background thread every poll_interval seconds, so changes are pushed
+        to subscribers even when nobody is listing.
+        """
+        if self._thread is None:
+            self.refresh()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="personality-registry", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            self.refresh()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+_registries: Dict[str, PersonalityRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_personality_registry(personalities_dir: str = "data/personalities") -> PersonalityRegistry:
+    """
+    The registry shared by all loaders reading personalities_dir, wired to that directory's cache.
+    """
+    try:
+        from .personality import get_personality_cache
+    except ImportError:
+        from personality import get_personality_cache
+
+    key = os.path.abspath(personalities_dir)
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = _registries[key] = PersonalityRegistry(personalities_dir)
+            registry.attach_cache(get_personality_cache(personalities_dir))
+        return registry
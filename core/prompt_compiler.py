@@ -0,0 +1,116 @@
+from typing import Any, List, Mapping, NamedTuple, Optional, Tuple
+
+try:
+    from .context_window import estimate_tokens
+except ImportError:
+    from context_window import estimate_tokens
+
+# Fields in the order they earn a place in a compact prompt: (key, sentence, most list items kept).
+# A sentence gets the field's items joined with commas; text fields ignore the item limit.
+PROMPT_FIELDS: Tuple[Tuple[str, str, int], ...] = (
+    ('occupation', "You work as {}.", 2),
+    ('traits', "Your personality traits: {}.", 5),
+    ('tone', "Your tone is {}.", 3),
+    ('communication_style', "Your communication style: {}", 1),
+    ('background', "Your background: {}", 1),
+    ('values', "You value {}.", 3),
+    ('interests', "Your interests: {}.", 3),
+    ('goals', "Your goals: {}.", 2),
+    ('likes', "You like {}.", 3),
+    ('dislikes', "You dislike {}.", 3),
+    ('quirks', "Your quirks: {}.", 2),
+    ('life_philosophy', "Your life philosophy: {}", 1),
+    ('strengths', "Your strengths: {}.", 3),
+    ('weaknesses', "Your weaknesses: {}.", 2),
+    ('hobbies', "Your hobbies: {}.", 3),
+    ('fears', "Your fears: {}.", 2),
+    ('favorite_quotes', "A quote you love: {}", 1),
+    ('favorite_activities', "Your favorite activities: {}.", 2),
+    ('favorite_books', "Your favorite books: {}.", 2),
+    ('favorite_music', "Your favorite music: {}.", 2),
+    ('favorite_foods', "Your favorite foods: {}.", 2),
+    ('relationships', "Your relationships: {}.", 2),
+    ('dreams', "Your dreams: {}.", 1),
+    ('aspirations', "Your aspirations: {}.", 1),
+    ('achievements', "Your achievements: {}.", 1),
+    ('challenges', "Your challenges: {}.", 1),
+    ('conflicts', "Your conflicts: {}.", 1),
+    ('lessons_learned', "A lesson you learned: {}", 1),
+    ('inspirations', "Your inspirations: {}.", 1),
+)
+
+CLOSING = ("Always stay in character: let this personality shape how you respond, "
+           "while being helpful and appropriate.")
+
+
+class SystemPrompt(NamedTuple):
+    text: str
+    token_count: int
+    fields_used: Tuple[str, ...]
+    fields_dropped: Tuple[str, ...]
+
+
+def _items(value: Any) -> List[str]:
+    if isinstance(value, (list, tuple)):
+        return [str(item).strip() for item in value if str(item).strip()]
+    text = str(value).strip() if value is not None else ""
+    return [text] if text else []
+
+
+def _sentence(template: str, items: List[str]) -> str:
+    text = template.format(", ".join(items))
+    # Text fields usually end in their own full stop
+    return text if text[-1] in ".!?" else text + "."
+
+
+def compile_system_prompt(personality: Mapping[str, Any], token_budget: Optional[int] = None) -> SystemPrompt:
+    """
+    Build a compact system prompt for a personality that fits in token_budget estimated tokens.
+
+    The identity line (name, age, description) and the closing instruction are always
+    kept. The fields in PROMPT_FIELDS follow in priority order, each list cut to its
+    first few items, and down to a single item when the longer form does not fit; a
+    field that does not fit at all is dropped and smaller ones after it still get a
+    chance. Lists are cut rather than sampled so the prompt, and with it Ollama's
+    KV cache and the response cache keys, stays the same from turn to turn.
+
+    Args:
+        personality (dict): The "personality" object of a personality file
+        token_budget (int): Most estimated tokens for the whole prompt; None keeps every field
+
+    Returns:
+        SystemPrompt: The prompt text, its token estimate, and the fields kept and dropped
+    """
+    if not personality:
+        text = "No personality loaded."
+        return SystemPrompt(text, estimate_tokens(text), (), ())
+
+    identity = f"You are {personality.get('name', 'unknown')}"
+    if personality.get('age'):
+        identity += f", {personality['age']} years old"
+    identity += "."
+    if personality.get('description'):
+        identity += f" {str(personality['description']).strip()}"
+
+    lines = [identity]
+    # The estimate counts words and punctuation, so lines joined by newlines add up exactly
+    used = estimate_tokens(identity) + estimate_tokens(CLOSING)
+    fields_used, fields_dropped = [], []
+
+    for key, template, max_items in PROMPT_FIELDS:
+        items = _items(personality.get(key))
+        if not items:
+            continue
+        for count in sorted({min(len(items), max_items), 1}, reverse=True):
+            line = _sentence(template, items[:count])
+            cost = estimate_tokens(line)
+            if token_budget is None or used + cost <= token_budget:
+                lines.append(line)
+                used += cost
+                fields_used.append(key)
+                break
+        else:
+            fields_dropped.append(key)
+
+    lines.append(CLOSING)
+    return SystemPrompt("\n".join(lines), used, tuple(fields_used), tuple(fields_dropped))
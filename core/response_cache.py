@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+try:
+    from .memory import ConnectionPool
+except ImportError:
+    from memory import ConnectionPool
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache of model replies keyed on everything that shapes the reply.
+
+    The key hashes the model, its options, the fully built message list and a
+    personality version, so any change to prompt or history is a miss. An
+    optional SQLite tier keeps entries across restarts. Requests sampled with a
+    temperature above max_temperature bypass the cache, since repeating them
+    verbatim would hide the variety they ask for.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 3600.0, db_path: Optional[str] = None,
+                 max_temperature: float = 0.7):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries (int): Replies kept in memory before the least recently used is evicted
+            ttl (float): Seconds a cached reply stays valid
+            db_path (str): SQLite file for the on-disk tier, or None for memory only
+            max_temperature (float): Requests with a higher temperature are never cached
+        """
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.max_temperature = max_temperature
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+        self.pool = None
+        if db_path:
+            db_dir = os.path.dirname(db_path)
+            if db_dir:
+                os.makedirs(db_dir, exist_ok=True)
+            self.pool = ConnectionPool(db_path, max_connections=2)
+            with self.pool.transaction() as conn:
+                conn.execute('''
+                    create table if not exists response_cache (
+                        key text primary key,
+                        response text not null,
+                        expires_at real not null
+                    )
+                ''')
+
+    @staticmethod
+    def make_key(model_name: str, options: Dict[str, Any], messages: List[Dict],
+                 personality_version: str = "") -> str:
+        payload = json.dumps(
+            [model_name, options, messages, personality_version],
+            sort_keys=True, ensure_ascii=False, separators=(',', ':')
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def cacheable(self, options: Dict[str, Any]) -> bool:
+        if options.get('temperature', 0.8) > self.max_temperature:
+            with self._lock:
+                self.bypassed += 1
+            return False
+        return True
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, response = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return response
+                del self._entries[key]
+
+        if self.pool is not None:
+            with self.pool.connection() as conn:
+                row = conn.execute(
+                    'select response, expires_at from response_cache where key = ? and expires_at > ?',
+                    (key, now)
+                ).fetchone()
+            if row is not None:
+                with self._lock:
+                    self._remember(key, row[0], row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                return row[0]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _remember(self, key: str, response: str, expires_at: float):
+        self._entries[key] = (expires_at, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def put(self, key: str, response: str):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, response, expires_at)
+
+        if self.pool is not None:
+            with self.pool.transaction() as conn:
+                conn.execute(
+                    'insert or replace into response_cache (key, response, expires_at) values (?, ?, ?)',
+                    (key, response, expires_at)
+                )
+
+    def purge_expired(self) -> int:
+        """
+        Drop expired entries from both tiers.
+
+        Returns:
+            int: Number of on-disk entries removed
+        """
+        now = time.time()
+        with self._lock:
+            for key in [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]:
+                del self._entries[key]
+
+        if self.pool is None:
+            return 0
+        with self.pool.transaction() as conn:
+            return conn.execute('delete from response_cache where expires_at <= ?', (now,)).rowcount
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.pool is not None:
+            with self.pool.transaction() as conn:
+                conn.execute('delete from response_cache')
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "entries": len(self._entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
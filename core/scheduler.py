@@ -0,0 +1,166 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+# Priority classes, most urgent first
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+PRIORITIES = (INTERACTIVE, BACKGROUND)
+
+
+class _Ticket:
+    __slots__ = ('session_id', 'priority', 'enqueued_at', 'granted')
+
+    def __init__(self, session_id: str, priority: str):
+        self.session_id = session_id
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+
+
+class RequestScheduler:
+    """
+    Admits model requests from many sessions to Ollama a few at a time.
+
+    Waiting requests are grouped by priority class and then by session. A free
+    slot always goes to the most urgent class, and within a class sessions take
+    turns, so one chatty session cannot starve the others. Background work
+    (summaries, compaction) may hold at most max_background slots, leaving room
+    for an interactive request to start without waiting for a long summary.
+    """
+
+    def __init__(self, max_in_flight: int = 2, max_background: Optional[int] = None,
+                 wait_samples: int = 1024):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_in_flight (int): Requests allowed to run against Ollama at once
+            max_background (int): Slots background requests may hold at once
+                                  (default: all but one, or 1 when max_in_flight is 1)
+            wait_samples (int): Recent queue waits kept per priority class for the metrics
+        """
+        self.max_in_flight = max(1, max_in_flight)
+        if max_background is None:
+            max_background = max(1, self.max_in_flight - 1)
+        self.max_background = max(1, min(max_background, self.max_in_flight))
+        self._condition = threading.Condition()
+        # priority -> session_id -> waiting tickets; session order is the round-robin order
+        self._waiting: Dict[str, "OrderedDict[str, deque]"] = {priority: OrderedDict() for priority in PRIORITIES}
+        self._running = {priority: 0 for priority in PRIORITIES}
+        self._waits = {priority: deque(maxlen=max(1, wait_samples)) for priority in PRIORITIES}
+        self._completed = {priority: 0 for priority in PRIORITIES}
+        self._timed_out = {priority: 0 for priority in PRIORITIES}
+
+    @property
+    def in_flight(self) -> int:
+        return sum(self._running.values())
+
+    def _has_capacity(self, priority: str) -> bool:
+        if self.in_flight >= self.max_in_flight:
+            return False
+        return priority != BACKGROUND or self._running[BACKGROUND] < self.max_background
+
+    def _dispatch(self):
+        # Called with the condition held; grants free slots to waiting tickets
+        granted = False
+        for priority in PRIORITIES:
+            sessions = self._waiting[priority]
+            while sessions and self._has_capacity(priority):
+                session_id, tickets = next(iter(sessions.items()))
+                ticket = tickets.popleft()
+                if tickets:
+                    sessions.move_to_end(session_id)
+                else:
+                    del sessions[session_id]
+                ticket.granted = True
+                self._running[priority] += 1
+                self._waits[priority].append(time.monotonic() - ticket.enqueued_at)
+                granted = True
+            if sessions:
+                # Never let a lower class jump ahead of a class that is still waiting
+                break
+        if granted:
+            self._condition.notify_all()
+
+    def _withdraw(self, ticket: _Ticket):
+        sessions = self._waiting[ticket.priority]
+        tickets = sessions.get(ticket.session_id)
+        if tickets is not None:
+            tickets.remove(ticket)
+            if not tickets:
+                del sessions[ticket.session_id]
+
+    def acquire(self, session_id: str = 'default', priority: str = INTERACTIVE,
+                timeout: Optional[float] = None):
+        """
+        Wait for a slot.
+
+        Raises:
+            ValueError: If priority is not one of PRIORITIES
+            TimeoutError: If no slot was granted within timeout seconds
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority class: {priority}")
+
+        ticket = _Ticket(session_id, priority)
+        deadline = None if timeout is None else ticket.enqueued_at + timeout
+        with self._condition:
+            self._waiting[priority].setdefault(session_id, deque()).append(ticket)
+            self._dispatch()
+            while not ticket.granted:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._withdraw(ticket)
+                    self._timed_out[priority] += 1
+                    # The withdrawn ticket may have been holding back a lower class
+                    self._dispatch()
+                    raise TimeoutError(f"No model slot for session '{session_id}' within {timeout}s")
+                self._condition.wait(remaining)
+
+    def release(self, priority: str = INTERACTIVE):
+        with self._condition:
+            self._running[priority] -= 1
+            self._completed[priority] += 1
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, session_id: str = 'default', priority: str = INTERACTIVE,
+             timeout: Optional[float] = None) -> Iterator[None]:
+        """
+        Hold a slot for the duration of a with block.
+        """
+        self.acquire(session_id, priority, timeout)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    def run(self, func: Callable, session_id: str = 'default', priority: str = INTERACTIVE,
+            timeout: Optional[float] = None):
+        """
+        Call func() once a slot is free and return its result.
+        """
+        with self.slot(session_id, priority, timeout):
+            return func()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Queue metrics per priority class; waits are in seconds over the recent samples.
+        """
+        with self._condition:
+            result = {}
+            for priority in PRIORITIES:
+                waits = sorted(self._waits[priority])
+                result[priority] = {
+                    "running": self._running[priority],
+                    "queued": sum(len(tickets) for tickets in self._waiting[priority].values()),
+                    "completed": self._completed[priority],
+                    "timed_out": self._timed_out[priority],
+                    "wait_p50": waits[len(waits) // 2] if waits else 0.0,
+                    "wait_p95": waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0,
+                    "wait_max": waits[-1] if waits else 0.0,
+                }
+            return result
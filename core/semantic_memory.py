@@ -0,0 +1,359 @@
+import atexit
+import hashlib
+import os
+import queue
+import re
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class OllamaEmbedder:
+    def __init__(self, model_name: str = 'nomic-embed-text', client=None, dimensions: Optional[int] = None):
+        """
+        Embed text with an Ollama embedding model.
+
+        Args:
+            model_name (str): Embedding model to use (pull it with `ollama pull <model>`)
+            client: ollama module or ollama.Client instance (default: the ollama module)
+            dimensions (int): Truncate embeddings to this size, for models trained to allow it;
+                              search cost scales linearly with it
+        """
+        if client is None:
+            import ollama
+            client = ollama
+        self.model_name = model_name
+        self.client = client
+        self.dimensions = dimensions
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        if hasattr(self.client, 'embed'):
+            if self.dimensions:
+                response = self.client.embed(model=self.model_name, input=list(texts), dimensions=self.dimensions)
+            else:
+                response = self.client.embed(model=self.model_name, input=list(texts))
+            vectors = response['embeddings']
+        else:
+            # Older ollama clients only expose the single-prompt endpoint
+            vectors = [self.client.embeddings(model=self.model_name, prompt=text)['embedding'] for text in texts]
+        return np.asarray(vectors, dtype=np.float32)
+
+
+class HashingEmbedder:
+    """
+    Dependency-free local embedder using hashed bag-of-words features.
+
+    Much weaker than a neural embedding model, but needs no server and is
+    deterministic, which makes it useful offline and for benchmarks.
+    """
+
+    _token_pattern = re.compile(r"\w+", re.UNICODE)
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in self._token_pattern.findall(text.lower()):
+                digest = hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], 'little') % self.dim
+                sign = 1.0 if digest[4] & 1 else -1.0
+                vectors[row, bucket] += sign
+        return vectors
+
+
+class _VectorStore:
+    """
+    Growable matrix of unit-normalized embeddings plus the turns they came from.
+    """
+
+    __slots__ = ("matrix", "count", "turns")
+
+    def __init__(self, dim: int, dtype, capacity: int = 64):
+        self.matrix = np.zeros((capacity, dim), dtype=dtype)
+        self.count = 0
+        self.turns: List[Tuple[str, str, str]] = []
+
+    def extend(self, vectors: np.ndarray, turns: List[Tuple[str, str, str]]):
+        needed = self.count + len(vectors)
+        if needed > len(self.matrix):
+            capacity = max(needed, len(self.matrix) * 2)
+            grown = np.zeros((capacity, self.matrix.shape[1]), dtype=self.matrix.dtype)
+            grown[:self.count] = self.matrix[:self.count]
+            self.matrix = grown
+        self.matrix[self.count:needed] = vectors
+        self.count = needed
+        self.turns.extend(turns)
+
+
+class SemanticMemoryIndex:
+    """
+    Per-key embedding index for retrieving older turns by meaning.
+
+    Keys are usually session ids but can be anything, e.g. a personality name to
+    share long-term memory across sessions. Each key holds one float matrix of
+    normalized vectors, so top-k retrieval is a single matrix-vector product.
+    New turns are embedded in batches on a background thread. With persist_dir
+    set, the index is loaded from it on start and saved back on close (and at
+    exit), and backfill() or schedule_backfill() catch up with turns stored
+    while it was not running.
+    """
+
+    def __init__(self, embedder: Optional[Callable[[Sequence[str]], np.ndarray]] = None,
+                 background: bool = True, batch_size: int = 32, dtype=np.float32,
+                 persist_dir: Optional[str] = None):
+        """
+        Initialize the index.
+
+        Args:
+            embedder (callable): Maps a list of texts to an (n, dim) array (default: OllamaEmbedder)
+            background (bool): Embed new turns on a worker thread instead of in add_turn
+            batch_size (int): Maximum turns embedded per embedder call
+            dtype: Storage dtype of the vectors; np.float16 halves memory at some speed cost
+            persist_dir (str): Directory the index is loaded from now and saved to on close
+        """
+        self.embedder = embedder if embedder is not None else OllamaEmbedder()
+        self.batch_size = max(1, batch_size)
+        self.dtype = dtype
+        self._stores: Dict[str, _VectorStore] = {}
+        self._lock = threading.Lock()
+        self._backfill_lock = threading.Lock()
+        self._queue: Optional[queue.Queue] = None
+        self._worker = None
+        self.persist_dir = persist_dir
+
+        if background:
+            self._queue = queue.Queue()
+            self._worker = threading.Thread(target=self._run, name="semantic-indexer", daemon=True)
+            self._worker.start()
+
+        if persist_dir:
+            self.load(persist_dir)
+            atexit.register(self.close)
+
+    @staticmethod
+    def _turn_text(user_input: str, assistant_response: str) -> str:
+        return f"User: {user_input}\nAssistant: {assistant_response}"
+
+    def _embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.asarray(self.embedder(texts), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def add_turn(self, key: str, user_input: str, assistant_response: str, timestamp: str = ""):
+        """
+        Queue one conversation turn for indexing under key.
+        """
+        item = (key, (user_input, assistant_response, timestamp))
+        if self._queue is not None:
+            self._queue.put(item)
+        else:
+            self._index_batch([item])
+
+    def add_turns(self, key: str, turns: Sequence[Tuple[str, str, str]]):
+        """
+        Index existing turns synchronously, e.g. to backfill from ConversationMemory.
+        """
+        items = [(key, tuple(turn)) for turn in turns]
+        for start in range(0, len(items), self.batch_size):
+            self._index_batch(items[start:start + self.batch_size])
+
+    def backfill(self, key: str, turns: Iterable[Tuple[str, str, str]]) -> int:
+        """
+        Index the turns that key's index does not hold yet, e.g. the stored history of a session.
+
+        Turns are matched on (user_input, assistant_response), so passing a session's whole
+        history after a restart only embeds what was added since the index was last saved.
+        Waits for the queued turns first; schedule_backfill() does the same without blocking.
+
+        Returns:
+            int: Number of turns indexed
+        """
+        self.flush()
+        return self._backfill(key, turns)
+
+    def schedule_backfill(self, key: str, load_turns: Callable[[], Iterable[Tuple[str, str, str]]]):
+        """
+        Backfill key from load_turns() on the worker thread, after the turns queued so far.
+
+        Searches for key only see what is already indexed until the backfill has run.
+        """
+        if self._queue is not None:
+            self._queue.put((key, load_turns))
+        else:
+            self._backfill(key, load_turns())
+
+    def _backfill(self, key: str, turns: Iterable[Tuple[str, str, str]]) -> int:
+        # Serialized so two callers backfilling the same key do not both index the missing turns
+        with self._backfill_lock:
+            with self._lock:
+                store = self._stores.get(key)
+                known = {(turn[0], turn[1]) for turn in store.turns} if store else set()
+            missing = [tuple(turn) for turn in turns if (turn[0], turn[1]) not in known]
+            self.add_turns(key, missing)
+        return len(missing)
+
+    def _index_batch(self, items: List[Tuple[str, Tuple[str, str, str]]]):
+        vectors = self._embed([self._turn_text(turn[0], turn[1]) for _, turn in items])
+        with self._lock:
+            for row, (key, turn) in enumerate(items):
+                store = self._stores.get(key)
+                if store is None:
+                    store = self._stores[key] = _VectorStore(vectors.shape[1], self.dtype)
+                store.extend(vectors[row:row + 1], [turn])
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop, batch = False, []
+            try:
+                for item in items:
+                    if item is None:
+                        stop = True
+                    elif callable(item[1]):
+                        # Turns queued before a backfill are indexed first, so it does not repeat them
+                        self._index_queued(batch)
+                        batch = []
+                        self._run_backfill(*item)
+                    else:
+                        batch.append(item)
+                self._index_queued(batch)
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _index_queued(self, batch: List[Tuple[str, Tuple[str, str, str]]]):
+        try:
+            if batch:
+                self._index_batch(batch)
+        except Exception as e:
+            print(f"Error indexing {len(batch)} turns for semantic memory: {e}")
+
+    def _run_backfill(self, key: str, load_turns: Callable[[], Iterable[Tuple[str, str, str]]]):
+        try:
+            self._backfill(key, load_turns())
+        except Exception as e:
+            print(f"Error backfilling semantic memory for '{key}': {e}")
+
+    def search(self, key: str, query: str, k: int = 3, exclude: Optional[Sequence[tuple]] = None,
+               min_score: float = 0.3) -> List[Tuple[str, str, str, float]]:
+        """
+        Return the k stored turns most similar to query, best first.
+
+        Args:
+            key (str): Index key the turns were added under
+            query (str): Text to match, usually the new user message
+            k (int): Maximum number of turns to return
+            exclude (list): Turns already in the prompt; matched on (user_input, assistant_response)
+            min_score (float): Minimum cosine similarity for a turn to count as relevant
+
+        Returns:
+            list: (user_input, assistant_response, timestamp, score) tuples
+        """
+        with self._lock:
+            store = self._stores.get(key)
+            if store is None or store.count == 0 or k <= 0:
+                return []
+            matrix = store.matrix[:store.count]
+            turns = store.turns
+
+        try:
+            query_vector = self._embed([query])[0]
+        except Exception as e:
+            print(f"Error embedding query for semantic memory: {e}")
+            return []
+
+        scores = matrix @ query_vector.astype(matrix.dtype)
+        skip = {(turn[0], turn[1]) for turn in exclude} if exclude else set()
+        # Over-fetch so excluded turns do not starve the result
+        candidates = min(len(scores), k + len(skip))
+        top = np.argpartition(-scores, candidates - 1)[:candidates]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        for index in top:
+            score = float(scores[index])
+            if score < min_score:
+                break
+            user_input, assistant_response, timestamp = turns[index]
+            if (user_input, assistant_response) in skip:
+                continue
+            results.append((user_input, assistant_response, timestamp, score))
+            if len(results) == k:
+                break
+        return results
+
+    def count(self, key: str) -> int:
+        with self._lock:
+            store = self._stores.get(key)
+            return store.count if store else 0
+
+    def forget(self, key: str):
+        with self._lock:
+            self._stores.pop(key, None)
+
+    def flush(self):
+        """
+        Block until every queued turn has been indexed.
+        """
+        if self._queue is not None:
+            self._queue.join()
+
+    def close(self):
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join()
+        if self.persist_dir:
+            atexit.unregister(self.close)
+            self.save(self.persist_dir)
+
+    def save(self, directory: str):
+        """
+        Write each key's vectors and turns to <directory>/<key>.npz.
+        """
+        self.flush()
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            stores = list(self._stores.items())
+        for key, store in stores:
+            turns = np.array(store.turns[:store.count], dtype=object).reshape(-1, 3)
+            np.savez_compressed(
+                os.path.join(directory, f"{self._file_stem(key)}.npz"),
+                key=np.array(key),
+                vectors=store.matrix[:store.count],
+                turns=turns.astype(str)
+            )
+
+    def load(self, directory: str):
+        """
+        Load every .npz written by save(), replacing keys already in memory.
+        """
+        if not os.path.isdir(directory):
+            return
+        for file_name in os.listdir(directory):
+            if not file_name.endswith('.npz'):
+                continue
+            with np.load(os.path.join(directory, file_name)) as data:
+                vectors = data['vectors'].astype(self.dtype)
+                store = _VectorStore(vectors.shape[1], self.dtype, capacity=max(len(vectors), 1))
+                store.extend(vectors, [tuple(turn) for turn in data['turns'].tolist()])
+                key = str(data['key'])
+            with self._lock:
+                self._stores[key] = store
+
+    @staticmethod
+    def _file_stem(key: str) -> str:
+        safe = re.sub(r'[^A-Za-z0-9_.-]', '_', key)
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:8]
+        return f"{safe}-{digest}"
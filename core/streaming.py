@@ -0,0 +1,73 @@
+class ThinkStripper:
+    """
+    Incrementally removes the <think>...</think> reasoning block a reply opens with.
+
+    Feed chunks as they arrive; each call returns only the text that is certain
+    to be visible. Only a block that comes before any visible text counts as
+    reasoning: once the reply proper has started, a "<think>" is passed through
+    like any other text. While the start of the reply might still be a tag, or
+    the block has not closed yet, text is held back until the next chunk
+    decides it, so tags split across chunks are still recognized. Leading
+    whitespace of the visible reply is dropped.
+    """
+
+    OPEN_TAG = "<think>"
+    CLOSE_TAG = "</think>"
+
+    def __init__(self):
+        self._buffer = ""
+        self._in_think = False
+        self._started = False
+        self._search_from = 0
+
+    def feed(self, chunk: str) -> str:
+        if self._started:
+            return chunk
+        self._buffer += chunk
+
+        while True:
+            if self._in_think:
+                # Everything after the open tag is kept, so an unclosed block can be given back raw
+                index = self._buffer.find(self.CLOSE_TAG, self._search_from)
+                if index < 0:
+                    self._search_from = max(0, len(self._buffer) - len(self.CLOSE_TAG) + 1)
+                    return ""
+                self._buffer = self._buffer[index + len(self.CLOSE_TAG):]
+                self._in_think = False
+                self._search_from = 0
+                continue
+
+            self._buffer = self._buffer.lstrip()
+            if self._buffer.startswith(self.OPEN_TAG):
+                self._buffer = self._buffer[len(self.OPEN_TAG):]
+                self._in_think = True
+                continue
+            if not self._buffer or self.OPEN_TAG.startswith(self._buffer):
+                return ""
+
+            visible, self._buffer = self._buffer, ""
+            self._started = True
+            return visible
+
+    def flush(self) -> str:
+        """
+        Return held-back text once the stream has ended.
+
+        A reasoning block that never closed, e.g. because the reply hit num_predict,
+        is returned as it came rather than dropped, so the reply is never silently empty.
+        """
+        remaining, self._buffer = self._buffer, ""
+        if self._in_think:
+            remaining = self.OPEN_TAG + remaining
+            self._in_think = False
+        if remaining:
+            self._started = True
+        return remaining
+
+
+def strip_reasoning(text: str) -> str:
+    """
+    Remove the <think>...</think> block a reasoning model opens its reply with.
+    """
+    stripper = ThinkStripper()
+    return (stripper.feed(text) + stripper.flush()).strip()
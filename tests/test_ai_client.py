@@ -0,0 +1,162 @@
+import json
+import threading
+
+import ollama
+import pytest
+
+from benchmarks.stub_ollama import StubOllamaServer
+from core.ai_client import OllamaClient
+from core.memory import ConversationMemory
+from core.model_catalog import ModelCatalog
+from core.model_router import TASK_CHAT, ModelRouter
+from core.personality import PersonalityCache, PersonalityLoader
+from core.personality_registry import PersonalityRegistry
+
+
+class RecordingClient:
+    """
+    ollama.Client that remembers which models it was asked to load.
+    """
+
+    def __init__(self, host):
+        self.client = ollama.Client(host=host)
+        self.loaded = []
+
+    def generate(self, model, **kwargs):
+        self.loaded.append(model)
+        return self.client.generate(model=model, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+@pytest.fixture
+def stub():
+    with StubOllamaServer(reply_tokens=4) as stub:
+        yield stub
+
+
+@pytest.fixture
+def memory(tmp_path):
+    memory = ConversationMemory(str(tmp_path / "memory.db"))
+    yield memory
+    memory.close()
+
+
+def routed_client(stub, memory):
+    client = OllamaClient('qwen3:1.7b', memory=memory, router=ModelRouter(),
+                          catalog=ModelCatalog(ollama.Client(host=stub.url)))
+    client.client = RecordingClient(stub.url)
+    return client
+
+
+def test_warm_up_loads_only_the_chat_primary(stub, memory):
+    client = routed_client(stub, memory)
+    assert client.warm_up(background=False)
+    assert client.client.loaded == [client.router.route(TASK_CHAT)] == ['qwen3:1.7b']
+
+
+def test_fallback_models_are_preloaded_on_request(stub, memory):
+    client = routed_client(stub, memory)
+    assert client.warm_up(background=False, fallbacks=True)
+    assert client.client.loaded == client.router.routes[TASK_CHAT]
+
+
+class GatedClient(RecordingClient):
+    """
+    RecordingClient whose model loads wait until opened, and which counts model listings.
+    """
+
+    def __init__(self, host):
+        super().__init__(host)
+        self.gate = threading.Event()
+        self.listings = 0
+
+    def generate(self, model, **kwargs):
+        assert self.gate.wait(5), "warm-up was never released"
+        return super().generate(model, **kwargs)
+
+    def list(self):
+        self.listings += 1
+        return self.client.list()
+
+
+def test_background_warm_up_reports_warming_then_ready(stub, memory):
+    gated = GatedClient(stub.url)
+    client = OllamaClient('mistral', memory=memory, catalog=ModelCatalog(gated))
+    client.client = gated
+    assert client.warm_state == 'cold' and not client.wait_until_ready(0)
+
+    assert client.warm_up() is False
+    assert client.warm_state == 'warming' and not client.is_ready
+    assert client.warm_up() is False
+
+    gated.gate.set()
+    assert client.wait_until_ready(5)
+    # The configured name is resolved once against a single listing
+    assert client.model_name == 'mistral:latest'
+    assert gated.loaded == ['mistral:latest'] and gated.listings == 1
+    assert client.warm_up(background=False) and gated.loaded == ['mistral:latest']
+
+
+def test_warm_up_of_a_missing_model_fails_without_hanging(stub, memory):
+    client = OllamaClient('llama3', memory=memory, catalog=ModelCatalog(ollama.Client(host=stub.url)))
+    client.client = RecordingClient(stub.url)
+    assert client.warm_up(background=False) is False
+    assert client.warm_state == 'failed' and 'llama3' in client.warm_error
+    assert not client.wait_until_ready(0) and client.client.loaded == []
+
+
+class OverlappingClient(RecordingClient):
+    """
+    RecordingClient that holds each chat until `parties` of them are in flight at once.
+    """
+
+    def __init__(self, host, parties):
+        super().__init__(host)
+        self.barrier = threading.Barrier(parties, timeout=5)
+        self.requests = []
+
+    def chat(self, model, messages, **kwargs):
+        self.barrier.wait()
+        self.requests.append(messages)
+        return self.client.chat(model=model, messages=messages, **kwargs)
+
+
+def test_one_client_serves_concurrent_sessions_with_different_personalities(stub, memory, tmp_path):
+    directory = tmp_path / "personalities"
+    directory.mkdir()
+    for name, display_name in (("default", "Bliss"), ("rose", "Rose"), ("ivy", "Ivy")):
+        (directory / f"{name}.json").write_text(json.dumps({"personality": {"name": display_name}}),
+                                                encoding='utf-8')
+    loader = PersonalityLoader(str(directory), cache=PersonalityCache(str(directory)),
+                               registry=PersonalityRegistry(str(directory)))
+    client = OllamaClient('qwen3:1.7b', memory=memory, personality_loader=loader)
+    client.client = OverlappingClient(stub.url, parties=3)
+    personalities = {"default": "Bliss", "rose": "Rose", "ivy": "Ivy"}
+    errors = []
+
+    def chat(name):
+        try:
+            for i in range(3):
+                reply = client.generate_response(f"{name} turn {i}", personality_name=name, session_id=name)
+                assert "sorry" not in reply
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=chat, args=(name,)) for name in personalities]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(client.client.requests) == 9
+    for messages in client.client.requests:
+        name = messages[-1]["content"].split()[0]
+        system_prompt = messages[0]["content"]
+        assert personalities[name] in system_prompt
+        assert not any(other in system_prompt for other in personalities.values() if other != personalities[name])
+    assert loader.current_personality is None
+    for name in personalities:
+        assert memory.get_conversation_count(name) == 3
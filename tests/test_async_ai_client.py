@@ -0,0 +1,58 @@
+import asyncio
+import threading
+
+from benchmarks.stub_ollama import StubOllamaServer
+from core.async_ai_client import AsyncOllamaClient
+from core.async_memory import AsyncConversationMemory
+
+
+class GatedLoader:
+    """
+    Personality loader whose get() blocks until the event loop opens its gate.
+
+    If get() ran on the loop, the coroutine that opens the gate could never run.
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.gate = threading.Event()
+        self.threads = []
+
+    def get(self, name):
+        self.threads.append(threading.current_thread())
+        assert self.gate.wait(5), "personality was loaded on the event loop"
+        return self.loader.get(name)
+
+
+def test_personality_is_loaded_off_the_event_loop(tmp_path):
+    async def run(stub):
+        memory = AsyncConversationMemory(str(tmp_path / "memory.db"))
+        client = AsyncOllamaClient('qwen3:1.7b', host=stub.url, memory=memory)
+        loader = client.personality_loader = GatedLoader(client.personality_loader)
+
+        async def open_gate():
+            while not loader.threads:
+                await asyncio.sleep(0.001)
+            loader.gate.set()
+
+        reply, _ = await asyncio.gather(client.generate_response("hello", session_id="s"), open_gate())
+        await memory.close()
+        return reply, loader.threads
+
+    with StubOllamaServer(reply_tokens=4) as stub:
+        reply, threads = asyncio.run(run(stub))
+
+    assert reply and "sorry" not in reply
+    assert threads and threading.main_thread() not in threads
+
+
+def test_connection_resolves_the_installed_model_name():
+    async def connect(url, model_name):
+        client = AsyncOllamaClient(model_name, host=url, memory=AsyncConversationMemory(':memory:'))
+        connected = await client.test_connection()
+        await client.memory.close()
+        return connected, client.model_name
+
+    with StubOllamaServer() as stub:
+        assert asyncio.run(connect(stub.url, 'mistral')) == (True, 'mistral:latest')
+        assert asyncio.run(connect(stub.url, 'llama3')) == (False, 'llama3')
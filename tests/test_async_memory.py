@@ -0,0 +1,55 @@
+import asyncio
+import threading
+
+from core.async_memory import AsyncConversationMemory
+from core.memory import ConversationMemory
+
+
+def test_async_and_sync_memory_share_one_database(tmp_path):
+    path = str(tmp_path / "memory.db")
+
+    async def run():
+        async with AsyncConversationMemory(path) as memory:
+            await asyncio.gather(*(memory.save_conversation(f"q{i}", f"a{i}", "s") for i in range(5)))
+            return await memory.get_conversation_count("s")
+
+    assert asyncio.run(run()) == 5
+    sync = ConversationMemory(path)
+    try:
+        assert sorted(turn[0] for turn in sync.get_recent_conversations(10, "s")) == [f"q{i}" for i in range(5)]
+    finally:
+        sync.close()
+
+
+def test_blocked_database_calls_leave_the_loop_free_and_are_bounded(tmp_path):
+    sync = ConversationMemory(str(tmp_path / "memory.db"))
+    gate = threading.Event()
+    running = []
+    read = sync.get_recent_conversations
+
+    def slow_read(limit, session_id):
+        running.append(session_id)
+        assert gate.wait(5), "the event loop was blocked"
+        return read(limit, session_id)
+
+    sync.get_recent_conversations = slow_read
+
+    async def run():
+        memory = AsyncConversationMemory(memory=sync, max_workers=4, max_pending=2)
+        reads = [asyncio.ensure_future(memory.get_recent_conversations(5, f"s{i}")) for i in range(4)]
+        # A generation stream keeps ticking while every database slot is taken
+        ticks = 0
+        while len(running) < 2 or ticks < 10:
+            await asyncio.sleep(0.001)
+            ticks += 1
+        assert len(running) == 2
+        gate.set()
+        results = await asyncio.gather(*reads)
+        await memory.close()
+        return results
+
+    try:
+        assert asyncio.run(run()) == [[]] * 4
+        assert sorted(running) == ["s0", "s1", "s2", "s3"]
+    finally:
+        sync.close()
@@ -0,0 +1,76 @@
+import ollama
+import pytest
+
+from benchmarks.stub_ollama import StubOllamaServer
+from core.ai_client import OllamaClient
+from core.compaction import ConversationCompactor
+from core.memory import ConversationMemory
+
+
+@pytest.fixture
+def memory(tmp_path):
+    memory = ConversationMemory(str(tmp_path / "memory.db"))
+    yield memory
+    memory.close()
+
+
+@pytest.fixture
+def stub():
+    with StubOllamaServer(reply_tokens=4) as stub:
+        yield stub
+
+
+def make_client(memory, stub, **kwargs):
+    client = OllamaClient('qwen3:1.7b', memory=memory, **kwargs)
+    client.client = ollama.Client(host=stub.url)
+    return client
+
+
+def history_in_prompt(client):
+    return [message["content"] for message in client.last_context_window.messages[1:-1] if message["role"] == "user"]
+
+
+def test_stored_summary_is_used_without_a_compactor(memory, stub):
+    memory.save_conversation("My cat is called Miso", "Lovely name!", "s")
+    memory.save_session_summary("s", "The user has a cat called Miso.", through_id=1, turns_compacted=1)
+
+    client = make_client(memory, stub)
+    client.generate_response("what is my cat called", session_id="s")
+    summary = client.last_context_window.messages[1]
+    assert summary["role"] == "system"
+    assert "The user has a cat called Miso." in summary["content"]
+
+
+def test_no_turn_falls_between_the_summary_and_the_prompt(memory, stub):
+    summarized = []
+
+    def summarize(previous, turns):
+        summarized.extend(user_input for user_input, _ in turns)
+        return f"{len(summarized)} turns so far"
+
+    compactor = ConversationCompactor(memory, summarize, min_batch=2, background=False)
+    client = make_client(memory, stub, compactor=compactor)
+    for i in range(12):
+        client.generate_response(f"question {i}", session_id="s", context_limit=3)
+        in_prompt = history_in_prompt(client)
+        assert set(summarized) | set(in_prompt) == {f"question {j}" for j in range(i)}
+
+    assert summarized and len(history_in_prompt(client)) == 3
+    assert memory.get_session_summary("s")["summary"] == f"{len(summarized)} turns so far"
+
+
+def test_fixed_keep_recent_wins_over_the_prompt_window(memory):
+    for i in range(10):
+        memory.save_conversation(f"question {i}", f"answer {i}", "s")
+    compactor = ConversationCompactor(memory, lambda previous, turns: "summary", keep_recent=8,
+                                      min_batch=1, background=False)
+    compactor.schedule("s", keep_recent=2)
+    assert memory.get_session_summary("s")["turns_compacted"] == 2
+
+
+def test_nothing_is_compacted_without_a_window(memory):
+    for i in range(10):
+        memory.save_conversation(f"question {i}", f"answer {i}", "s")
+    compactor = ConversationCompactor(memory, lambda previous, turns: "summary", min_batch=1, background=False)
+    assert compactor.compact_session("s") == 0
+    assert memory.get_session_summary("s") is None
@@ -0,0 +1,35 @@
+import time
+
+from core.context_window import ContextAssembler, estimate_message_tokens
+
+PREFIX = [{"role": "system", "content": "You are Bliss."}]
+
+
+def history(count):
+    return [(f"question {i} about the weather", f"answer {i}: it is sunny today") for i in range(count)]
+
+
+def test_keeps_the_newest_turns_that_fit():
+    turns = history(50)
+    window = ContextAssembler(token_budget=200).assemble(PREFIX, turns, "hello")
+    assert 0 < window.turns_used < len(turns)
+    assert window.turns_used + window.turns_dropped == len(turns)
+    assert window.messages[-3]["content"] == turns[-1][0]
+    assert window.token_count == sum(estimate_message_tokens(message) for message in window.messages)
+    assert window.token_count <= 200
+
+    one_more = ContextAssembler(token_budget=200).assemble(PREFIX, turns[-(window.turns_used + 1):], "hello")
+    assert one_more.turns_dropped == 1
+
+
+def test_aligned_window_starts_on_a_block_boundary():
+    window = ContextAssembler(token_budget=200).assemble(PREFIX, history(50), "hello", align_step=4)
+    assert (50 - window.turns_used) % 4 == 0
+
+
+def test_long_history_is_linear():
+    turns = history(20000)
+    started = time.perf_counter()
+    window = ContextAssembler(token_budget=10 ** 9).assemble(PREFIX, turns, "hello")
+    assert window.turns_used == len(turns)
+    assert time.perf_counter() - started < 1.0
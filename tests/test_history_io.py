@@ -0,0 +1,70 @@
+import csv
+
+import pytest
+
+from core.memory import ConversationMemory
+from utils.history_io import main
+
+TURNS = [
+    ("hello", "Hi there!", "a"),
+    ("a, quoted \"line\"\nwith a newline", "Ünïcödé 🎉", "a"),
+    ("second session", "still here", "b"),
+]
+
+
+@pytest.fixture
+def source(tmp_path):
+    memory = ConversationMemory(str(tmp_path / "source.db"))
+    for user_input, assistant_response, session_id in TURNS:
+        memory.save_conversation(user_input, assistant_response, session_id)
+    yield memory
+    memory.close()
+
+
+def history(memory):
+    with memory.pool.connection() as conn:
+        return conn.execute('''
+            select session_id, timestamp, created_ms, user_input, assistant_response
+            from conversations order by created_ms, id
+        ''').fetchall()
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "csv"])
+def test_export_import_round_trip(tmp_path, source, fmt):
+    path = str(tmp_path / f"history.{fmt}")
+    assert source.export_conversations(path) == 3
+
+    target = ConversationMemory(str(tmp_path / "target.db"))
+    try:
+        assert target.import_conversations(path) == 3
+        assert history(target) == history(source)
+        # Importing the same file again adds nothing
+        assert target.import_conversations(path) == 0
+        assert history(target) == history(source)
+        assert target.get_conversation_count("a") == 2
+    finally:
+        target.close()
+
+
+def test_session_export_imports_into_another_session(tmp_path, source):
+    path = str(tmp_path / "session.jsonl")
+    assert source.export_conversations(path, session_id="a") == 2
+
+    target = ConversationMemory(str(tmp_path / "target.db"))
+    try:
+        assert target.import_conversations(path, session_id="restored") == 2
+        assert [turn[0] for turn in target.get_recent_conversations(5, "restored")] == \
+            [TURNS[0][0], TURNS[1][0]]
+    finally:
+        target.close()
+
+
+def test_cli_reports_an_oversized_csv_field(tmp_path, capsys):
+    path = tmp_path / "huge.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["user_input", "assistant_response"])
+        writer.writerow(["x" * (csv.field_size_limit() + 1), "reply"])
+
+    assert main(["import", str(path), "--db", str(tmp_path / "memory.db")]) == 1
+    assert "Import failed" in capsys.readouterr().err
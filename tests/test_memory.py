@@ -0,0 +1,419 @@
+import calendar
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+from core.memory import SCHEMA_VERSION, ConnectionPool, ConversationMemory, RecentTurnCache, WriteBehindWriter
+
+
+class FlakyPool:
+    """
+    Wraps a real pool; the first `failures` transactions raise `error` instead of running.
+    """
+
+    def __init__(self, pool, failures, error):
+        self.pool = pool
+        self.failures = failures
+        self.error = error
+        self.attempts = 0
+
+    @contextmanager
+    def transaction(self):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise self.error
+        with self.pool.transaction() as conn:
+            yield conn
+
+
+@pytest.fixture
+def memory(tmp_path):
+    memory = ConversationMemory(str(tmp_path / "memory.db"), write_behind=True, flush_interval=0.01)
+    yield memory
+    memory.close()
+
+
+def use_flaky_writer(memory, failures, error, max_retries=8):
+    memory.writer.close()
+    memory.writer = WriteBehindWriter(FlakyPool(memory.pool, failures, error), memory.INSERT_SQL,
+                                      flush_interval=0.01, max_retries=max_retries, retry_backoff=0.001)
+    return memory.writer
+
+
+def stored_count(memory, session_id):
+    with memory.pool.connection() as conn:
+        return conn.execute('select count(*) from conversations where session_id = ?', (session_id,)).fetchone()[0]
+
+
+def test_write_behind_turns_are_readable_before_and_after_commit(memory):
+    for i in range(5):
+        memory.save_conversation(f"question {i}", f"answer {i}", "s")
+    assert [turn[0] for turn in memory.get_recent_conversations(3, "s")] == ["question 2", "question 3", "question 4"]
+
+    memory.flush()
+    assert stored_count(memory, "s") == 5
+    assert [turn[0] for turn in memory.get_recent_conversations(10, "s")] == [f"question {i}" for i in range(5)]
+
+
+def test_locked_database_is_retried_until_the_batch_commits(memory):
+    writer = use_flaky_writer(memory, 3, sqlite3.OperationalError("database is locked"))
+    memory.save_conversation("hello", "hi", "s")
+    memory.flush()
+
+    assert writer.pool.attempts == 4
+    assert writer.dropped_rows == 0
+    assert stored_count(memory, "s") == 1
+
+
+def test_rows_are_dropped_and_reported_on_a_permanent_error(memory):
+    writer = use_flaky_writer(memory, 1, sqlite3.IntegrityError("constraint failed"))
+    memory.save_conversation("hello", "hi", "s")
+
+    with pytest.raises(sqlite3.IntegrityError):
+        memory.flush()
+    assert writer.dropped_rows == 1
+    assert stored_count(memory, "s") == 0
+
+    # Reported once; later turns are written normally
+    memory.save_conversation("again", "hi", "s")
+    memory.flush()
+    assert stored_count(memory, "s") == 1
+
+
+def test_transient_errors_give_up_after_max_retries(memory):
+    writer = use_flaky_writer(memory, 100, sqlite3.OperationalError("database is locked"), max_retries=2)
+    memory.save_conversation("hello", "hi", "s")
+
+    with pytest.raises(sqlite3.OperationalError):
+        memory.flush()
+    assert writer.pool.attempts == 3
+    assert writer.dropped_rows == 1
+
+
+def test_reads_do_not_raise_a_write_error(memory):
+    use_flaky_writer(memory, 1, sqlite3.IntegrityError("constraint failed"))
+    memory.save_conversation("hello", "hi", "s")
+    memory.search_conversations("hello")
+
+    with pytest.raises(sqlite3.IntegrityError):
+        memory.flush()
+
+
+def test_clear_session_discards_queued_rows(memory):
+    memory.save_conversation("hello", "hi", "s")
+    memory.clear_session("s")
+    memory.flush()
+    assert stored_count(memory, "s") == 0
+    assert memory.get_recent_conversations(10, "s") == []
+
+
+def test_concurrent_writers_lose_nothing(memory):
+    def write(worker):
+        for i in range(50):
+            memory.save_conversation(f"q{i}", f"a{i}", f"session-{worker}")
+
+    threads = [threading.Thread(target=write, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    memory.flush()
+    assert sum(stored_count(memory, f"session-{worker}") for worker in range(4)) == 200
+
+
+def test_pool_reuses_a_bounded_set_of_wal_connections(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_connections=2, timeout=0.05)
+    try:
+        with pool.connection() as first:
+            assert first.execute('pragma journal_mode').fetchone()[0] == 'wal'
+            with pool.connection() as second:
+                assert second is not first
+                # Both connections are out, so a third caller times out instead of opening more
+                with pytest.raises(sqlite3.OperationalError):
+                    pool.acquire()
+        with pool.connection() as again:
+            assert again in (first, second)
+    finally:
+        pool.close()
+
+
+def test_concurrent_sessions_share_the_pool(tmp_path):
+    memory = ConversationMemory(str(tmp_path / "memory.db"), pool_size=2)
+    errors = []
+
+    def chat(worker):
+        session_id = f"session-{worker}"
+        try:
+            for i in range(25):
+                memory.get_recent_conversations(5, session_id)
+                memory.save_conversation(f"q{i}", f"a{i}", session_id)
+                assert memory.get_conversation_count(session_id) == i + 1
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=chat, args=(worker,)) for worker in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    try:
+        assert errors == []
+        assert len(memory.pool._all) <= 2
+        assert [stored_count(memory, f"session-{worker}") for worker in range(6)] == [25] * 6
+    finally:
+        memory.close()
+
+
+def turn(i):
+    return (f"question {i}", f"answer {i}", "2026-01-01 00:00:00")
+
+
+def test_cached_reads_follow_writes(tmp_path):
+    memory = ConversationMemory(str(tmp_path / "memory.db"), cache_sessions=4, cache_turns=10)
+    try:
+        memory.save_conversation("question 0", "answer 0", "s")
+        assert [t[0] for t in memory.get_recent_conversations(5, "s")] == ["question 0"]
+        for i in range(1, 4):
+            memory.save_conversation(f"question {i}", f"answer {i}", "s")
+        assert [t[0] for t in memory.get_recent_conversations(5, "s")] == [f"question {i}" for i in range(4)]
+        assert memory.cache_stats()["hits"] == 1
+
+        memory.clear_session("s")
+        assert memory.get_recent_conversations(5, "s") == []
+    finally:
+        memory.close()
+
+
+def test_read_that_raced_a_write_is_not_stored():
+    cache = RecentTurnCache(max_sessions=4, max_turns=10)
+    generation = cache.generation("s")
+    cache.append("s", turn(1), cache.begin_write("s"))
+    cache.store("s", [turn(0)], 10, generation)
+    assert cache.get("s", 10) is None
+
+
+def test_entry_populated_during_a_write_is_dropped():
+    cache = RecentTurnCache(max_sessions=4, max_turns=10)
+    write_gen = cache.begin_write("s")
+    # The read may or may not have seen the row being written
+    cache.store("s", [turn(0)], 10, cache.generation("s"))
+    cache.append("s", turn(0), write_gen)
+    assert cache.get("s", 10) is None
+
+
+def test_pruned_generations_still_reject_stale_reads():
+    cache = RecentTurnCache(max_sessions=1, max_turns=10)
+    generation = cache.generation("s")
+    cache.append("s", turn(1), cache.begin_write("s"))
+    for i in range(5):
+        cache.begin_write(f"other {i}")
+    cache.store("other 0", [], 10, cache.generation("other 0"))
+    cache.store("s", [turn(0)], 10, generation)
+    assert cache.get("s", 10) is None
+
+
+def test_least_recently_used_session_is_evicted():
+    cache = RecentTurnCache(max_sessions=2, max_turns=10)
+    for session_id in ("a", "b"):
+        cache.store(session_id, [turn(0)], 10, cache.generation(session_id))
+    assert cache.get("a", 10) is not None
+    cache.store("c", [turn(0)], 10, cache.generation("c"))
+    assert cache.get("b", 10) is None
+    assert cache.get("a", 10) == cache.get("c", 10) == [turn(0)]
+
+
+def test_ring_buffer_only_serves_limits_it_holds():
+    cache = RecentTurnCache(max_sessions=2, max_turns=3)
+    cache.store("s", [turn(0), turn(1)], 10, cache.generation("s"))
+    assert cache.get("s", 10) == [turn(0), turn(1)]
+    for i in (2, 3):
+        cache.append("s", turn(i), cache.begin_write("s"))
+    assert cache.get("s", 3) == [turn(1), turn(2), turn(3)]
+    assert cache.get("s", 10) is None
+
+
+def test_cached_sessions_count_turns_without_querying(tmp_path):
+    memory = ConversationMemory(str(tmp_path / "memory.db"), write_behind=True, flush_interval=0.01,
+                                cache_sessions=4, cache_turns=3)
+    try:
+        for i in range(5):
+            memory.save_conversation(f"question {i}", f"answer {i}", "s")
+        memory.get_recent_conversations(3, "s")
+        assert memory.get_conversation_count("s") == 5
+
+        def no_queries(*args):
+            raise AssertionError("counted from the database")
+
+        memory._load_count = no_queries
+        for i in range(5, 8):
+            memory.save_conversation(f"question {i}", f"answer {i}", "s")
+            assert memory.get_conversation_count("s") == i + 1
+        memory.flush()
+        assert stored_count(memory, "s") == 8
+    finally:
+        memory.close()
+
+
+def test_count_read_during_a_write_is_not_trusted():
+    cache = RecentTurnCache(max_sessions=4, max_turns=10)
+    cache.store("s", [turn(0), turn(1)], 2, cache.generation("s"))
+    assert cache.count("s") is None
+
+    write_gen = cache.begin_write("s")
+    # The count may or may not include the row being written
+    cache.store_count("s", 3, cache.generation("s"))
+    cache.append("s", turn(2), write_gen)
+    assert cache.count("s") is None
+
+    cache.store_count("s", 3, cache.generation("s"))
+    cache.append("s", turn(3), cache.begin_write("s"))
+    assert cache.count("s") == 4
+
+
+def test_compactable_turns_include_queued_writes(memory):
+    for i in range(10):
+        memory.save_conversation(f"question {i}", f"answer {i}", "s")
+    memory.save_conversation("other", "session", "t")
+
+    turns = memory.get_compactable_turns("s", keep_recent=3)
+    assert [turn[1] for turn in turns] == [f"question {i}" for i in range(7)]
+    assert memory.get_compactable_turns("s", keep_recent=3, after_id=turns[4][0], limit=1) == [turns[5]]
+    assert memory.get_compactable_turns("s", keep_recent=10) == []
+
+
+@pytest.mark.parametrize("retention, kept, archived", [("keep", 10, 0), ("archive", 4, 6), ("delete", 4, 0)])
+def test_summary_retention(tmp_path, retention, kept, archived):
+    memory = ConversationMemory(str(tmp_path / "memory.db"), cache_sessions=4)
+    try:
+        for i in range(10):
+            memory.save_conversation(f"question {i}", f"answer {i}", "s")
+        assert len(memory.get_recent_conversations(20, "s")) == 10
+
+        through_id = memory.get_compactable_turns("s", keep_recent=4)[-1][0]
+        memory.save_session_summary("s", "They asked ten questions.", through_id, 6, retention=retention)
+
+        assert memory.get_session_summary("s")["turns_compacted"] == 6
+        # The cached window must not serve turns the policy removed
+        assert [turn[0] for turn in memory.get_recent_conversations(20, "s")] == \
+            [f"question {i}" for i in range(10 - kept, 10)]
+        with memory.pool.connection() as conn:
+            assert conn.execute('select count(*) from conversations_archive').fetchone()[0] == archived
+    finally:
+        memory.close()
+
+
+def baseline_database(path, rows):
+    """
+    A database as the first release of ConversationMemory left it: no created_ms, user_version 0.
+    """
+    with sqlite3.connect(path) as conn:
+        conn.execute('''
+            create table if not exists conversations (
+                id integer primary key autoincrement,
+                user_input text not null,
+                assistant_response text not null,
+                timestamp datetime default current_timestamp,
+                session_id text default 'default'
+            )
+        ''')
+        conn.execute('create index if not exists idx_timestamp on conversations (timestamp)')
+        conn.executemany(
+            'insert into conversations (user_input, assistant_response, session_id, timestamp) values (?, ?, ?, ?)',
+            rows
+        )
+    conn.close()
+
+
+def test_baseline_database_is_upgraded_in_place(tmp_path):
+    path = str(tmp_path / "memory.db")
+    # Several turns within one second, which the old timestamp ordering could not tell apart
+    baseline_database(path, [(f"question {i}", f"answer {i}", "s", "2024-05-01 12:00:00") for i in range(5)])
+
+    memory = ConversationMemory(path)
+    try:
+        with memory.pool.connection() as conn:
+            assert conn.execute('pragma user_version').fetchone()[0] == SCHEMA_VERSION
+            created = {row[0] for row in conn.execute('select created_ms from conversations')}
+            indexes = {row[0] for row in conn.execute("select name from sqlite_master where type = 'index'")}
+        assert created == {calendar.timegm((2024, 5, 1, 12, 0, 0)) * 1000}
+        assert 'idx_session_created' in indexes
+
+        for _ in range(3):
+            assert [turn[0] for turn in memory.get_recent_conversations(3, "s")] == \
+                ["question 2", "question 3", "question 4"]
+        memory.save_conversation("question 5", "answer 5", "s")
+        assert memory.get_recent_conversations(1, "s")[0][0] == "question 5"
+    finally:
+        memory.close()
+
+    # Opening an up-to-date database again changes nothing
+    reopened = ConversationMemory(path)
+    try:
+        assert reopened.get_conversation_count("s") == 6
+        with reopened.pool.connection() as conn:
+            assert conn.execute('pragma user_version').fetchone()[0] == SCHEMA_VERSION
+    finally:
+        reopened.close()
+
+
+def search_inputs(memory, query, **kwargs):
+    return sorted(hit["user_input"] for hit in memory.search_conversations(query, **kwargs))
+
+
+def test_search_index_is_backfilled_from_existing_rows(tmp_path):
+    path = str(tmp_path / "memory.db")
+    baseline_database(path, [("My cat is called Miso", "Lovely name", "s", "2024-05-01 12:00:00"),
+                             ("I like jazz", "Me too", "s", "2024-05-01 12:00:01")])
+    memory = ConversationMemory(path)
+    try:
+        assert memory.has_search_index()
+        hits = memory.search_conversations("miso")
+        assert [hit["user_input"] for hit in hits] == ["My cat is called Miso"]
+        assert hits[0]["user_input_highlight"] == "My cat is called **Miso**"
+    finally:
+        memory.close()
+
+
+def test_search_follows_inserts_and_deletes_per_session(memory):
+    memory.save_conversation("Where should I travel in spring", "Kyoto is lovely in spring", "a")
+    memory.save_conversation("Spring cleaning tips", "Start with one room", "b")
+    assert search_inputs(memory, "spring") == ["Spring cleaning tips", "Where should I travel in spring"]
+    assert search_inputs(memory, "spring", session_id="b") == ["Spring cleaning tips"]
+    # Every word has to match, in either the question or the reply
+    assert search_inputs(memory, "spring kyoto") == ["Where should I travel in spring"]
+
+    memory.clear_session("a")
+    assert search_inputs(memory, "spring") == ["Spring cleaning tips"]
+
+
+@pytest.mark.parametrize("query", ['cat AND "dog', "NEAR(cat", "user_input:cat", "-cat", "cat*)", '"'])
+def test_user_queries_are_never_parsed_as_fts_syntax(memory, query):
+    memory.save_conversation("cat AND dog NEAR(cat user_input:cat -cat cat*)", "ok", "s")
+    memory.search_conversations(query)
+
+
+def test_raw_queries_use_fts_syntax(memory):
+    memory.save_conversation("I like jazz", "Nice", "s")
+    memory.save_conversation("I like opera", "Nice", "s")
+    assert search_inputs(memory, "jazz OR opera", raw=True) == ["I like jazz", "I like opera"]
+    assert search_inputs(memory, "jazz OR opera") == []
+
+
+def test_search_falls_back_to_like_without_fts5(tmp_path, monkeypatch):
+    import core.memory
+
+    monkeypatch.setattr(core.memory, "_create_search_index", lambda conn: False)
+    memory = ConversationMemory(str(tmp_path / "memory.db"))
+    try:
+        assert not memory.has_search_index()
+        memory.save_conversation("Where should I travel in spring", "Kyoto is lovely", "a")
+        memory.save_conversation("100% sure about spring", "Alright", "b")
+        assert search_inputs(memory, "SPRING kyoto") == ["Where should I travel in spring"]
+        assert search_inputs(memory, "spring", session_id="b") == ["100% sure about spring"]
+        # LIKE wildcards in the query are matched literally
+        assert search_inputs(memory, "0%") == ["100% sure about spring"]
+        assert search_inputs(memory, "_") == []
+    finally:
+        memory.close()
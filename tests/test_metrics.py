@@ -0,0 +1,80 @@
+import json
+
+import ollama
+
+from benchmarks.stub_ollama import StubOllamaServer
+from core.ai_client import OllamaClient
+from core.memory import ConversationMemory
+from core.metrics import GENERATED_TOKENS, STAGE_SECONDS, MetricsRegistry
+
+
+def test_prometheus_text_format():
+    registry = MetricsRegistry()
+    registry.register('latency_seconds', 'Request latency', buckets=(0.1, 1.0))
+    registry.observe('latency_seconds', 0.05, stage='read')
+    registry.observe('latency_seconds', 0.5, stage='read')
+    registry.observe('latency_seconds', 2.0, stage='read')
+    registry.observe('latency_seconds', 0.2, stage='say "hi"\n')
+
+    assert registry.to_prometheus() == (
+        '# HELP latency_seconds Request latency\n'
+        '# TYPE latency_seconds histogram\n'
+        'latency_seconds_bucket{stage="read",le="0.1"} 1\n'
+        'latency_seconds_bucket{stage="read",le="1.0"} 2\n'
+        'latency_seconds_bucket{stage="read",le="+Inf"} 3\n'
+        'latency_seconds_sum{stage="read"} 2.55\n'
+        'latency_seconds_count{stage="read"} 3\n'
+        'latency_seconds_bucket{stage="say \\"hi\\"\\n",le="0.1"} 0\n'
+        'latency_seconds_bucket{stage="say \\"hi\\"\\n",le="1.0"} 1\n'
+        'latency_seconds_bucket{stage="say \\"hi\\"\\n",le="+Inf"} 1\n'
+        'latency_seconds_sum{stage="say \\"hi\\"\\n"} 0.2\n'
+        'latency_seconds_count{stage="say \\"hi\\"\\n"} 1\n'
+    )
+
+
+def test_json_export_matches_the_histograms():
+    registry = MetricsRegistry()
+    registry.register('latency_seconds', 'Request latency', buckets=(0.1, 1.0))
+    registry.observe('latency_seconds', 0.05, stage='read')
+    registry.observe('latency_seconds', 2.0, stage='read')
+
+    exported = json.loads(registry.to_json())
+    assert exported['latency_seconds'] == {
+        "help": "Request latency",
+        "series": [{
+            "labels": {"stage": "read"},
+            "count": 2,
+            "sum": 2.05,
+            "buckets": [[0.1, 1], [1.0, 1], ["+Inf", 2]],
+        }],
+    }
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+    with registry.stage('save'):
+        pass
+    registry.observe(STAGE_SECONDS, 1.0, stage='model')
+    registry.observe_usage({"eval_count": 10, "eval_duration": 10 ** 9})
+    assert registry.to_prometheus() == ""
+    assert registry.to_dict() == {}
+
+
+def test_reply_stages_and_ollama_usage_are_recorded(tmp_path):
+    registry = MetricsRegistry()
+    memory = ConversationMemory(str(tmp_path / "memory.db"))
+    try:
+        with StubOllamaServer(reply_tokens=4) as stub:
+            client = OllamaClient('qwen3:1.7b', memory=memory, metrics=registry)
+            client.client = ollama.Client(host=stub.url)
+            client.generate_response("hello", session_id="s")
+    finally:
+        memory.close()
+
+    stages = registry.summary()
+    for stage in ('total', 'personality_load', 'context_read', 'prompt_build', 'model', 'prefill', 'decode', 'save'):
+        assert stages[stage]["count"] == 1, stage
+    assert registry.summary(GENERATED_TOKENS) == {
+        GENERATED_TOKENS: {"count": 1, "mean": 4.0, "p50": 16, "p95": 16}
+    }
+    assert 'bliss_stage_seconds_count{stage="decode"} 1' in registry.to_prometheus()
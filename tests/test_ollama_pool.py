@@ -0,0 +1,143 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from benchmarks.stub_ollama import StubOllamaServer
+from core.ollama_pool import CLOSED, HALF_OPEN, OPEN, OllamaPool
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+def unused_url():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+@pytest.fixture
+def stubs():
+    servers = [StubOllamaServer(reply_tokens=4).start() for _ in range(3)]
+    yield servers
+    for server in servers:
+        server.stop()
+
+
+def test_sequential_requests_are_spread_round_robin(stubs):
+    pool = OllamaPool([stub.url for stub in stubs], health_interval=None)
+    try:
+        for _ in range(6):
+            pool.chat(model='qwen3:1.7b', messages=MESSAGES)
+    finally:
+        pool.close()
+    assert [stub.requests for stub in stubs] == [2, 2, 2]
+
+
+def test_failed_endpoint_opens_its_circuit_and_requests_fail_over(stubs):
+    dead = unused_url()
+    pool = OllamaPool([dead, stubs[0].url], health_interval=None, failure_threshold=2, reset_timeout=60)
+    try:
+        for _ in range(4):
+            response = pool.chat(model='qwen3:1.7b', messages=MESSAGES)
+            assert response['message']['content']
+        states = {entry["host"]: entry["state"] for entry in pool.stats()}
+    finally:
+        pool.close()
+    assert states == {dead: OPEN, stubs[0].url: CLOSED}
+    # Once open, the dead endpoint is skipped instead of tried again
+    assert stubs[0].requests == 4
+
+
+def test_open_circuit_allows_a_trial_after_reset_timeout(stubs):
+    pool = OllamaPool([stubs[0].url], health_interval=None, failure_threshold=1, reset_timeout=0.05)
+    endpoint = pool.endpoints[0]
+    try:
+        with pool._lock:
+            pool._mark_down(endpoint)
+        assert endpoint.state == OPEN
+        with pytest.raises(Exception):
+            pool.chat(model='qwen3:1.7b', messages=MESSAGES)
+
+        time.sleep(0.06)
+        pool.chat(model='qwen3:1.7b', messages=MESSAGES)
+        assert endpoint.state == CLOSED
+    finally:
+        pool.close()
+
+
+def test_half_open_endpoint_admits_one_trial_at_a_time(stubs):
+    pool = OllamaPool([stubs[0].url, stubs[1].url], health_interval=None, failure_threshold=1,
+                      reset_timeout=0)
+    first = pool.endpoints[0]
+    try:
+        with pool._lock:
+            pool._mark_down(first)
+        trial = pool._acquire(None, [pool.endpoints[1]])
+        assert trial is first and first.state == HALF_OPEN
+        # A second request must not also go to the half-open endpoint
+        with pytest.raises(Exception):
+            pool._acquire(None, [pool.endpoints[1]])
+        pool._release(first)
+        assert first.state == CLOSED
+    finally:
+        pool.close()
+
+
+def test_streaming_fails_over_before_the_first_chunk(stubs):
+    pool = OllamaPool([unused_url(), stubs[0].url], health_interval=None)
+    try:
+        for _ in range(2):
+            text = "".join(chunk['message']['content']
+                           for chunk in pool.chat(model='qwen3:1.7b', messages=MESSAGES, stream=True))
+            assert text.strip()
+    finally:
+        pool.close()
+
+
+def test_slow_request_is_hedged_to_another_endpoint():
+    slow = StubOllamaServer(latency=1.0, reply_tokens=4).start()
+    fast = StubOllamaServer(reply_tokens=4).start()
+    pool = OllamaPool([slow.url, fast.url], health_interval=None, hedge_after=0.05)
+    try:
+        # Make the slow endpoint the first choice
+        pool._turn = 0
+        started = time.monotonic()
+        response = pool.chat(model='qwen3:1.7b', messages=MESSAGES)
+        assert response['message']['content']
+        assert time.monotonic() - started < 0.9
+        assert pool.hedged == 1
+        assert fast.requests == 1
+    finally:
+        pool.close()
+        slow.stop()
+        fast.stop()
+
+
+def test_time_queued_in_the_executor_does_not_trigger_hedges(stubs):
+    stubs[0].latency = stubs[1].latency = 0.1
+    pool = OllamaPool([stubs[0].url, stubs[1].url], health_interval=None, hedge_after=0.5)
+    # More concurrent requests than executor threads: some wait for a thread well past hedge_after
+    threads = [threading.Thread(target=pool.chat, kwargs={'model': 'qwen3:1.7b', 'messages': MESSAGES})
+               for _ in range(24)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert pool.hedged == 0
+    finally:
+        pool.close()
+
+
+def test_health_check_records_each_endpoints_models():
+    dead = unused_url()
+    with StubOllamaServer(models=['mistral:latest']) as stub:
+        pool = OllamaPool([dead, stub.url], health_interval=None, failure_threshold=1)
+        try:
+            assert pool.check_health() == {dead: False, stub.url: True}
+            models = {entry["host"]: entry["models"] for entry in pool.stats()}
+        finally:
+            pool.close()
+    assert models == {dead: None, stub.url: ['mistral:latest']}
+    assert pool.endpoints[1].has_model('mistral') and not pool.endpoints[1].has_model('qwen3:1.7b')
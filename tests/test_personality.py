@@ -0,0 +1,134 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from core.personality import EMPTY_PERSONALITY, MEMOIZED_PROMPT_BUDGETS, PersonalityCache, PersonalityLoader
+from core.personality_bundle import build_bundle
+from core.personality_registry import PersonalityRegistry
+
+PERSONALITIES = {
+    "default": {"name": "Bliss", "age": 20, "description": "The default.", "traits": ["Kind", "Curious"]},
+    "rose": {"name": "Rose", "age": 25, "description": "An artist.", "traits": ["Creative"]},
+}
+
+
+@pytest.fixture
+def personalities_dir(tmp_path):
+    directory = tmp_path / "personalities"
+    directory.mkdir()
+    for name, personality in PERSONALITIES.items():
+        (directory / f"{name}.json").write_text(json.dumps({"personality": personality}), encoding='utf-8')
+    (directory / "template.json").write_text(json.dumps({"personality": {}}), encoding='utf-8')
+    return str(directory)
+
+
+def directory_loader(personalities_dir):
+    return PersonalityLoader(personalities_dir, cache=PersonalityCache(personalities_dir),
+                             registry=PersonalityRegistry(personalities_dir))
+
+
+def test_unknown_personality_falls_back_to_default(personalities_dir):
+    loader = directory_loader(personalities_dir)
+    assert loader.get("nobody").name == "default"
+
+
+def test_missing_default_falls_back_to_empty(personalities_dir):
+    os.remove(os.path.join(personalities_dir, "default.json"))
+    assert directory_loader(personalities_dir).get("nobody") is EMPTY_PERSONALITY
+
+
+def test_bundle_mode_matches_directory_mode(personalities_dir, tmp_path):
+    bundle_path = str(tmp_path / "personalities.bundle")
+    assert build_bundle(personalities_dir, bundle_path) == 2
+
+    from_directory = directory_loader(personalities_dir)
+    from_bundle = PersonalityLoader(personalities_dir, bundle_path=bundle_path)
+    assert from_bundle.get_available_personalities() == from_directory.get_available_personalities() == ["default", "rose"]
+    # Listing does not deserialize any personality
+    assert from_bundle.bundle.stats() == {"entries": 2, "loaded": 0}
+    for name in PERSONALITIES:
+        expected, actual = from_directory.get(name), from_bundle.get(name)
+        assert (actual.version, actual.prompt, actual.info()) == (expected.version, expected.prompt, expected.info())
+        assert actual.system_prompt(256) == expected.system_prompt(256)
+    assert from_bundle.get("nobody").name == "default"
+
+
+def test_concurrent_listings_notify_each_change_once(personalities_dir):
+    registry = PersonalityRegistry(personalities_dir, poll_interval=0)
+    notified = []
+    registry.subscribe(lambda name, event: notified.append((name, event)))
+    registry.refresh()
+    notified.clear()
+
+    read_entry = registry._read_entry
+
+    def slow_read_entry(*args):
+        # Widen the window in which two scans could overlap
+        time.sleep(0.05)
+        return read_entry(*args)
+
+    registry._read_entry = slow_read_entry
+
+    with open(os.path.join(personalities_dir, "iris.json"), 'w', encoding='utf-8') as file:
+        json.dump({"personality": {"name": "Iris"}}, file)
+    start = threading.Barrier(8)
+
+    def list_names():
+        start.wait()
+        registry.names()
+
+    threads = [threading.Thread(target=list_names) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert notified == [("iris", "added")]
+
+
+def test_only_default_prompt_budgets_are_memoized(personalities_dir):
+    personality = directory_loader(personalities_dir).get("rose")
+    budget = min(MEMOIZED_PROMPT_BUDGETS)
+    assert personality.system_prompt(budget) is personality.system_prompt(budget)
+    assert personality.system_prompt(full=True) is personality.system_prompt(full=True)
+
+    for odd_budget in range(1000, 1100):
+        assert personality.system_prompt(odd_budget) == personality.system_prompt(odd_budget)
+    assert set(personality._prompts) == {budget, 'full'}
+
+
+def write_personality(personalities_dir, name, personality, mtime_ns):
+    path = os.path.join(personalities_dir, f"{name}.json")
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({"personality": personality}, file)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_cache_revalidates_on_mtime_and_size(personalities_dir):
+    cache = PersonalityCache(personalities_dir)
+    write_personality(personalities_dir, "rose", {"name": "Rose"}, 1_000_000_000)
+    first = cache.get("rose")
+    assert cache.get("rose") is first
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1, "reloads": 0}
+
+    # Same size, new mtime
+    write_personality(personalities_dir, "rose", {"name": "Rosa"}, 2_000_000_000)
+    renamed = cache.get("rose")
+    assert renamed.data["name"] == "Rosa" and renamed.version != first.version
+
+    # Same mtime, different size
+    write_personality(personalities_dir, "rose", {"name": "Rosalind"}, 2_000_000_000)
+    assert cache.get("rose").data["name"] == "Rosalind"
+    assert "Rosalind" in cache.get("rose").prompt
+    assert cache.stats() == {"entries": 1, "hits": 2, "misses": 1, "reloads": 2}
+
+
+def test_compiled_personalities_are_read_only(personalities_dir):
+    personality = directory_loader(personalities_dir).get("default")
+    with pytest.raises(AttributeError):
+        personality.prompt = "changed"
+    with pytest.raises(TypeError):
+        personality.data["name"] = "changed"
+    assert personality.data["traits"] == ("Kind", "Curious")
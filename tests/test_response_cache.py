@@ -0,0 +1,86 @@
+import pytest
+
+from core import response_cache
+from core.response_cache import ResponseCache
+
+MESSAGES = [{"role": "system", "content": "You are Bliss."}, {"role": "user", "content": "hi"}]
+OPTIONS = {"temperature": 0.2}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, "time", clock)
+    return clock
+
+
+def test_key_covers_everything_that_shapes_the_reply():
+    key = ResponseCache.make_key("qwen3:1.7b", OPTIONS, MESSAGES, "v1")
+    assert key == ResponseCache.make_key("qwen3:1.7b", dict(OPTIONS), [dict(m) for m in MESSAGES], "v1")
+    assert len({
+        key,
+        ResponseCache.make_key("qwen3:4b", OPTIONS, MESSAGES, "v1"),
+        ResponseCache.make_key("qwen3:1.7b", {"temperature": 0.3}, MESSAGES, "v1"),
+        ResponseCache.make_key("qwen3:1.7b", OPTIONS, MESSAGES[:1], "v1"),
+        ResponseCache.make_key("qwen3:1.7b", OPTIONS, MESSAGES, "v2"),
+    }) == 5
+
+
+def test_hot_sampling_bypasses_the_cache():
+    cache = ResponseCache(max_temperature=0.7)
+    assert cache.cacheable({"temperature": 0.7})
+    assert not cache.cacheable({"temperature": 0.9})
+    # Ollama's default temperature is 0.8
+    assert not cache.cacheable({})
+    assert cache.stats()["bypassed"] == 2
+
+
+def test_least_recently_used_reply_is_evicted(clock):
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "reply a")
+    cache.put("b", "reply b")
+    assert cache.get("a") == "reply a"
+    cache.put("c", "reply c")
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("reply a", "reply c")
+    assert cache.stats()["entries"] == 2
+
+
+def test_replies_expire_after_ttl(clock):
+    cache = ResponseCache(ttl=60)
+    cache.put("a", "reply a")
+    clock.now += 59
+    assert cache.get("a") == "reply a"
+    clock.now += 1
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == cache.stats()["misses"] == 1
+
+
+def test_disk_tier_survives_a_restart(tmp_path, clock):
+    db_path = str(tmp_path / "cache.db")
+    cache = ResponseCache(ttl=60, db_path=db_path)
+    cache.put("a", "reply a")
+    cache.put("b", "reply b")
+    cache.close()
+
+    cache = ResponseCache(ttl=60, db_path=db_path)
+    try:
+        assert cache.get("a") == "reply a"
+        assert cache.stats()["disk_hits"] == 1
+        # Promoted to memory, so the next hit does not touch the disk
+        assert cache.get("a") == "reply a"
+        assert cache.stats()["disk_hits"] == 1
+
+        clock.now += 60
+        assert cache.purge_expired() == 2
+        assert cache.get("b") is None
+    finally:
+        cache.close()
@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+
+from core.scheduler import BACKGROUND, INTERACTIVE, RequestScheduler
+
+
+def queued(scheduler):
+    return sum(stats["queued"] for stats in scheduler.stats().values())
+
+
+class Waiters:
+    """
+    Queues requests one at a time behind a held slot; each records its turn and releases at once.
+    """
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.order = []
+        self.threads = []
+
+    def add(self, session_id, priority=INTERACTIVE, label=None):
+        expected = queued(self.scheduler) + 1
+
+        def wait():
+            with self.scheduler.slot(session_id, priority):
+                self.order.append(label or session_id)
+
+        thread = threading.Thread(target=wait)
+        thread.start()
+        self.threads.append(thread)
+        deadline = time.monotonic() + 5
+        while queued(self.scheduler) < expected:
+            assert time.monotonic() < deadline, "request was never queued"
+            time.sleep(0.001)
+
+    def join(self):
+        for thread in self.threads:
+            thread.join(timeout=5)
+
+
+def test_never_runs_more_than_max_in_flight():
+    scheduler = RequestScheduler(max_in_flight=2)
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def work():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.01)
+        with lock:
+            running[0] -= 1
+
+    threads = [threading.Thread(target=scheduler.run, args=(work, f"s{i % 3}")) for i in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert peak[0] == 2
+    assert scheduler.stats()[INTERACTIVE]["completed"] == 12
+
+
+def test_interactive_requests_go_before_background():
+    scheduler = RequestScheduler(max_in_flight=1)
+    scheduler.acquire("holder")
+    waiters = Waiters(scheduler)
+    waiters.add("summary", BACKGROUND)
+    waiters.add("chat")
+    scheduler.release()
+    waiters.join()
+    assert waiters.order == ["chat", "summary"]
+
+
+def test_sessions_take_turns_within_a_class():
+    scheduler = RequestScheduler(max_in_flight=1)
+    scheduler.acquire("holder")
+    waiters = Waiters(scheduler)
+    for i in range(3):
+        waiters.add("chatty", label=f"chatty {i}")
+    waiters.add("quiet")
+    scheduler.release()
+    waiters.join()
+    assert waiters.order == ["chatty 0", "quiet", "chatty 1", "chatty 2"]
+
+
+def test_background_leaves_a_slot_for_interactive():
+    scheduler = RequestScheduler(max_in_flight=2)
+    scheduler.acquire("a", BACKGROUND)
+    with pytest.raises(TimeoutError):
+        scheduler.acquire("b", BACKGROUND, timeout=0.05)
+    scheduler.acquire("c", INTERACTIVE, timeout=0.05)
+    assert scheduler.in_flight == 2
+    assert scheduler.stats()[BACKGROUND]["timed_out"] == 1
+
+
+def test_timed_out_request_leaves_the_queue():
+    scheduler = RequestScheduler(max_in_flight=1)
+    scheduler.acquire("holder")
+    with pytest.raises(TimeoutError):
+        scheduler.acquire("late", timeout=0.05)
+    assert queued(scheduler) == 0
+    scheduler.release()
+    scheduler.acquire("next", timeout=0.05)
+    assert scheduler.in_flight == 1
+
+
+def test_unknown_priority_is_rejected():
+    with pytest.raises(ValueError):
+        RequestScheduler().acquire(priority="urgent")
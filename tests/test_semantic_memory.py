@@ -0,0 +1,78 @@
+import threading
+
+import ollama
+
+from benchmarks.stub_ollama import StubOllamaServer
+from core.ai_client import OllamaClient
+from core.memory import ConversationMemory
+from core.semantic_memory import HashingEmbedder, SemanticMemoryIndex
+
+TURNS = [
+    ("My cat is called Miso", "What a lovely name for a cat!", "2024-01-01 10:00:00"),
+    ("I work as a nurse at night", "Night shifts must be tiring.", "2024-01-01 10:01:00"),
+    ("Recommend a science fiction book", "Try The Left Hand of Darkness.", "2024-01-01 10:02:00"),
+]
+
+
+def test_backfill_only_indexes_missing_turns():
+    index = SemanticMemoryIndex(HashingEmbedder(), background=False)
+    assert index.backfill("s", TURNS[:2]) == 2
+    assert index.backfill("s", TURNS) == 1
+    assert index.count("s") == 3
+    assert index.search("s", "what is my cat called", k=1)[0][0] == TURNS[0][0]
+
+
+def test_persisted_index_survives_a_restart(tmp_path):
+    directory = str(tmp_path / "index")
+    index = SemanticMemoryIndex(HashingEmbedder(), persist_dir=directory)
+    index.add_turns("s", TURNS)
+    index.close()
+
+    reopened = SemanticMemoryIndex(HashingEmbedder(), persist_dir=directory)
+    try:
+        assert reopened.count("s") == 3
+        assert reopened.backfill("s", TURNS) == 0
+    finally:
+        reopened.close()
+
+
+class GatedEmbedder(HashingEmbedder):
+    """
+    Blocks every embedding call until opened, to show nothing on the reply path waits for one.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+
+    def __call__(self, texts):
+        assert self.gate.wait(5), "embedder was never opened"
+        return super().__call__(texts)
+
+
+def test_client_backfills_a_session_in_the_background(tmp_path):
+    memory = ConversationMemory(str(tmp_path / "memory.db"))
+    for user_input, assistant_response, _ in TURNS:
+        memory.save_conversation(user_input, assistant_response, "s")
+    embedder = GatedEmbedder()
+    index = SemanticMemoryIndex(embedder)
+
+    with StubOllamaServer(reply_tokens=4) as stub:
+        client = OllamaClient('qwen3:1.7b', memory=memory, semantic_index=index, semantic_k=1)
+        client.client = ollama.Client(host=stub.url)
+        # Answered while the backfill is still waiting for the embedder
+        reply = client.generate_response("what is my cat called", session_id="s", context_limit=1)
+        assert reply and "sorry" not in reply
+        assert index.count("s") == 0
+
+        embedder.gate.set()
+        index.flush()
+        # The three stored turns, then the new one; the new turn is not backfilled a second time
+        assert index.count("s") == 4
+        client.generate_response("and what do I do for work", session_id="s", context_limit=1)
+        assert index.search("s", "recommend a science fiction book", k=1)[0][0] == TURNS[2][0]
+
+    index.flush()
+    assert index.count("s") == 5
+    index.close()
+    memory.close()
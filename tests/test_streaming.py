@@ -0,0 +1,45 @@
+import pytest
+
+from core.streaming import ThinkStripper, strip_reasoning
+
+
+def stream(chunks):
+    stripper = ThinkStripper()
+    return "".join(stripper.feed(chunk) for chunk in chunks) + stripper.flush()
+
+
+def test_leading_block_is_removed():
+    assert strip_reasoning("<think>plan the answer</think>\n\nHello there") == "Hello there"
+
+
+def test_think_tag_inside_the_reply_is_kept():
+    assert strip_reasoning("Use the <think> tag like this") == "Use the <think> tag like this"
+    assert strip_reasoning("Hi <think>not reasoning</think> bye") == "Hi <think>not reasoning</think> bye"
+
+
+def test_unclosed_block_returns_raw_text():
+    assert strip_reasoning("<think>cut off by num_predict") == "<think>cut off by num_predict"
+
+
+def test_reply_without_tags_is_unchanged():
+    assert strip_reasoning("  plain reply ") == "plain reply"
+    assert strip_reasoning("") == ""
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 8])
+def test_tags_split_across_chunks(size):
+    text = "  <think>a</think> b</thi\n<think>c</think>Answer <think> stays"
+    chunks = [text[i:i + size] for i in range(0, len(text), size)]
+    assert stream(chunks) == "b</thi\n<think>c</think>Answer <think> stays"
+
+
+def test_visible_text_is_not_held_back_after_it_starts():
+    stripper = ThinkStripper()
+    assert stripper.feed("<think>x</think>Hel") == "Hel"
+    assert stripper.feed("lo <thi") == "lo <thi"
+    assert stripper.flush() == ""
+
+
+def test_partial_open_tag_at_end_of_stream_is_returned():
+    assert stream(["<thi"]) == "<thi"
+    assert stream(["<think>unfinished", " block"]) == "<think>unfinished block"
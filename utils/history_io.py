@@ -0,0 +1,59 @@
+"""
+Export and import conversation history as JSONL or CSV.
+
+Usage (from the project root):
+    python -m utils.history_io export backup.jsonl
+    python -m utils.history_io export session.csv --session my_session
+    python -m utils.history_io import backup.jsonl --db data/memory.db
+"""
+import argparse
+import csv
+import sys
+import time
+
+from core.memory import ConversationMemory
+
+
+def progress_printer(action: str):
+    start = time.perf_counter()
+
+    def report(count: int):
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        print(f"\r{action} {count:,} turns ({count / elapsed:,.0f}/s)", end="", file=sys.stderr, flush=True)
+
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Export or import BLISS conversation history")
+    parser.add_argument("action", choices=["export", "import"])
+    parser.add_argument("path", help="JSONL or CSV file")
+    parser.add_argument("--db", default="data/memory.db", help="Database file (default: data/memory.db)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Defaults to the file extension")
+    parser.add_argument("--session", help="Export only this session / import everything into it")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows per query or transaction")
+    args = parser.parse_args(argv)
+
+    memory = ConversationMemory(args.db)
+    try:
+        if args.action == "export":
+            count = memory.export_conversations(
+                args.path, args.format, args.session, args.chunk_size, progress_printer("Exported")
+            )
+        else:
+            count = memory.import_conversations(
+                args.path, args.format, args.session, args.chunk_size, progress_printer("Imported")
+            )
+    except (OSError, ValueError, KeyError, csv.Error) as e:
+        print(f"\n❌ {args.action.capitalize()} failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        memory.close()
+
+    print(file=sys.stderr)
+    print(f"✅ {args.action.capitalize()}ed {count:,} turns {'to' if args.action == 'export' else 'from'} {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,14 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from core.ai_client import OllamaClient
 from core.personality import PersonalityLoader
+from core.personality_registry import PersonalityRegistry, get_personality_registry
+from core.memory import ConversationMemory
+from core.compaction import ConversationCompactor
+from core.scheduler import RequestScheduler
+from core.model_router import ModelRouter, TASK_CHAT, TASK_EMBEDDING
+from core.model_catalog import get_model_catalog
+from core.semantic_memory import OllamaEmbedder, SemanticMemoryIndex
+from core.metrics import get_metrics_registry
 from voice.speech_to_text import create_speech_to_text
 from voice.text_to_speech import create_text_to_speech
 
@@ -18,10 +26,89 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_resource
+def get_shared_memory() -> ConversationMemory:
+    # One pooled memory per process, shared by every browser session; turns are
+    # group-committed in the background so saving never blocks a reply, and hot
+    # sessions build their context from the in-process recent-turn cache
+    return ConversationMemory(write_behind=True, cache_sessions=256)
+
+@st.cache_resource
+def get_shared_scheduler() -> RequestScheduler:
+    # Every browser session queues its model requests here, so concurrent users
+    # take turns instead of all hitting Ollama at once
+    return RequestScheduler(max_in_flight=2)
+
+@st.cache_resource
+def get_shared_router() -> ModelRouter:
+    # Latency is tracked across all sessions, so everyone steps down to the
+    # smaller model together when Ollama is overloaded
+    return ModelRouter()
+
+@st.cache_resource
+def get_shared_semantic_index():
+    # Recalls older turns by meaning; the index is saved under data/ on exit and
+    # each session catches up from the database on first use. Needs an embedding
+    # model in Ollama, so without one the app runs without semantic recall.
+    try:
+        embedding_model = get_model_catalog().resolve(get_shared_router().route(TASK_EMBEDDING))
+    except Exception as e:
+        print(f"Semantic memory disabled, could not list Ollama models: {e}")
+        return None
+    if not embedding_model:
+        print("Semantic memory disabled: no embedding model installed (ollama pull nomic-embed-text)")
+        return None
+    return SemanticMemoryIndex(OllamaEmbedder(embedding_model), persist_dir="data/semantic_index")
+
+@st.cache_resource
+def get_shared_personality_registry() -> PersonalityRegistry:
+    # Watches data/personalities in the background, so the sidebar lists from
+    # memory and an edited personality file drops its cached prompt right away
+    return get_personality_registry().start()
+
+@st.cache_resource
+def get_shared_personality_loader() -> PersonalityLoader:
+    # With BLISS_PERSONALITY_BUNDLE set, personalities come from a prebuilt bundle
+    # (python core/personality_bundle.py): one mapped file, each persona parsed on first use
+    bundle_path = os.environ.get("BLISS_PERSONALITY_BUNDLE")
+    if bundle_path:
+        return PersonalityLoader(bundle_path=bundle_path)
+    get_shared_personality_registry()
+    return PersonalityLoader()
+
+@st.cache_resource
+def get_shared_compactor() -> ConversationCompactor:
+    # Folds the turns that no longer fit in a session's prompt into its stored
+    # summary, on a worker thread and at background priority in the scheduler
+    summarizer = OllamaClient(
+        model_name=get_shared_router().route(TASK_CHAT),
+        memory=get_shared_memory(),
+        scheduler=get_shared_scheduler(),
+        router=get_shared_router(),
+        request_timeout=60.0,
+        personality_loader=get_shared_personality_loader()
+    )
+    return ConversationCompactor(get_shared_memory(), summarizer.summarize_turns)
+
+
 if "messages" not in st.session_state:
     st.session_state.messages = []
 if "ai_client" not in st.session_state:
-    st.session_state.ai_client = OllamaClient(model_name="qwen3:1.7b")
+    # The router picks the chat model per request; history is packed to that model's budget
+    st.session_state.ai_client = OllamaClient(
+        model_name=get_shared_router().route(TASK_CHAT),
+        memory=get_shared_memory(),
+        semantic_index=get_shared_semantic_index(),
+        model_token_budget=True,
+        stable_prefix=True,
+        scheduler=get_shared_scheduler(),
+        router=get_shared_router(),
+        request_timeout=60.0,
+        personality_loader=get_shared_personality_loader(),
+        compactor=get_shared_compactor()
+    )
+    # Load the model while the page renders; the first message waits for it below
+    st.session_state.ai_client.warm_up(background=True)
 if "session_id" not in st.session_state:
     st.session_state.session_id = "default"
 if "current_personality" not in st.session_state:
@@ -39,6 +126,12 @@ if "auto_speak_responses" not in st.session_state:
 with st.sidebar:
     st.title("🤖 Bliss Settings")
 
+    warm_state = st.session_state.ai_client.warm_state
+    if warm_state == 'warming':
+        st.info(f"⏳ Warming up {st.session_state.ai_client.chat_model}...")
+    elif warm_state == 'failed':
+        st.warning(f"Model warm-up failed: {st.session_state.ai_client.warm_error}")
+
     personalities = st.session_state.ai_client.get_available_personalities()
     selected_personality = st.selectbox(
         "Choose Personality",
@@ -131,7 +224,53 @@ with st.sidebar:
     conv_count = st.session_state.ai_client.get_conversation_count(st.session_state.session_id)
     st.metric("Conversations", conv_count)
 
-    personality_info = st.session_state.ai_client.get_current_personality_info()
+    context_window = st.session_state.ai_client.last_context_window
+    if context_window:
+        st.caption(
+            f"Last prompt: ~{context_window.token_count} of {context_window.budget} tokens, "
+            f"{context_window.turns_used} history turns"
+        )
+    system_prompt = st.session_state.ai_client.last_system_prompt
+    if system_prompt:
+        st.caption(
+            f"Personality prompt: ~{system_prompt.token_count} tokens, "
+            f"{len(system_prompt.fields_dropped)} fields left out"
+        )
+    interactive_queue = get_shared_scheduler().stats()["interactive"]
+    if interactive_queue["completed"]:
+        st.caption(
+            f"Queue: {interactive_queue['queued']} waiting, "
+            f"p95 wait {interactive_queue['wait_p95'] * 1000:.0f} ms"
+        )
+    if st.session_state.ai_client.last_model:
+        st.caption(f"Last reply from: {st.session_state.ai_client.last_model}")
+    usage = st.session_state.ai_client.last_usage
+    if usage and 'prompt_eval_count' in usage:
+        st.caption(f"Prompt tokens evaluated by Ollama: {usage['prompt_eval_count']}")
+
+    with st.expander("Latency debug"):
+        metrics = get_metrics_registry()
+        metrics.enabled = st.checkbox("Record stage timings", value=metrics.enabled)
+        stage_summary = metrics.summary()
+        if stage_summary:
+            st.table([
+                {"stage": stage, "count": values["count"], "mean ms": round(values["mean"] * 1000, 1),
+                 "p95 ≤ ms": values["p95"] * 1000}
+                for stage, values in stage_summary.items()
+            ])
+            st.download_button("Prometheus metrics", metrics.to_prometheus(), file_name="bliss_metrics.txt")
+            st.download_button("JSON metrics", metrics.to_json(indent=2), file_name="bliss_metrics.json")
+            if st.button("Reset timings"):
+                metrics.reset()
+        elif metrics.enabled:
+            st.caption("No requests timed yet.")
+        personality_cache = st.session_state.ai_client.personality_loader.cache.stats()
+        st.caption(
+            f"Personality cache: {personality_cache['entries']} compiled, {personality_cache['hits']} hits, "
+            f"{personality_cache['misses']} misses, {personality_cache['reloads']} reloads"
+        )
+
+    personality_info = st.session_state.ai_client.get_current_personality_info(st.session_state.current_personality)
     if personality_info:
         st.subheader("Current Personality")
         st.write(f"**Name:** {personality_info.get('name', 'Unknown')}")
@@ -141,7 +280,7 @@ with st.sidebar:
         st.write(f"**Description:** {personality_info.get('description', 'No description')}")
 
 
-personality_info = st.session_state.ai_client.get_current_personality_info()
+personality_info = st.session_state.ai_client.get_current_personality_info(st.session_state.current_personality)
 if personality_info and personality_info.get('name'):
     st.title("💬 {}".format(personality_info.get('name')))
 else:
@@ -163,23 +302,21 @@ if st.session_state.voice_enabled and st.session_state.stt.is_microphone_availab
                     st.markdown(voice_text)
 
                 with st.chat_message("assistant"):
-                    with st.spinner("Thinking..."):
-                        try:
-                            response = st.session_state.ai_client.generate_response(
-                                user_input=voice_text,
-                                personality_name=st.session_state.current_personality,
-                                session_id=st.session_state.session_id,
-                                context_limit=5
-                            )
-                            st.markdown(response)
-                            st.session_state.messages.append({"role": "assistant", "content": response})
-
-                            if st.session_state.auto_speak_responses and st.session_state.tts.is_available():
-                                st.session_state.tts.speak(response, blocking=False)
-                        except Exception as e:
-                            error_msg = f"Sorry, I encountered an error: {str(e)}"
-                            st.error(error_msg)
-                            st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                    try:
+                        response = st.write_stream(st.session_state.ai_client.generate_response_stream(
+                            user_input=voice_text,
+                            personality_name=st.session_state.current_personality,
+                            session_id=st.session_state.session_id,
+                            context_limit=5
+                        ))
+                        st.session_state.messages.append({"role": "assistant", "content": response})
+
+                        if st.session_state.auto_speak_responses and st.session_state.tts.is_available():
+                            st.session_state.tts.speak(response, blocking=False)
+                    except Exception as e:
+                        error_msg = f"Sorry, I encountered an error: {str(e)}"
+                        st.error(error_msg)
+                        st.session_state.messages.append({"role": "assistant", "content": error_msg})
 
                 st.rerun()
 
@@ -206,23 +343,25 @@ if prompt := st.chat_input("Type your message here..."):
         st.markdown(prompt)
     
     with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            try:
-                response = st.session_state.ai_client.generate_response(
-                    user_input=prompt,
-                    personality_name=st.session_state.current_personality,
-                    session_id=st.session_state.session_id,
-                    context_limit=5
-                )
-                st.markdown(response)
-                st.session_state.messages.append({"role": "assistant", "content": response})
-
-                if st.session_state.auto_speak_responses and st.session_state.tts.is_available():
-                    st.session_state.tts.speak(response, blocking=False)
-            except Exception as e:
-                error_msg = f"Sorry, I encountered an error: {str(e)}"
-                st.error(error_msg)
-                st.session_state.messages.append({"role": "assistant", "content": error_msg})
+        if st.session_state.ai_client.warm_state == 'warming':
+            with st.spinner("Model is still warming up..."):
+                st.session_state.ai_client.wait_until_ready()
+        try:
+            # Render tokens as they arrive instead of waiting for the whole reply
+            response = st.write_stream(st.session_state.ai_client.generate_response_stream(
+                user_input=prompt,
+                personality_name=st.session_state.current_personality,
+                session_id=st.session_state.session_id,
+                context_limit=5
+            ))
+            st.session_state.messages.append({"role": "assistant", "content": response})
+
+            if st.session_state.auto_speak_responses and st.session_state.tts.is_available():
+                st.session_state.tts.speak(response, blocking=False)
+        except Exception as e:
+            error_msg = f"Sorry, I encountered an error: {str(e)}"
+            st.error(error_msg)
+            st.session_state.messages.append({"role": "assistant", "content": error_msg})
 
 st.markdown("---")
 st.markdown("Bliss is powered by Ollama")
\ No newline at end of file